@@ -0,0 +1 @@
+"""Offline performance benchmarks on synthetic data"""
\ No newline at end of file
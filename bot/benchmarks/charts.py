@@ -0,0 +1,119 @@
+# charts.py
+
+"""
+Signal chart benchmark: render time and file size per output setting
+
+The "legacy" row is the old output (every bar, 15x10 in at 100 dpi, PNG via
+savefig); the other rows go through plot_signal's compact path with the
+given window, format and DPI.
+
+Usage:
+    python -m bot.benchmarks.charts --bars 500,5000 --formats png,jpeg,webp --repeat 3
+    python -m bot.benchmarks.charts --compare old.json new.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import warnings
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import mplfinance as mpf
+import pandas as pd
+from bot.benchmarks.common import summarize, run_metadata, write_results, compare_results, progress
+from bot.config import CHART_BARS, CHART_DPI, TIMEFRAME
+from bot.data.data_fetch import _to_frame
+from bot.data.synthetic import generate_ohlcv
+from bot.indicators.indicators import add_indicators
+
+DEFAULT_BARS = (500, 5000)
+DEFAULT_FORMATS = ("png", "jpeg", "webp")
+
+def _frame(bars, seed):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # ta делит 0/0 в ADX
+        return add_indicators(_to_frame(generate_ohlcv(bars + 60, seed=seed))).dropna().tail(bars)
+
+def _legacy_render(df, path, price):
+    """The chart exactly as plot_signal drew it before compact output"""
+    df_plot = df.copy(deep=False)
+    df_plot.index = pd.DatetimeIndex(df_plot["timestamp"])
+    lines = [mpf.make_addplot(pd.Series(level, index=df_plot.index), color=color, width=1, panel=0)
+             for level, color in ((price, "blue"), (price * 0.98, "red"), (price * 1.06, "green"))]
+    fig, _ = mpf.plot(df_plot, type="candle", volume=True, addplot=lines, figsize=(15, 10), returnfig=True,
+                      warn_too_much_data=len(df_plot) + 1)
+    fig.savefig(path)
+    plt.close(fig)
+    return path
+
+def _timed(render, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        path = render()
+        timings.append(time.perf_counter() - start)
+        size = os.path.getsize(path)
+        os.remove(path)
+    return timings, size
+
+def bench_charts(bars, formats, seed, repeat, window=CHART_BARS, dpi=CHART_DPI):
+    """Render the same signal chart with the legacy output and every format"""
+    from bot.visualization.visualizer import plot_signal
+
+    df = _frame(bars, seed)
+    price = float(df["close"].iloc[-1])
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = os.path.join(directory, "legacy.png")
+        timings, size = _timed(lambda: _legacy_render(df, legacy, price), repeat)
+        results.append(summarize("plot_signal", timings, bars=bars, output="legacy", file_bytes=size))
+
+    for fmt in formats:
+        timings, size = _timed(lambda: plot_signal(df, "BENCH/USDT", TIMEFRAME, "ПОКУПКА", price, price * 0.98,
+                                                   price * 1.06, bars=window, fmt=fmt, dpi=dpi), repeat)
+        results.append(summarize("plot_signal", timings, bars=bars, output=fmt, window=window, dpi=dpi,
+                                 file_bytes=size))
+    return results
+
+def run_benchmarks(bars_list=DEFAULT_BARS, formats=DEFAULT_FORMATS, seed=42, repeat=3, window=CHART_BARS,
+                   dpi=CHART_DPI):
+    """Run the chart benchmark for every frame size; returns the JSON-ready report"""
+    results = []
+    for bars in bars_list:
+        progress(f"Chart benchmark: {bars} bars")
+        results.extend(bench_charts(bars, formats, seed, repeat, window, dpi))
+    return {"meta": run_metadata(seed=seed, repeat=repeat, timeframe=TIMEFRAME), "results": results}
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure signal chart render time and file size")
+    parser.add_argument("--bars", type=_int_list, default=list(DEFAULT_BARS), help="Comma-separated frame sizes")
+    parser.add_argument("--formats", default=",".join(DEFAULT_FORMATS), help="Comma-separated: png,jpeg,webp")
+    parser.add_argument("--window", type=int, default=CHART_BARS, help="Bars kept on the chart")
+    parser.add_argument("--dpi", type=int, default=CHART_DPI)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="JSON file for the results")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="Compare two result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare_results(*args.compare))
+        return 0
+
+    formats = [fmt for fmt in args.formats.split(",") if fmt]
+    report = run_benchmarks(args.bars, formats, args.seed, args.repeat, args.window, args.dpi)
+    path = write_results(report, "charts", args.output)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Results written to {path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+# common.py
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+RESULTS_DIR = "bench_results"
+
+def summarize(name, timings, **params):
+    """Collapse raw timings of one benchmark into a result record"""
+    record = {"benchmark": name}
+    record.update(params)
+    record.update({
+        "repeat": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "max_s": max(timings)
+    })
+    return record
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_metadata(**extra):
+    """Environment details stored next to the results so runs can be compared"""
+    import numpy as np
+    import pandas as pd
+
+    meta = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__
+    }
+    meta.update(extra)
+    return meta
+
+def write_results(report, name, path=None):
+    """Dump a report as JSON, by default to bench_results/<name>_<timestamp>.json"""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f'{name}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+# Поля с измерениями, а не с параметрами прогона
+MEASURED_FIELDS = {"repeat", "min_s", "median_s", "mean_s", "max_s", "file_bytes", "signals",
+                   "max_rel_deviation"}
+
+def _result_key(record):
+    return tuple(sorted((k, v) for k, v in record.items() if k not in MEASURED_FIELDS))
+
+def compare_results(old_path, new_path):
+    """Render a table of median time ratios between two result files"""
+    with open(old_path, encoding="utf-8") as f:
+        old = {_result_key(r): r for r in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+
+    lines = [f"{'benchmark':<50} {'old, s':>10} {'new, s':>10} {'ratio':>7}"]
+    for record in new:
+        key = _result_key(record)
+        label = ", ".join(f"{k}={v}" for k, v in key)
+        before = old.get(key)
+        if before is None:
+            lines.append(f"{label:<50} {'-':>10} {record['median_s']:>10.4f} {'new':>7}")
+            continue
+        ratio = record["median_s"] / before["median_s"] if before["median_s"] else float("inf")
+        flag = "  <-- slower" if ratio > 1.1 else ""
+        lines.append(f"{label:<50} {before['median_s']:>10.4f} {record['median_s']:>10.4f} "
+                     f"{ratio:>6.2f}x{flag}")
+    return "\n".join(lines)
+
+def progress(message):
+    """Progress output goes to stderr so stdout stays machine-readable"""
+    print(message, file=sys.stderr, flush=True)
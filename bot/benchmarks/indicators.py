@@ -0,0 +1,98 @@
+# indicators.py
+
+"""
+Indicator backend benchmark: ta vs the kernels from bot.indicators.kernels
+
+Usage:
+    python -m bot.benchmarks.indicators --sizes 500,50000,1000000 --repeat 3
+    python -m bot.benchmarks.indicators --compare old.json new.json
+"""
+
+import argparse
+import json
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from bot.benchmarks.common import summarize, run_metadata, write_results, compare_results, progress
+from bot.data.synthetic import generate_ohlcv
+from bot.indicators.indicators import add_indicators, BACKENDS
+
+DEFAULT_SIZES = (500, 50_000, 1_000_000)
+
+def _frame(bars, seed):
+    raw = generate_ohlcv(bars, seed=seed)
+    return pd.DataFrame(raw, columns=["timestamp", "open", "high", "low", "close", "volume"])
+
+def max_deviation(expected, result):
+    """Largest relative difference over all indicator columns (NaN positions must match)"""
+    worst = 0.0
+    for column in expected.columns:
+        a = expected[column].to_numpy(float)
+        b = result[column].to_numpy(float)
+        if not np.array_equal(np.isnan(a), np.isnan(b)):
+            return float("inf")
+        mask = ~np.isnan(a)
+        scale = np.maximum(np.abs(a[mask]), 1e-9)
+        if mask.any():
+            worst = max(worst, float((np.abs(a[mask] - b[mask]) / scale).max()))
+    return worst
+
+def bench_backends(bars, seed, repeat):
+    """Time add_indicators with every backend on the same candles"""
+    from bot.indicators import kernels
+
+    df = _frame(bars, seed)
+    outputs = {}
+    results = []
+    for backend in BACKENDS:
+        if backend == "fast":
+            add_indicators(df.head(100).copy(), backend)  # Компиляция numba не входит в замер
+        timings = []
+        for _ in range(repeat):
+            frame = df.copy()
+            start = time.perf_counter()
+            outputs[backend] = add_indicators(frame, backend)
+            timings.append(time.perf_counter() - start)
+        jit = "numba" if kernels.JIT_AVAILABLE else "numpy"
+        results.append(summarize("add_indicators", timings, bars=bars, backend=backend,
+                                 kernels=jit if backend == "fast" else None))
+    results[-1]["max_rel_deviation"] = max_deviation(outputs["ta"], outputs["fast"])
+    return results
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed=42, repeat=3):
+    """Run the backend comparison for every size; returns the JSON-ready report"""
+    results = []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # ta делит 0/0 в ADX
+        for bars in sizes:
+            progress(f"Indicator benchmark: {bars} bars")
+            results.extend(bench_backends(bars, seed, repeat))
+    return {"meta": run_metadata(seed=seed, repeat=repeat), "results": results}
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare indicator backends on synthetic OHLCV")
+    parser.add_argument("--sizes", type=_int_list, default=list(DEFAULT_SIZES),
+                        help="Comma-separated candle counts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="JSON file for the results")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="Compare two result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare_results(*args.compare))
+        return 0
+
+    report = run_benchmarks(args.sizes, args.seed, args.repeat)
+    path = write_results(report, "indicators", args.output)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Results written to {path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
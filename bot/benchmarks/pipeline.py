@@ -0,0 +1,144 @@
+# pipeline.py
+
+"""
+Offline benchmark of the fetch -> indicators -> signal -> render pipeline
+
+Usage:
+    python -m bot.benchmarks.pipeline --sizes 500,5000 --symbols 1,10 --output results.json
+    python -m bot.benchmarks.pipeline --compare old.json new.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from bot.config import TIMEFRAME
+from bot.benchmarks.common import summarize, run_metadata, write_results, compare_results, progress
+from bot.data.data_fetch import fetch_ohlcv, validate_data
+from bot.data.synthetic import StubExchange
+from bot.indicators.indicators import add_indicators
+from bot.core.strategy import generate_signal
+
+DEFAULT_SIZES = (500, 5_000, 50_000, 1_000_000)
+DEFAULT_SYMBOL_COUNTS = (1, 10, 100, 500)
+CYCLE_BARS = 500  # Столько свечей запрашивает бот за цикл
+RENDER_MAX_BARS = 5_000  # mplfinance на миллионе свечей считается часами
+
+def _time_call(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+def bench_stages(bars, seed, repeat, render_max_bars=RENDER_MAX_BARS):
+    """Time each pipeline stage separately on one symbol with `bars` candles"""
+    from bot.visualization.visualizer import plot_signal
+
+    symbol = "BENCH/USDT"
+    exchange = StubExchange(history_bars=bars, seed=seed)
+    exchange.candles(symbol)  # Генерация данных не входит в замер
+    results = []
+
+    timings, raw = _time_call(lambda: fetch_ohlcv(symbol, exchange, TIMEFRAME, limit=bars), repeat)
+    results.append(summarize("fetch_ohlcv", timings, bars=bars, symbols=1))
+
+    timings, df = _time_call(lambda: add_indicators(raw.copy()).dropna(), repeat)
+    results.append(summarize("add_indicators", timings, bars=bars, symbols=1))
+
+    timings, _ = _time_call(lambda: generate_signal(symbol, df), repeat)
+    results.append(summarize("generate_signal", timings, bars=bars, symbols=1))
+
+    if bars <= render_max_bars:
+        price = df["close"].iloc[-1]
+
+        def render():
+            path = plot_signal(df, symbol, TIMEFRAME, "ПОКУПКА", price, price * 0.98, price * 1.06)
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+
+        timings, size = _time_call(render, repeat)
+        results.append(summarize("plot_signal", timings, bars=bars, symbols=1, file_bytes=size))
+
+    return results
+
+def bench_cycle(symbol_count, seed, repeat, bars=CYCLE_BARS):
+    """Time a full analysis cycle over `symbol_count` symbols, without sending anything"""
+    from bot.visualization.visualizer import plot_signal
+
+    symbols = [f"SYM{i}/USDT" for i in range(symbol_count)]
+    exchange = StubExchange(history_bars=bars, seed=seed)
+    for symbol in symbols:
+        exchange.candles(symbol)
+
+    def cycle():
+        fired = 0
+        for symbol in symbols:
+            df = fetch_ohlcv(symbol, exchange, TIMEFRAME, limit=bars)
+            if not validate_data(df, symbol):
+                continue
+            df = add_indicators(df).dropna()
+            signal = generate_signal(symbol, df)
+            if signal:
+                fired += 1
+                path = plot_signal(df, symbol, TIMEFRAME, signal["signal"], signal["price"],
+                                   signal["stop_loss"], signal["take_profit"])
+                os.remove(path)
+        return fired
+
+    timings, fired = _time_call(cycle, repeat)
+    return summarize("cycle", timings, bars=bars, symbols=symbol_count, signals=fired)
+
+def run_benchmarks(sizes=DEFAULT_SIZES, symbol_counts=DEFAULT_SYMBOL_COUNTS, seed=42, repeat=3,
+                   render_max_bars=RENDER_MAX_BARS):
+    """
+    Run the stage and cycle benchmarks
+
+    Returns:
+        dict: {"meta": ..., "results": [...]} ready to be dumped as JSON
+    """
+    results = []
+    for bars in sizes:
+        progress(f"Stage benchmark: {bars} bars")
+        results.extend(bench_stages(bars, seed, repeat, render_max_bars))
+    for count in symbol_counts:
+        progress(f"Cycle benchmark: {count} symbols")
+        results.append(bench_cycle(count, seed, repeat))
+    return {"meta": run_metadata(seed=seed, repeat=repeat), "results": results}
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark on synthetic OHLCV")
+    parser.add_argument("--sizes", type=_int_list, default=list(DEFAULT_SIZES),
+                        help="Comma-separated candle counts for the stage benchmarks")
+    parser.add_argument("--symbols", type=_int_list, default=list(DEFAULT_SYMBOL_COUNTS),
+                        help="Comma-separated symbol counts for the cycle benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--render-max-bars", type=int, default=RENDER_MAX_BARS,
+                        help="Skip plot_signal for larger sizes")
+    parser.add_argument("--output", default=None, help="JSON file for the results")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="Compare two result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare_results(*args.compare))
+        return 0
+
+    # Логи анализа по каждой свече не должны попадать в замеры
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run_benchmarks(args.sizes, args.symbols, args.seed, args.repeat, args.render_max_bars)
+    path = write_results(report, "pipeline", args.output)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Results written to {path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+# startup.py
+
+"""
+Startup cost benchmark: import time of bot entry points in fresh interpreters
+
+Usage:
+    python -m bot.benchmarks.startup --repeat 5 --check
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from bot.benchmarks.common import summarize, run_metadata, write_results, progress
+
+HEAVY_MODULES = ("ccxt", "ta", "matplotlib", "mplfinance", "requests")
+
+# Точка входа -> тяжелые модули, которые она не должна загружать
+ENTRY_POINTS = {
+    "bot.config": HEAVY_MODULES,
+    "bot.core": HEAVY_MODULES,
+    "bot.cli": HEAVY_MODULES,
+    "bot.core.strategy": HEAVY_MODULES,
+    "bot.indicators.indicators": HEAVY_MODULES,
+    "bot.benchmarks.pipeline": HEAVY_MODULES,
+    "bot.benchmarks.indicators": HEAVY_MODULES,
+    "bot.core.main": ("ta", "matplotlib", "mplfinance")  # ccxt и requests нужны циклу сразу
+}
+
+_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': elapsed, 'modules': sorted(m for m in {heavy!r} if m in sys.modules)}}))\n"
+)
+
+def measure_import(module, repeat=5):
+    """Import a module `repeat` times in new interpreters and collect timings"""
+    timings = []
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        timings.append(probe["seconds"])
+        loaded = probe["modules"]
+    return timings, loaded
+
+def run_benchmarks(repeat=5):
+    """Measure every entry point; returns the JSON-ready report"""
+    results = []
+    for module, forbidden in ENTRY_POINTS.items():
+        progress(f"Import benchmark: {module}")
+        timings, loaded = measure_import(module, repeat)
+        unexpected = [name for name in loaded if name in forbidden]
+        results.append(summarize("import", timings, module=module, heavy_loaded=",".join(unexpected)))
+    return {"meta": run_metadata(repeat=repeat), "results": results}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time benchmark of bot entry points")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="JSON file for the results")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with code 1 if an entry point loads a heavy module eagerly")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.repeat)
+    path = write_results(report, "startup", args.output)
+    for record in report["results"]:
+        heavy = f"  eager: {record['heavy_loaded']}" if record["heavy_loaded"] else ""
+        print(f"{record['module']:<28} {record['median_s'] * 1000:8.1f} ms{heavy}")
+    print(f"Results written to {path}")
+
+    if args.check and any(record["heavy_loaded"] for record in report["results"]):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+# cli.py
+
+"""
+Command line entry point: python -m bot <command>
+
+Every command imports only the modules it needs, so `verify-telegram` or
+`bench` do not pay for ccxt, ta or matplotlib.
+"""
+
+import argparse
+import json
+
+def cmd_run(args):
+    if args.shards:
+        from bot.core.sharding import run_sharded
+        run_sharded(args.shards)
+        return 0
+    from bot.core.main import run_bot
+    run_bot()
+    return 0
+
+def cmd_scan_once(args):
+    from bot.core.main import initialize_exchange, get_cycle_symbols, run_cycle
+    exchange = initialize_exchange()
+    symbols = args.symbols.split(",") if args.symbols else get_cycle_symbols(exchange)
+    run_cycle(exchange, symbols)
+    return 0
+
+def cmd_backtest(args):
+    from bot.core.backtest import run_backtest
+    from bot.data.data_fetch import fetch_ohlcv
+
+    if args.live:
+        import ccxt
+        exchange = ccxt.binance({"enableRateLimit": True, "options": {"defaultType": "future"}})
+    else:
+        from bot.data.synthetic import StubExchange
+        exchange = StubExchange(history_bars=args.bars, seed=args.seed, timeframe=args.timeframe)
+
+    if args.sweep:
+        from bot.core.backtest import sweep_backtest
+        name, _, values = args.sweep.partition("=")
+        df = fetch_ohlcv(args.symbol, exchange, timeframe=args.timeframe, limit=args.bars)
+        results = sweep_backtest(args.symbol, df, name, [float(value) for value in values.split(",")])
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return 0
+
+    if args.symbols:
+        from bot.core.backtest import run_backtests
+        symbols = args.symbols.split(",")
+        frames = {symbol: fetch_ohlcv(symbol, exchange, timeframe=args.timeframe, limit=args.bars)
+                  for symbol in symbols}
+        print(json.dumps(run_backtests(frames, workers=args.workers), indent=2, ensure_ascii=False))
+        return 0
+
+    df = fetch_ohlcv(args.symbol, exchange, timeframe=args.timeframe, limit=args.bars)
+    print(json.dumps(run_backtest(args.symbol, df), indent=2, ensure_ascii=False))
+    return 0
+
+def cmd_bench(args):
+    if args.suite == "pipeline":
+        from bot.benchmarks.pipeline import main
+    elif args.suite == "indicators":
+        from bot.benchmarks.indicators import main
+    elif args.suite == "charts":
+        from bot.benchmarks.charts import main
+    else:
+        from bot.benchmarks.startup import main
+    return main(args.bench_args)
+
+def cmd_replay(args):
+    from bot.replay.harness import main
+    return main(args.replay_args)
+
+def cmd_profile_summary(args):
+    import glob
+    import os
+    from bot.config import PROFILE_DIR
+    from bot.monitoring.profiling import summarize_profiles, format_summary
+
+    directory = args.dir or PROFILE_DIR
+    paths = sorted(glob.glob(os.path.join(directory, "*.folded")))
+    if not paths:
+        print(f"No profiles in {directory}")
+        return 1
+    samples, rows = summarize_profiles(paths, args.top, args.sort)
+    print(format_summary(samples, rows, len(paths)))
+    return 0
+
+def cmd_verify_telegram(args):
+    from bot.notifications.notifier import verify_telegram_credentials, test_telegram_connection
+    if args.send_test:
+        test_telegram_connection()
+        return 0
+    return 0 if verify_telegram_credentials() else 1
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m bot", description="CryptoXanut futures bot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Run the trading loop")
+    run.add_argument("--shards", type=int, default=0,
+                     help="Split the symbols over this many worker processes")
+    run.set_defaults(func=cmd_run)
+
+    scan = subparsers.add_parser("scan-once", help="Run a single analysis cycle and exit")
+    scan.add_argument("--symbols", help="Comma-separated symbols instead of SYMBOLS/screener")
+    scan.set_defaults(func=cmd_scan_once)
+
+    backtest = subparsers.add_parser("backtest", help="Walk-forward backtest of the signal logic")
+    backtest.add_argument("--symbol", default="BTC/USDT")
+    backtest.add_argument("--symbols", help="Comma-separated symbols, backtested in parallel processes")
+    backtest.add_argument("--workers", type=int, default=None, help="Processes for --symbols")
+    backtest.add_argument("--timeframe", default="5m")
+    backtest.add_argument("--bars", type=int, default=1500)
+    backtest.add_argument("--seed", type=int, default=42, help="Seed for synthetic candles")
+    backtest.add_argument("--sweep", metavar="NAME=V1,V2,...",
+                          help="Backtest --symbol once per value of a rule constant, e.g. RSI_OVERSOLD=20,25,30")
+    backtest.add_argument("--live", action="store_true", help="Use public Binance candles instead of synthetic ones")
+    backtest.set_defaults(func=cmd_backtest)
+
+    bench = subparsers.add_parser("bench", help="Run an offline benchmark suite")
+    bench.add_argument("suite", choices=("pipeline", "indicators", "charts", "startup"))
+    bench.add_argument("bench_args", nargs=argparse.REMAINDER, help="Arguments passed to the suite")
+    bench.set_defaults(func=cmd_bench)
+
+    # Опции передаются харнессу как есть (см. main), --help тоже
+    replay = subparsers.add_parser("replay", help="Replay the bot loop against a local fake exchange",
+                                   add_help=False)
+    replay.set_defaults(func=cmd_replay)
+
+    profile = subparsers.add_parser("profile-summary", help="Hottest functions across slow-cycle profiles")
+    profile.add_argument("--dir", default=None, help="Directory with .folded dumps (PROFILE_DIR)")
+    profile.add_argument("--top", type=int, default=20)
+    profile.add_argument("--sort", choices=("self", "total"), default="self")
+    profile.set_defaults(func=cmd_profile_summary)
+
+    verify = subparsers.add_parser("verify-telegram", help="Check the Telegram bot token")
+    verify.add_argument("--send-test", action="store_true", help="Also send a test message")
+    verify.set_defaults(func=cmd_verify_telegram)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "replay":
+        args.replay_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.command not in ("bench", "profile-summary"):
+        from bot.logging_config import setup_logging
+        setup_logging()
+    return args.func(args)
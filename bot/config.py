@@ -22,6 +22,7 @@ SYMBOLS = [
 # Настройки Telegram
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")  # Другой адрес - для локальной заглушки
 
 # API ключи Binance
 BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
@@ -44,3 +45,139 @@ STOCH_OVERSOLD = 20
 STOCH_OVERBOUGHT = 80
 ADX_THRESHOLD = 25  # Минимальный ADX для силы тренда
 VOLUME_THRESHOLD = 1.5  # Порог всплеска объема
+
+# Правила сигналов: направление -> условие над колонками индикаторов (синтаксис в bot.core.rules).
+# Проверяются по порядку, срабатывает первое выполненное
+SIGNAL_RULES = {
+    "ПОКУПКА": "ema8 > ema13 > ema21 and rsi < RSI_OVERSOLD and mean(volume, 5) > shift(mean(volume, 5), 5)",
+    "ПРОДАЖА": "not (ema8 > ema13 > ema21) and rsi > RSI_OVERBOUGHT and mean(volume, 5) > shift(mean(volume, 5), 5)"
+}
+
+# Режим скринера: сканирование всех бессрочных USDT-M фьючерсов
+SCREENER_ENABLED = os.getenv("SCREENER_ENABLED", "false").lower() == "true"
+SCREENER_QUOTE = "USDT"  # Валюта котировки и расчетов
+SCREENER_MIN_QUOTE_VOLUME = 20_000_000  # Минимальный объем за 24ч в USDT
+SCREENER_MIN_PRICE_CHANGE_PCT = 2.0  # Минимальное изменение цены за 24ч, %
+SCREENER_MAX_SPREAD_PCT = 0.05  # Максимальный спред bid/ask, %
+SCREENER_MAX_SYMBOLS = 20  # Сколько пар проходит в полный анализ
+
+# Адаптивный опрос: активные символы обновляются чаще, спокойные - реже, в пределах бюджета запросов
+POLL_ADAPTIVE = os.getenv("POLL_ADAPTIVE", "false").lower() == "true"
+POLL_TICK = 5  # Как часто планировщик проверяет, каким символам пора обновиться, секунды
+POLL_MIN_INTERVAL = 15  # Интервал обновления символа у порога сигнала, секунды
+POLL_MAX_INTERVAL = 300  # Интервал обновления спокойного символа, секунды
+POLL_BUDGET = 0  # Запросов свечей за FUTURES_INTERVAL (0 - по числу символов, как при фиксированном опросе)
+POLL_RSI_BAND = 10  # За сколько пунктов RSI до порога символ считается близким к сигналу
+
+# Кластеры сигналов: коррелированные пары одного направления - одно уведомление с одним графиком
+CORRELATION_CLUSTERING = os.getenv("CORRELATION_CLUSTERING", "true").lower() == "true"
+CORRELATION_WINDOW = 288  # Свечей в окне корреляции доходностей (сутки на 5m)
+CORRELATION_THRESHOLD = 0.7  # Минимальная корреляция для объединения сигналов
+CORRELATION_MIN_CLUSTER = 2  # Сколько сигналов образуют кластер
+
+# Подавление повторных сигналов
+SIGNAL_COOLDOWN_SECONDS = 15 * 60  # Пауза между сигналами одного направления по паре
+SIGNAL_STATE_DB = os.getenv("SIGNAL_STATE_DB")  # Путь к SQLite файлу состояния (None - только в памяти)
+
+# Бумажная торговля: отслеживание сигналов до стоп-лосса или тейк-профита
+PAPER_TRADING_ENABLED = os.getenv("PAPER_TRADING_ENABLED", "false").lower() == "true"
+PAPER_TRADING_STATE = os.getenv("PAPER_TRADING_STATE", "paper_positions.npz")  # Файл состояния позиций
+
+# Метрики в формате Prometheus
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 - HTTP эндпоинт метрик отключен
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Запуск бота как единственного сервиса под надзором
+BOT_RUNTIME_MODE = os.getenv("BOT_RUNTIME_MODE", "process")  # "process" или "thread"
+BOT_LOCK_FILE = os.getenv("BOT_LOCK_FILE", "bot.lock")  # Один экземпляр бота на хост ("" - без блокировки)
+BOT_RESTART_BACKOFF = 5  # Начальная пауза перед перезапуском, секунды
+BOT_RESTART_MAX_BACKOFF = 300  # Максимальная пауза перед перезапуском, секунды
+BOT_LOCK_RETRY = 30  # Как часто процесс в standby пытается захватить блокировку, секунды
+BOT_STATUS_INTERVAL = 10  # Как часто владелец блокировки пишет статус для процессов в standby, секунды
+
+# Логирование
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_DIR = os.getenv("LOG_DIR", "")  # Директория логов ("" - текущая)
+LOG_FILE_PATTERN = "futures_analysis_{date}.log"  # Новый файл каждый день
+LOG_MAX_BYTES = 50 * 1024 * 1024  # Ротация по размеру внутри дня (0 - отключена)
+LOG_BACKUP_COUNT = 5  # Сколько частей файла хранить при ротации по размеру
+LOG_JSON = os.getenv("LOG_JSON", "false").lower() == "true"  # Структурированные JSON записи
+
+# Исполнение ордеров
+EXECUTION_ENABLED = os.getenv("EXECUTION_ENABLED", "false").lower() == "true"
+EXECUTION_DRY_RUN = os.getenv("EXECUTION_DRY_RUN", "true").lower() == "true"  # Только логировать ордера
+EXECUTION_DRY_RUN_MARGIN = 1000.0  # Маржа в USDT для dry run, если баланс недоступен
+EXECUTION_BATCH_SIZE = 5  # Ордеров в одном запросе batchOrders (лимит Binance - 5)
+FILL_POLL_INTERVAL = 0.2  # Интервал опроса статуса ордера, секунды
+FILL_TIMEOUT = 5.0  # Сколько ждать исполнения входа, секунды
+ORDER_WORKERS = 4  # Потоков для параллельной отправки пакетов и опроса ордеров
+EXECUTION_STATE_DB = os.getenv("EXECUTION_STATE_DB", "brackets.db")  # SQLite файл выставленных стопов/тейков
+EXECUTION_RECONCILE_INTERVAL = 300  # Как часто циклы без сигналов сверяют стопы/тейки с биржей, секунды
+
+# Данные микроструктуры рынка: ставка финансирования, открытый интерес, стакан
+MARKET_DATA_ENABLED = os.getenv("MARKET_DATA_ENABLED", "false").lower() == "true"
+MARKET_DATA_DEPTH = 20  # Уровней стакана для расчета дисбаланса
+MARKET_FUNDING_TTL = 120  # Время жизни кэша индекса премии, секунды
+MARKET_OPEN_INTEREST_TTL = 60  # Время жизни кэша открытого интереса, секунды
+MARKET_BOOK_TTL = 10  # Время жизни кэша стакана, секунды
+MARKET_DATA_WORKERS = 8  # Потоков для параллельных запросов по символам
+MAX_FUNDING_RATE = 0.0005  # Не входить по направлению толпы при ставке выше 0.05%
+BOOK_IMBALANCE_LIMIT = 0.3  # Не входить против стакана с дисбалансом сильнее 30%
+
+# Расчет индикаторов: "ta" - библиотека ta, "fast" - ядра bot.indicators.kernels (numba, если установлена)
+INDICATOR_BACKEND = os.getenv("INDICATOR_BACKEND", "ta")
+
+# Шардирование символов по процессам-воркерам
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))  # 0 - один процесс без шардирования
+SHARD_VIRTUAL_NODES = 64  # Точек на кольце хешей на одного воркера
+
+# Профилирование медленных циклов
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "true").lower() == "true"  # Сэмплер стека в цикле анализа
+PROFILE_SAMPLE_INTERVAL = 0.02  # Интервал снятия стека, секунды (50 Гц)
+PROFILE_SLOW_CYCLE_SECONDS = float(os.getenv("PROFILE_SLOW_CYCLE_SECONDS", str(FUTURES_INTERVAL)))  # Порог записи профиля
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")  # Куда сохранять .folded файлы
+PROFILE_MAX_DUMPS = 50  # Сколько последних профилей хранить
+
+# Контроль памяти долгоживущего цикла
+MEMORY_GUARD_ENABLED = os.getenv("MEMORY_GUARD_ENABLED", "true").lower() == "true"
+MEMORY_CHECK_EVERY = 10  # Проверять RSS раз в столько циклов
+MEMORY_GROWTH_ALERT_MB = float(os.getenv("MEMORY_GROWTH_ALERT_MB", "200"))  # Рост RSS между проверками для предупреждения
+MEMORY_TRACEMALLOC = os.getenv("MEMORY_TRACEMALLOC", "false").lower() == "true"  # Трассировать всегда (замедляет расчет в разы)
+MEMORY_TRACE_FRAMES = 1  # Глубина стека аллокаций tracemalloc
+MEMORY_TOP_ALLOCATORS = 10  # Сколько мест аллокаций экспортировать и логировать
+MEMORY_MAX_CHARTS = 200  # Сколько последних PNG хранить в charts/ (0 - без ограничения)
+MEMORY_MAX_CACHED_SYMBOLS = 2000  # Символов в кэшах рыночных данных и корреляций
+MEMORY_MAX_PENDING_SIGNALS = 100  # Сигналов, ожидающих кластеризации до конца цикла
+CANDLE_HISTORY_LIMIT = 500  # Свечей на символ в каждом цикле
+
+# Устойчивость запросов свечей к медленной или деградировавшей бирже
+FETCH_TIMEOUT = 10.0  # Срок на свечи одного символа вместе с повторами, секунды
+FETCH_MAX_RETRIES = 3  # Попыток на символ
+FETCH_RETRY_DELAY = 0.5  # Первая пауза перед повтором, далее удваивается (со случайной добавкой)
+FETCH_CYCLE_DEADLINE = 0.8  # Доля интервала цикла, после которой свечи берутся только из кэша
+FETCH_WORKERS = 8  # Потоков для запросов со сроком (брошенные по сроку запросы дорабатывают в них)
+FETCH_HEDGE = os.getenv("FETCH_HEDGE", "false").lower() == "true"  # Дублировать медленный запрос (расходует лимит запросов)
+FETCH_HEDGE_PERCENTILE = 95  # Дубль уходит после этого перцентиля задержки
+FETCH_HEDGE_MIN_DELAY = 0.2  # Не раньше чем через столько секунд
+FETCH_STALE_MAX_AGE = 900  # Сколько секунд свечи из кэша годятся как устаревшие
+CIRCUIT_FAILURE_THRESHOLD = 5  # Ошибок подряд до размыкания цепи эндпоинта
+CIRCUIT_RESET_SECONDS = 30  # Пауза до пробного запроса в разомкнутую цепь
+
+# Графики сигналов
+CHART_BARS = 120  # Последних свечей на графике без изменений (0 - вся история)
+CHART_HISTORY_BARS = 0  # Сколько более старых свечей показать свернутыми в OHLC (0 - не показывать)
+CHART_HISTORY_CANDLES = 40  # Во сколько свечей свернуть эту историю
+CHART_FORMAT = os.getenv("CHART_FORMAT", "png")  # png (палитра - меньше всего для графиков), jpeg или webp
+CHART_EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp"}  # Расширение файла графика для каждого формата
+CHART_SIZE = (12, 8)  # Размер в дюймах
+CHART_DPI = 80  # 960x640 точек: Telegram все равно ужимает фото до 1280 по большей стороне
+CHART_QUALITY = 80  # Качество JPEG/WebP
+CHART_PNG_COLORS = 64  # Цветов в палитре PNG
+CHART_MAX_BYTES = 200_000  # Целевой размер файла, при превышении качество снижается (0 - без ограничения)
+
+# Уведомления
+NOTIFY_DIGEST = os.getenv("NOTIFY_DIGEST", "false").lower() == "true"  # Одно сообщение со всеми сигналами цикла
+NOTIFY_DIGEST_CHART = True  # Прикладывать к сводке график сигнала с самым сильным трендом
+NOTIFY_DIGEST_CHANGE_BARS = 24  # За сколько свечей считать изменение цены в обзоре рынка
+NOTIFY_DIGEST_MARKET_AGE = POLL_MAX_INTERVAL  # Сколько секунд состояние символа входит в обзор рынка
+TELEGRAM_MESSAGE_LIMIT = 4096  # Лимит длины сообщения Bot API
@@ -1,8 +1,17 @@
-from .strategy import (
-    analyze_symbol,
-    add_indicators,
-    generate_signal,
-    analyze_trend,
-    analyze_momentum,
-    analyze_volume
-) 
\ No newline at end of file
+# Реэкспорт загружается лениво, чтобы `import bot.core` не тянул pandas и ta
+_STRATEGY_EXPORTS = (
+    "analyze_symbol",
+    "add_indicators",
+    "generate_signal",
+    "analyze_trend",
+    "analyze_momentum",
+    "analyze_volume"
+)
+
+__all__ = list(_STRATEGY_EXPORTS)
+
+def __getattr__(name):
+    if name in _STRATEGY_EXPORTS:
+        from . import strategy
+        return getattr(strategy, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,114 @@
+# backtest.py
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from bot.core.paper_trading import PaperPositionBook
+from bot.core.rules import compile_rules, signal_mask
+from bot.core.strategy import build_signal
+from bot.data.shared_frames import SharedFrame
+from bot.indicators.indicators import add_indicators
+
+logger = logging.getLogger(__name__)
+
+WARMUP_BARS = 10  # Первые свечи истории не торгуются
+
+def _prepare(df):
+    return add_indicators(df).dropna().reset_index(drop=True)
+
+def _simulate(symbol, df, directions):
+    times = df["timestamp"].map(lambda ts: ts.timestamp()).to_numpy()
+    highs = df["high"].to_numpy()
+    lows = df["low"].to_numpy()
+    closes = df["close"].to_numpy()
+    atrs = df["atr"].to_numpy()
+
+    book = PaperPositionBook()
+    signals = 0
+    for i in range(WARMUP_BARS, len(df)):
+        book.update([symbol], highs[i:i + 1], lows[i:i + 1], times[i:i + 1])
+        if directions[i] is not None:
+            signals += 1
+            book.open_position(symbol, build_signal(directions[i], closes[i], atrs[i]), opened_at=times[i])
+
+    closed = book.closed
+    wins = int((closed["pnl_pct"] > 0).sum())
+    return {
+        "symbol": symbol,
+        "bars": len(df),
+        "signals": signals,
+        "closed_trades": len(closed),
+        "open_trades": len(book.positions),
+        "win_rate": wins / len(closed) if len(closed) else None,
+        "realized_pnl_pct": book.realized_pnl
+    }
+
+def run_backtest(symbol, df, params=None, rules=None):
+    """
+    Walk-forward backtest of the signal rules over a candle history
+
+    Indicators are computed once over the whole history and every rule is
+    evaluated over all bars in one vectorized pass; a rule only looks back
+    a few bars, so each bar gets the same answer the live loop would give.
+    Positions are then tracked bar by bar with PaperPositionBook.
+
+    Args:
+        symbol (str): Trading pair symbol
+        df (pd.DataFrame): OHLCV frame from fetch_ohlcv
+        params (dict, optional): Rule constant overrides, e.g. {"RSI_OVERSOLD": 25}
+        rules (dict, optional): {direction: rule text}, defaults to SIGNAL_RULES
+
+    Returns:
+        dict: Summary with signal and trade counts, win rate and PnL
+    """
+    df = _prepare(df)
+    return _simulate(symbol, df, signal_mask(compile_rules(rules), df, params))
+
+def sweep_backtest(symbol, df, name, values, rules=None):
+    """
+    Backtest one rule constant over several values
+
+    Indicators and the compiled rules are shared by all runs; only the
+    vectorized evaluation and the position simulation repeat.
+
+    Returns:
+        list: run_backtest summaries with the swept value under `name`
+    """
+    df = _prepare(df)
+    compiled = compile_rules(rules)
+    results = []
+    for value in values:
+        summary = _simulate(symbol, df, signal_mask(compiled, df, {name: value}))
+        summary[name] = value
+        results.append(summary)
+    return results
+
+def _backtest_shared(symbol, descriptor, params):
+    with SharedFrame.attach(descriptor) as shared:
+        return run_backtest(symbol, shared.frame(), params)
+
+def run_backtests(frames, workers=None, params=None):
+    """
+    Backtest several symbols in parallel worker processes
+
+    The candles are put into shared memory once; workers attach to them by
+    descriptor instead of receiving pickled DataFrames.
+
+    Args:
+        frames (dict): OHLCV frames keyed by symbol
+        workers (int, optional): Process count, defaults to the CPU count
+        params (dict, optional): Rule constant overrides
+
+    Returns:
+        list: run_backtest summaries in the order of frames
+    """
+    shared = {symbol: SharedFrame.from_frame(df) for symbol, df in frames.items()}
+    try:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {symbol: pool.submit(_backtest_shared, symbol, frame.descriptor, params)
+                       for symbol, frame in shared.items()}
+            return [futures[symbol].result() for symbol in frames]
+    finally:
+        for frame in shared.values():
+            frame.unlink()
@@ -0,0 +1,279 @@
+# correlation.py
+
+import logging
+import numpy as np
+from bot.config import (
+    CORRELATION_WINDOW, CORRELATION_THRESHOLD, CORRELATION_MIN_CLUSTER, MEMORY_MAX_CACHED_SYMBOLS,
+    MEMORY_MAX_PENDING_SIGNALS
+)
+from bot.monitoring.metrics import counter
+from bot.monitoring.memory import BoundedCache
+from bot.notifications.templates import render_cluster
+
+logger = logging.getLogger(__name__)
+
+CLUSTERED_SIGNALS = counter("bot_clustered_signals_total",
+                            "Signals merged into a cluster alert instead of their own alert")
+
+class RollingCorrelation:
+    """
+    Correlation matrix of per-bar log returns over the last `window` bars
+
+    Returns of closed bars are kept in a window x symbols array together
+    with their column sums and the cross-product matrix. New bars
+    are added and the oldest removed with one rank-k update
+    (cross += new.T @ new - old.T @ old), so a cycle costs O(k * n^2) instead
+    of recomputing over the whole window. A symbol joining the universe
+    triggers a rebuild from the histories observed so far; the sums are also
+    recomputed exactly once per window to stop rounding drift. A bar a symbol
+    has not reported yet (it is polled less often, or its fetch failed) is a
+    zero return only until the symbol reports it: the late cells are then
+    written in with the same rank-k update. At most `max_symbols` recently
+    observed histories are kept; an evicted symbol reads as zero returns
+    until the next rebuild drops its column.
+    """
+
+    def __init__(self, window=CORRELATION_WINDOW, max_symbols=MEMORY_MAX_CACHED_SYMBOLS):
+        self.window = window
+        self.symbols = []
+        self._index = {}
+        # symbol -> (times, returns) закрытых свечей из последнего observe
+        self._series = BoundedCache(max_symbols, "correlation_series")
+        self._times = []
+        self._seen = {}  # symbol -> последняя свеча символа, уже записанная в окно
+        self._buffer = np.zeros((window, 0))
+        self._sum = np.zeros(0)
+        self._cross = np.zeros((0, 0))
+        self._updates = 0
+
+    def observe(self, symbol, df):
+        """Remember the closed-bar log returns of a symbol (the last row is still forming)"""
+        tail = df.iloc[-(self.window + 1):-1]
+        times = tail["timestamp"].to_numpy()
+        returns = np.nan_to_num(tail["log_returns"].to_numpy(dtype=float))
+        self._series[symbol] = (times, returns)
+
+    def _rows(self, times):
+        """Return matrix (len(times) x symbols) built from the observed series"""
+        rows = np.zeros((len(times), len(self.symbols)))
+        for symbol, column in self._index.items():
+            series_times, returns = self._series.get(symbol, ((), ()))
+            if not len(series_times):
+                continue
+            count = len(times)
+            if count <= len(series_times) and series_times[-1] == times[-1] and series_times[-count] == times[0]:
+                # Обычный случай: у символа есть все эти свечи подряд в конце истории
+                rows[:, column] = returns[-count:]
+                continue
+            positions = np.searchsorted(series_times, times)
+            found = positions < len(series_times)
+            found[found] = series_times[positions[found]] == times[found]
+            rows[found, column] = returns[positions[found]]
+        return rows
+
+    def _rebuild(self):
+        self.symbols = sorted(self._series)
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        times = np.unique(np.concatenate([times for times, _ in self._series.values()]))[-self.window:]
+        self._times = list(times)
+        self._buffer = self._rows(times)
+        self._sum = self._buffer.sum(axis=0)
+        self._cross = self._buffer.T @ self._buffer
+        self._updates = 0
+        self._mark_seen()
+
+    def _mark_seen(self):
+        for symbol, (times, _) in self._series.items():
+            if len(times):
+                self._seen[symbol] = times[-1]
+
+    def _refill(self):
+        """Write the bars that symbols reported after their rows entered the window"""
+        window_times = np.asarray(self._times)
+        changes = {}  # строка окна -> {столбец: доходность}
+        for symbol, column in self._index.items():
+            seen = self._seen.get(symbol)
+            series_times, returns = self._series.get(symbol, ((), ()))
+            if seen is None or not len(series_times) or series_times[-1] <= seen:
+                continue
+            late = np.flatnonzero((window_times > seen) & (window_times <= series_times[-1]))
+            if not len(late):
+                continue
+            positions = np.searchsorted(series_times, window_times[late])
+            found = positions < len(series_times)
+            found[found] = series_times[positions[found]] == window_times[late][found]
+            for row, value in zip(late[found], returns[positions[found]]):
+                changes.setdefault(row, {})[column] = value
+        if not changes:
+            return
+        rows = np.fromiter(changes, dtype=int)
+        old = self._buffer[rows]
+        new = old.copy()
+        for i, row in enumerate(rows):
+            for column, value in changes[row].items():
+                new[i, column] = value
+        self._sum += new.sum(axis=0) - old.sum(axis=0)
+        self._cross += new.T @ new - old.T @ old
+        self._buffer[rows] = new
+
+    def update(self):
+        """Fold bars closed since the last update into the matrix"""
+        if not self._series:
+            return
+        if set(self._series) - set(self._index) or self._updates >= self.window or not self._times:
+            self._rebuild()
+            return
+        self._refill()
+        latest = self._times[-1]
+        fresh = [times[np.searchsorted(times, latest, side="right"):]
+                 for times, _ in self._series.values() if len(times) and times[-1] > latest]
+        if not fresh:
+            self._mark_seen()
+            return
+        new_times = np.unique(np.concatenate(fresh))[-self.window:]
+        new = self._rows(new_times)
+        # Старейшие строки окна уходят, новые встают в конец
+        drop = max(0, len(self._times) + len(new_times) - self.window)
+        old = self._buffer[:drop]
+        self._sum += new.sum(axis=0) - old.sum(axis=0)
+        self._cross += new.T @ new - old.T @ old
+        self._buffer = np.concatenate([self._buffer[drop:], new])
+        self._times = self._times[drop:] + list(new_times)
+        self._updates += len(new_times)
+        self._mark_seen()
+
+    def matrix(self, columns=None):
+        """Correlation matrix in the order of `symbols`, or of the given column positions"""
+        columns = np.arange(len(self.symbols)) if columns is None else np.asarray(columns, dtype=int)
+        count = len(self._buffer)
+        if count < 2:
+            return np.eye(len(columns))
+        mean = self._sum[columns] / count
+        covariance = self._cross[np.ix_(columns, columns)] / count - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = covariance / np.outer(std, std)
+        corr = np.nan_to_num(np.clip(corr, -1, 1))
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+    def submatrix(self, symbols):
+        """Correlations between the given symbols; unknown ones are uncorrelated"""
+        corr = np.eye(len(symbols))
+        known = [(i, self._index[symbol]) for i, symbol in enumerate(symbols) if symbol in self._index]
+        if known:
+            rows, columns = zip(*known)
+            corr[np.ix_(rows, rows)] = self.matrix(columns)
+        return corr
+
+def find_clusters(symbols, corr, threshold=CORRELATION_THRESHOLD):
+    """
+    Group symbols whose pairwise correlation links them (connected components)
+
+    Args:
+        symbols (list): Symbols in the order of corr
+        corr (np.ndarray): Correlation matrix of these symbols
+        threshold (float): Minimum correlation for a link
+
+    Returns:
+        list: Lists of positions into symbols, largest cluster first
+    """
+    linked = corr >= threshold
+    unvisited = set(range(len(symbols)))
+    clusters = []
+    while unvisited:
+        stack = [unvisited.pop()]
+        members = []
+        while stack:
+            node = stack.pop()
+            members.append(node)
+            neighbours = [i for i in np.flatnonzero(linked[node]) if i in unvisited]
+            unvisited.difference_update(neighbours)
+            stack.extend(neighbours)
+        clusters.append(sorted(members))
+    return sorted(clusters, key=len, reverse=True)
+
+def format_cluster_message(direction, entries, leader, threshold):
+    """One alert for a cluster: members with their levels, then the leader's full analysis"""
+    return render_cluster(direction, entries, leader, threshold)
+
+class SignalClusterer:
+    """
+    Cross-symbol stage that merges correlated signals of one cycle
+
+    analyze_symbol hands each signal to collect() instead of sending it;
+    flush() at the end of the cycle groups signals of the same direction
+    whose return correlation reaches `threshold` and publishes each group of
+    at least `min_size` as one alert with one chart (of the member most
+    correlated with the rest). Other signals are published as before.
+    Pending signals hold their candles, so beyond `max_pending` the oldest
+    one is published on its own right away. flush() reports which signals
+    actually went out, so positions and orders follow delivered signals only.
+    """
+
+    def __init__(self, window=CORRELATION_WINDOW, threshold=CORRELATION_THRESHOLD,
+                 min_size=CORRELATION_MIN_CLUSTER, publish=None, max_pending=MEMORY_MAX_PENDING_SIGNALS):
+        self.correlation = RollingCorrelation(window)
+        self.threshold = threshold
+        self.min_size = min_size
+        self.max_pending = max_pending
+        self._publish = publish
+        self._pending = []
+        self._delivered = []  # (symbol, signal) отправленных сигналов, в том числе вытесненных до flush
+
+    def observe(self, symbol, df):
+        self.correlation.observe(symbol, df)
+
+    def collect(self, symbol, signal, bar_time, message, df, deliver=None, confirm=None):
+        self._pending.append((symbol, signal, bar_time, message, df, confirm))
+        if self.max_pending and len(self._pending) > self.max_pending:
+            logger.warning(f"More than {self.max_pending} signals pending, "
+                           f"{self._pending[0][0]} is sent without clustering")
+            entry = self._pending.pop(0)
+            self._publish_one(*entry[:5], deliver, [entry])
+
+    def _publish_one(self, symbol, signal, bar_time, message, df, deliver, entries):
+        """Publish one alert; confirm every signal it covers once it was sent"""
+        if self._publish is not None:
+            delivered = self._publish(symbol, signal, bar_time, message, df, deliver)
+        else:
+            from bot.core.strategy import publish_signal
+            delivered = publish_signal(symbol, signal, bar_time, message, df, deliver)
+        if delivered is False:
+            logger.error(f"Уведомление для {', '.join(entry[0] for entry in entries)} не доставлено")
+            return
+        for entry in entries:
+            if entry[5] is not None:
+                entry[5]()
+            self._delivered.append(entry[:2])
+
+    def flush(self, deliver=None):
+        """
+        Publish the signals collected this cycle
+
+        Returns:
+            list: (symbol, signal) of every signal delivered since the last flush
+        """
+        pending, self._pending = self._pending, []
+        self.correlation.update()
+        for direction in dict.fromkeys(entry[1]["signal"] for entry in pending):
+            entries = [entry for entry in pending if entry[1]["signal"] == direction]
+            groups = [[i] for i in range(len(entries))]
+            if len(entries) >= self.min_size:
+                symbols = [entry[0] for entry in entries]
+                corr = self.correlation.submatrix(symbols)
+                groups = find_clusters(symbols, corr, self.threshold)
+            for group in groups:
+                members = [entries[i] for i in group]
+                if len(members) < self.min_size:
+                    for entry in members:
+                        self._publish_one(*entry[:5], deliver, [entry])
+                    continue
+                sub = corr[np.ix_(group, group)]
+                leader = members[int(np.argmax(sub.sum(axis=1)))]
+                message = format_cluster_message(direction, members, leader, self.threshold)
+                CLUSTERED_SIGNALS.inc(len(members) - 1)
+                logger.info(f"Кластер {direction}: {', '.join(entry[0] for entry in members)} - одно уведомление")
+                self._publish_one(leader[0], leader[1], leader[2], message, leader[4], deliver, members)
+        delivered, self._delivered = self._delivered, []
+        return delivered
@@ -5,26 +5,41 @@ import time
 import logging
 import signal
 import sys
-from datetime import datetime
+import threading
+from contextlib import nullcontext
+from functools import partial
 from bot.config import (
     SYMBOLS, FUTURES_INTERVAL, TIMEFRAME, LEVERAGE,
-    BINANCE_API_KEY, BINANCE_API_SECRET
+    BINANCE_API_KEY, BINANCE_API_SECRET, SCREENER_ENABLED,
+    SIGNAL_COOLDOWN_SECONDS, SIGNAL_STATE_DB, PAPER_TRADING_ENABLED,
+    PAPER_TRADING_STATE, METRICS_PORT, METRICS_HOST, EXECUTION_ENABLED,
+    MARKET_DATA_ENABLED, PROFILE_ENABLED, POLL_ADAPTIVE, POLL_TICK, CORRELATION_CLUSTERING,
+    MEMORY_GUARD_ENABLED, CANDLE_HISTORY_LIMIT, FETCH_TIMEOUT, FETCH_CYCLE_DEADLINE, NOTIFY_DIGEST,
+    EXECUTION_STATE_DB
 )
 from bot.core.strategy import analyze_symbol
+from bot.core.scheduler import AdaptiveScheduler
+from bot.core.correlation import SignalClusterer
+from bot.core.signal_state import SignalStateStore
+from bot.core.paper_trading import PaperPositionBook, format_exit_message
 from bot.data.data_fetch import fetch_ohlcv, validate_data
+from bot.data.screener import screen_universe
+from bot.data.market_data import MarketDataFeed
+from bot.execution.executor import OrderExecutor
+from bot.monitoring.metrics import counter, gauge, histogram, start_metrics_server
+from bot.monitoring.profiling import CycleProfiler
+from bot.monitoring.memory import MemoryGuard
+from bot.notifications.digest import CycleDigest
+from bot.logging_config import setup_logging, log_context
 import traceback
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'futures_analysis_{datetime.now().strftime("%Y%m%d")}.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+CYCLE_SECONDS = histogram("bot_cycle_seconds", "Duration of a full analysis cycle")
+CYCLES = counter("bot_cycles_total", "Completed analysis cycles")
+QUEUE_DEPTH = gauge("bot_cycle_queue_depth", "Symbols still waiting to be analyzed in the current cycle")
+SYMBOL_ERRORS = counter("bot_symbol_errors_total", "Symbols that failed processing", labels=("symbol",))
+
 # Global flag for graceful shutdown
 running = True
 
@@ -34,8 +49,17 @@ def signal_handler(signum, frame):
     logger.info("Received shutdown signal. Gracefully stopping...")
     running = False
 
-def initialize_exchange():
-    """Initialize and configure the exchange connection for futures trading"""
+def stop_bot():
+    """Ask the main loop to stop after the current step"""
+    global running
+    running = False
+
+def initialize_exchange(set_leverage=True):
+    """Initialize and configure the exchange connection for futures trading
+
+    set_leverage=False skips setting LEVERAGE on every symbol (shard
+    workers: the coordinator already did it for the account).
+    """
     try:
         if not BINANCE_API_KEY or not BINANCE_API_SECRET:
             logger.error("Binance API credentials are not configured. Please add your API key and secret in config.py")
@@ -45,6 +69,7 @@ def initialize_exchange():
             'apiKey': BINANCE_API_KEY,
             'secret': BINANCE_API_SECRET,
             'enableRateLimit': True,
+            'timeout': int(FETCH_TIMEOUT * 1000),  # Брошенный по сроку запрос не висит дольше
             'options': {
                 'defaultType': 'future',  # Use futures market
                 'adjustForTimeDifference': True,
@@ -64,7 +89,7 @@ def initialize_exchange():
             logger.info("Successfully verified futures trading permissions")
             
             # Set leverage for all symbols
-            for symbol in SYMBOLS:
+            for symbol in SYMBOLS if set_leverage else ():
                 try:
                     exchange.set_leverage(LEVERAGE, symbol)
                     logger.info(f"Set leverage to {LEVERAGE}x for {symbol}")
@@ -96,44 +121,210 @@ def initialize_exchange():
         logger.error("Traceback:\n" + traceback.format_exc())
         raise
 
-def run_bot():
-    """Main bot loop with proper error handling and logging"""
+def get_cycle_symbols(exchange):
+    """Return the symbols to analyze this cycle: the screener shortlist or the static SYMBOLS list"""
+    if not SCREENER_ENABLED:
+        return SYMBOLS
+    try:
+        shortlist = screen_universe(exchange)
+        return shortlist or SYMBOLS
+    except Exception as e:
+        logger.error(f"Screener failed, falling back to SYMBOLS: {str(e)}")
+        return SYMBOLS
+
+def _observers(observe, *stages):
+    """observe plus the observe of every cross-symbol stage (clusterer, digest) that is set"""
+    observers = [stage.observe for stage in stages if stage is not None]
+    if observe is not None:
+        observers.append(observe)
+    if len(observers) <= 1:
+        return observers[0] if observers else None
+
+    def all_observers(symbol, df):
+        for observer in observers:
+            observer(symbol, df)
+    return all_observers
+
+def run_cycle(exchange, symbols, state_store=None, paper_book=None, cycle=None, executor=None,
+              market_feed=None, deliver=None, observe=None, clusterer=None, deadline=None, digest=None):
+    """Fetch, validate and analyze every symbol once
+
+    With a SignalClusterer, signals are published at the end of the cycle,
+    correlated ones of the same direction as one cluster alert. With a
+    CycleDigest, all signals of the cycle go out as one digest message
+    instead and the clusterer is not used. Paper positions and orders
+    follow only the signals that were delivered: with a clusterer or digest
+    that is what its flush() returns, so a failed send is neither traded
+    nor recorded and is retried on the next cycle. deadline
+    (time.monotonic()) bounds the candle requests: past it, symbols get
+    cached stale candles at once, so a degraded exchange cannot stretch
+    the cycle.
+    """
+    collect = None
+    if digest is not None:
+        clusterer = None
+        collect = digest.collect
+    elif clusterer is not None:
+        collect = partial(clusterer.collect, deliver=deliver)
+    candles = []
+    fired = []
+    bar_times = {}
+    market = {}
+    if market_feed is not None:
+        with log_context(cycle=cycle):
+            try:
+                market = market_feed.refresh(symbols)
+            except Exception as e:
+                logger.error("Market data refresh failed, filters disabled: %s", e)
+    for position, symbol in enumerate(symbols):
+        QUEUE_DEPTH.set(len(symbols) - position)
+        with log_context(cycle=cycle, symbol=symbol):
+            try:
+                logger.info("Analyzing %s...", symbol)
+                
+                # Fetch and validate data
+                df = fetch_ohlcv(symbol, exchange, timeframe=TIMEFRAME, limit=CANDLE_HISTORY_LIMIT, deadline=deadline)
+                if not validate_data(df, symbol):
+                    logger.error("Skipping %s due to invalid data", symbol)
+                    continue
+                
+                last_candle = df.iloc[-1]
+                candle_time = last_candle["timestamp"].timestamp()
+                if not df.attrs.get("stale"):
+                    candles.append((symbol, last_candle["high"], last_candle["low"], candle_time))
+                
+                # Analyze symbol on the candles we already have
+                signal = analyze_symbol(symbol, exchange, df=df, state_store=state_store,
+                                        market=market.get(symbol), deliver=deliver,
+                                        observe=_observers(observe, clusterer, digest), collect=collect)
+                bar_times[symbol] = candle_time
+                # Сигнал в очереди кластеров/сводки еще не доставлен: торгуется только после flush
+                if signal and collect is None:
+                    fired.append((symbol, signal))
+                
+            except Exception as e:
+                SYMBOL_ERRORS.inc(symbol=symbol)
+                logger.error("Error processing %s: %s", symbol, e)
+                continue
+    QUEUE_DEPTH.set(0)
+    
+    for stage in (clusterer, digest):
+        if stage is not None:
+            with log_context(cycle=cycle):
+                try:
+                    fired.extend(stage.flush(deliver))
+                except Exception as e:
+                    logger.error("Failed to publish signals: %s", e)
+    
+    if paper_book is not None:
+        for symbol, signal in fired:
+            with log_context(cycle=cycle, symbol=symbol):
+                try:
+                    paper_book.open_position(symbol, signal, opened_at=bar_times[symbol])
+                except Exception as e:
+                    logger.error("Failed to open paper position for %s: %s", symbol, e)
+    
+    # Ордера всех сработавших символов уходят пакетами в конце цикла
+    if executor is not None:
+        with log_context(cycle=cycle):
+            try:
+                if fired:
+                    executor.execute(fired)
+                else:
+                    executor.reconcile()  # Снять оставшуюся ногу сработавших стопов/тейков
+            except Exception as e:
+                logger.error("Order execution failed: %s", e)
+    
+    if paper_book is not None and candles:
+        with log_context(cycle=cycle):
+            update_paper_positions(paper_book, candles)
+
+def update_paper_positions(paper_book, candles):
+    """Check all open paper positions against this cycle's candles and report exits"""
+    try:
+        closed = paper_book.update(*zip(*candles))
+        if len(closed):
+            from bot.notifications.notifier import send_telegram_message
+            logger.info(f"Closed {len(closed)} paper positions, realized PnL: {paper_book.realized_pnl:.2f}%")
+            send_telegram_message(format_exit_message(closed))
+    except Exception as e:
+        logger.error(f"Failed to update paper positions: {str(e)}")
+
+def run_bot(on_cycle=None, exchange=None, symbols=None, interval=FUTURES_INTERVAL):
+    """Main bot loop with proper error handling and logging
+
+    on_cycle, if given, is called with the cycle duration in seconds after
+    every completed cycle (used by the runtime supervisor for status).
+    exchange, symbols and interval replace the Binance connection, the
+    SYMBOLS/screener universe and FUTURES_INTERVAL (used by the replay harness).
+    With POLL_ADAPTIVE the loop ticks every POLL_TICK seconds and analyzes
+    only the symbols the AdaptiveScheduler marks as due; the universe is
+    still refreshed once per interval.
+    """
+    global running
+    setup_logging()
     logger.info("Starting futures trading bot...")
+    running = True
     
-    # Set up signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    # Signal handlers can only be installed from the main thread
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
     
     try:
-        exchange = initialize_exchange()
+        if METRICS_PORT:
+            start_metrics_server(METRICS_PORT, METRICS_HOST)
+        
+        if exchange is None:
+            exchange = initialize_exchange()
+        state_store = SignalStateStore(SIGNAL_COOLDOWN_SECONDS, SIGNAL_STATE_DB)
+        paper_book = PaperPositionBook(PAPER_TRADING_STATE) if PAPER_TRADING_ENABLED else None
+        executor = OrderExecutor(exchange, db_path=EXECUTION_STATE_DB) if EXECUTION_ENABLED else None
+        market_feed = MarketDataFeed(exchange) if MARKET_DATA_ENABLED else None
+        profiler = CycleProfiler() if PROFILE_ENABLED else None
+        scheduler = AdaptiveScheduler() if POLL_ADAPTIVE else None
+        digest = CycleDigest() if NOTIFY_DIGEST else None
+        # Сводка уже собирает все сигналы цикла в одно сообщение, кластеры ей не нужны
+        clusterer = SignalClusterer() if CORRELATION_CLUSTERING and digest is None else None
+        memory_guard = MemoryGuard() if MEMORY_GUARD_ENABLED else None
+        tick = POLL_TICK if scheduler else interval
         
+        cycle = 0
+        universe = None
+        universe_time = 0
         while running:
-            cycle_start = time.time()
-            logger.info("Starting new analysis cycle...")
+            tick_start = time.time()
+            # Скринер - не чаще раза в интервал, даже если планировщик тикает чаще
+            if scheduler is None or universe is None or tick_start - universe_time >= interval:
+                universe = symbols if symbols is not None else get_cycle_symbols(exchange)
+                universe_time = tick_start
+            cycle_symbols = scheduler.due(universe) if scheduler else universe
             
-            for symbol in SYMBOLS:
-                try:
-                    logger.info(f"Analyzing {symbol}...")
-                    
-                    # Fetch and validate data
-                    df = fetch_ohlcv(symbol, exchange, timeframe=TIMEFRAME)
-                    if not validate_data(df, symbol):
-                        logger.error(f"Skipping {symbol} due to invalid data")
-                        continue
-                    
-                    # Analyze symbol
-                    analyze_symbol(symbol, exchange)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing {symbol}: {str(e)}")
-                    continue
+            # Тик планировщика без символов к обновлению - не цикл: без счетчиков, логов и проверки памяти
+            if cycle_symbols:
+                cycle += 1
+                logger.info("Starting new analysis cycle...")
+                
+                with profiler.profile_cycle(cycle) if profiler else nullcontext():
+                    run_cycle(exchange, cycle_symbols, state_store, paper_book, cycle, executor, market_feed,
+                              observe=scheduler.observe if scheduler else None, clusterer=clusterer, digest=digest,
+                              deadline=time.monotonic() + interval * FETCH_CYCLE_DEADLINE if interval else None)
+                
+                elapsed = time.time() - tick_start  # Вместе с обновлением скринера, как и раньше
+                CYCLE_SECONDS.observe(elapsed)
+                CYCLES.inc()
+                if memory_guard is not None:
+                    memory_guard.check(cycle)
+                if on_cycle is not None:
+                    on_cycle(elapsed)
             
             # Calculate sleep time to maintain consistent intervals
-            elapsed = time.time() - cycle_start
-            sleep_time = max(0, FUTURES_INTERVAL - elapsed)
+            elapsed = time.time() - tick_start
+            sleep_time = max(0, tick - elapsed)
             
             if running:  # Only sleep if we're still running
-                logger.info(f"Cycle completed in {elapsed:.2f} seconds. Sleeping for {sleep_time:.2f} seconds...")
+                if cycle_symbols:
+                    logger.info(f"Cycle completed in {elapsed:.2f} seconds. Sleeping for {sleep_time:.2f} seconds...")
                 # Split sleep into smaller intervals to allow for graceful shutdown
                 while sleep_time > 0 and running:
                     sleep_interval = min(sleep_time, 1.0)  # Sleep in 1-second intervals
@@ -0,0 +1,177 @@
+# paper_trading.py
+
+import logging
+import os
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+POSITION_DTYPE = np.dtype([
+    ("symbol", "U32"),
+    ("side", "i1"),  # 1 - лонг, -1 - шорт
+    ("entry", "f8"),
+    ("stop_loss", "f8"),
+    ("take_profit", "f8"),
+    ("size", "f8"),
+    ("leverage", "f8"),
+    ("opened_at", "f8")
+])
+
+CLOSED_DTYPE = np.dtype(POSITION_DTYPE.descr + [
+    ("exit", "f8"),
+    ("closed_at", "f8"),
+    ("reason", "U2"),  # SL или TP
+    ("pnl_pct", "f8")  # Доходность на маржу с учетом плеча, %
+])
+
+SIDES = {"ПОКУПКА": 1, "ПРОДАЖА": -1}
+
+class PaperPositionBook:
+    """
+    Simulated positions opened from signals and closed on SL/TP
+
+    Open positions are kept in one numpy structured array, so every update
+    checks all of them against the incoming candles with array operations
+    instead of a Python loop per position. With state_path the open
+    positions are saved to an .npz file after every change, and closed
+    trades are appended as raw records to "<name>_closed.bin" next to it, so
+    the ever-growing history is never rewritten. Both are loaded back on start.
+    """
+
+    def __init__(self, state_path=None):
+        self.state_path = state_path
+        self.positions = np.empty(0, dtype=POSITION_DTYPE)
+        self.closed = np.empty(0, dtype=CLOSED_DTYPE)
+
+        if state_path and os.path.exists(self.closed_path):
+            # Обрывок записи при аварийной остановке отбрасывается
+            count = os.path.getsize(self.closed_path) // CLOSED_DTYPE.itemsize
+            self.closed = np.fromfile(self.closed_path, dtype=CLOSED_DTYPE, count=count)
+        if state_path and os.path.exists(state_path):
+            with np.load(state_path) as state:
+                self.positions = state["positions"].astype(POSITION_DTYPE)
+                if "closed" in state.files and not len(self.closed):
+                    # Старый формат: история внутри .npz переносится в журнал закрытых сделок
+                    self._append_closed(state["closed"].astype(CLOSED_DTYPE))
+            logger.info(f"Loaded {len(self.positions)} open paper positions from {state_path}")
+
+    @property
+    def closed_path(self):
+        """Append-only file of closed trades, None without state_path"""
+        if not self.state_path:
+            return None
+        return os.path.splitext(self.state_path)[0] + "_closed.bin"
+
+    @property
+    def realized_pnl(self):
+        """Sum of closed trade returns weighted by position size, in % of margin"""
+        return float(np.sum(self.closed["pnl_pct"] * self.closed["size"]))
+
+    def open_position(self, symbol, signal, opened_at=None):
+        """
+        Open a simulated position from a generate_signal result
+
+        Args:
+            symbol (str): Trading pair symbol
+            signal (dict): Signal with price, stop_loss, take_profit, position_size, leverage
+            opened_at (float, optional): Unix time of the entry bar, defaults to now
+        """
+        position = np.array([(
+            symbol,
+            SIDES[signal["signal"]],
+            signal["price"],
+            signal["stop_loss"],
+            signal["take_profit"],
+            signal["position_size"],
+            signal["leverage"],
+            time.time() if opened_at is None else opened_at
+        )], dtype=POSITION_DTYPE)
+        self.positions = np.concatenate([self.positions, position])
+        self.save()
+
+    def update(self, symbols, highs, lows, times):
+        """
+        Close every open position whose SL or TP was touched by the new candles
+
+        If a candle touches both levels the stop-loss is assumed to be hit
+        first. Only candles that open after a position's entry bar are checked
+        against it.
+
+        Args:
+            symbols (array-like): One symbol per candle
+            highs (array-like): Candle highs
+            lows (array-like): Candle lows
+            times (array-like): Candle open times as unix seconds
+
+        Returns:
+            np.ndarray: The positions closed by this update (CLOSED_DTYPE)
+        """
+        if len(self.positions) == 0 or len(symbols) == 0:
+            return np.empty(0, dtype=CLOSED_DTYPE)
+
+        symbols = np.asarray(symbols, dtype=POSITION_DTYPE["symbol"])
+        highs = np.asarray(highs, dtype="f8")
+        lows = np.asarray(lows, dtype="f8")
+        times = np.asarray(times, dtype="f8")
+
+        # Сопоставление позиций со свечами через сортировку символов
+        order = np.argsort(symbols)
+        sorted_symbols = symbols[order]
+        idx = np.searchsorted(sorted_symbols, self.positions["symbol"])
+        idx = np.clip(idx, 0, len(sorted_symbols) - 1)
+        has_candle = sorted_symbols[idx] == self.positions["symbol"]
+        candle = order[idx]
+
+        high = highs[candle]
+        low = lows[candle]
+        is_long = self.positions["side"] == 1
+        active = has_candle & (times[candle] > self.positions["opened_at"])
+
+        sl_hit = active & np.where(is_long, low <= self.positions["stop_loss"],
+                                   high >= self.positions["stop_loss"])
+        tp_hit = active & ~sl_hit & np.where(is_long, high >= self.positions["take_profit"],
+                                             low <= self.positions["take_profit"])
+        hit = sl_hit | tp_hit
+        if not hit.any():
+            return np.empty(0, dtype=CLOSED_DTYPE)
+
+        done = self.positions[hit]
+        exit_price = np.where(sl_hit[hit], done["stop_loss"], done["take_profit"])
+
+        closed = np.empty(len(done), dtype=CLOSED_DTYPE)
+        for name in POSITION_DTYPE.names:
+            closed[name] = done[name]
+        closed["exit"] = exit_price
+        closed["closed_at"] = times[candle[hit]]
+        closed["reason"] = np.where(sl_hit[hit], "SL", "TP")
+        closed["pnl_pct"] = done["side"] * (exit_price / done["entry"] - 1) * done["leverage"] * 100
+
+        self.positions = self.positions[~hit]
+        self._append_closed(closed)
+        self.save()
+        return closed
+
+    def _append_closed(self, closed):
+        self.closed = np.concatenate([self.closed, closed])
+        if self.state_path:
+            with open(self.closed_path, "ab") as f:
+                f.write(closed.tobytes())
+
+    def save(self):
+        """Atomically write the open positions to state_path"""
+        if not self.state_path:
+            return
+        tmp_path = self.state_path + ".tmp.npz"
+        np.savez(tmp_path, positions=self.positions)
+        os.replace(tmp_path, self.state_path)
+
+def format_exit_message(closed):
+    """Сообщение о закрытых бумажных позициях"""
+    lines = ["📒 Закрытие бумажных позиций:"]
+    for trade in closed:
+        side = "ЛОНГ" if trade["side"] == 1 else "ШОРТ"
+        reason = "Стоп-лосс" if trade["reason"] == "SL" else "Тейк-профит"
+        lines.append(f"- {trade['symbol']} {side}: {reason} {trade['entry']:.4f}$ → {trade['exit']:.4f}$ "
+                     f"({trade['pnl_pct']:+.2f}%)")
+    return "\n".join(lines)
@@ -0,0 +1,244 @@
+# rules.py
+
+"""
+Declarative signal rules compiled to NumPy expressions
+
+A rule is a boolean expression over indicator columns and config constants,
+e.g. "ema8 > ema13 > ema21 and rsi < RSI_OVERSOLD". It is parsed once into
+a tree of NumPy operations and then evaluated either over whole column
+arrays (backtests, parameter sweeps) or over the few trailing rows the last
+bar depends on (live loop).
+
+Grammar (a subset of Python expressions):
+    lowercase names     indicator columns: close, rsi, ema8, ...
+    UPPERCASE names     numeric constants from bot.config (RSI_OVERSOLD, ...)
+    numbers, + - * /, unary -, comparisons (chained too), and / or / not
+    shift(x, n=1)       x n bars ago
+    mean(x, n)          rolling mean of x over the last n bars
+
+Comparisons with NaN (indicator warm-up) are False, as in pandas.
+"""
+
+import ast
+import operator
+import numpy as np
+import bot.config as config
+from bot.config import SIGNAL_RULES
+
+_COMPARE = {
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal
+}
+
+_ARITHMETIC = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv
+}
+
+class RuleError(ValueError):
+    """Invalid rule text or a column/constant it refers to is missing"""
+
+def _shift(values, n):
+    shifted = np.full(len(values), np.nan)
+    if n < len(values):
+        shifted[n:] = values[:len(values) - n]
+    return shifted
+
+def _mean(values, n):
+    out = np.full(len(values), np.nan)
+    if n <= len(values):
+        # NaN прогрева не должен портить все последующие окна: считаем NaN отдельно
+        missing = np.isnan(values)
+        sums = np.cumsum(np.insert(np.where(missing, 0.0, values), 0, 0.0))
+        gaps = np.cumsum(np.insert(missing, 0, False))
+        window = (sums[n:] - sums[:-n]) / n
+        out[n - 1:] = np.where(gaps[n:] - gaps[:-n] > 0, np.nan, window)
+    return out
+
+class Rule:
+    """
+    One compiled rule
+
+    Attributes:
+        text (str): Source expression
+        columns (set): Indicator columns the rule reads
+        constants (set): Constants the rule reads
+        lookback (int): Extra bars before the evaluated one the result depends on
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.columns = set()
+        self.constants = set()
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except SyntaxError as e:
+            raise RuleError(f"Invalid rule {text!r}: {e.msg}") from None
+        self._evaluate, self.lookback = self._compile(tree.body)
+
+    def _compile(self, node):
+        """Return (function(columns, params) -> array or scalar, lookback in bars)"""
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            functions = [function for function, _ in parts]
+
+            def boolean(columns, params):
+                result = functions[0](columns, params)
+                for function in functions[1:]:
+                    result = combine(result, function(columns, params))
+                return result
+            return boolean, max(lookback for _, lookback in parts)
+
+        if isinstance(node, ast.Compare):
+            parts = [self._compile(node.left)] + [self._compile(value) for value in node.comparators]
+            steps = []
+            for op, left, right in zip(node.ops, parts, parts[1:]):
+                if type(op) not in _COMPARE:
+                    raise RuleError(f"Unsupported comparison in {self.text!r}")
+                steps.append((_COMPARE[type(op)], left[0], right[0]))
+
+            def compare(columns, params):
+                # a > b > c -> (a > b) & (b > c), как в Python
+                result = None
+                for function, left, right in steps:
+                    step = function(left(columns, params), right(columns, params))
+                    result = step if result is None else np.logical_and(result, step)
+                return result
+            return compare, max(lookback for _, lookback in parts)
+
+        if isinstance(node, ast.UnaryOp):
+            operand, lookback = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda columns, params: np.logical_not(operand(columns, params)), lookback
+            if isinstance(node.op, ast.USub):
+                return lambda columns, params: -operand(columns, params), lookback
+            raise RuleError(f"Unsupported operator in {self.text!r}")
+
+        if isinstance(node, ast.BinOp):
+            if type(node.op) not in _ARITHMETIC:
+                raise RuleError(f"Unsupported operator in {self.text!r}")
+            function = _ARITHMETIC[type(node.op)]
+            (left, left_lookback), (right, right_lookback) = self._compile(node.left), self._compile(node.right)
+            return (lambda columns, params: function(left(columns, params), right(columns, params)),
+                    max(left_lookback, right_lookback))
+
+        if isinstance(node, ast.Call):
+            return self._compile_call(node)
+
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name.isupper():
+                if not isinstance(getattr(config, name, None), (int, float)):
+                    raise RuleError(f"Unknown constant {name} in {self.text!r}")
+                self.constants.add(name)
+                return lambda columns, params: params[name], 0
+            self.columns.add(name)
+            return lambda columns, params: columns[name], 0
+
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+                and not isinstance(node.value, bool):
+            value = node.value
+            return lambda columns, params: value, 0
+
+        raise RuleError(f"Unsupported expression {ast.unparse(node)!r} in {self.text!r}")
+
+    def _compile_call(self, node):
+        name = node.func.id if isinstance(node.func, ast.Name) else None
+        if name not in ("shift", "mean") or node.keywords or not node.args:
+            raise RuleError(f"Unsupported call {ast.unparse(node)!r} in {self.text!r}, use shift() or mean()")
+        operand, lookback = self._compile(node.args[0])
+        if len(node.args) == 1 and name == "shift":
+            bars = 1
+        elif len(node.args) == 2 and isinstance(node.args[1], ast.Constant) \
+                and isinstance(node.args[1].value, int) and node.args[1].value > 0:
+            bars = node.args[1].value
+        else:
+            raise RuleError(f"{name}() needs a positive integer bar count in {self.text!r}")
+
+        if name == "shift":
+            return lambda columns, params: _shift(_as_array(operand(columns, params)), bars), lookback + bars
+        return lambda columns, params: _mean(_as_array(operand(columns, params)), bars), lookback + bars - 1
+
+    def params(self, overrides=None):
+        """Constant values from bot.config, with overrides taking precedence"""
+        overrides = overrides or {}
+        return {name: overrides.get(name, getattr(config, name)) for name in self.constants}
+
+    def evaluate(self, columns, params=None):
+        """
+        Evaluate the rule on every bar
+
+        Args:
+            columns (Mapping): Column arrays of equal length (DataFrame or dict)
+            params (dict, optional): Constant overrides (e.g. for sweeps)
+
+        Returns:
+            np.ndarray: Boolean array, True where the rule holds
+        """
+        missing = [column for column in self.columns if column not in columns]
+        if missing:
+            raise RuleError(f"Rule {self.text!r} needs missing columns: {', '.join(sorted(missing))}")
+        arrays = {column: np.asarray(columns[column], dtype=float) for column in self.columns}
+        length = len(next(iter(arrays.values()))) if arrays else 1
+        result = self._evaluate(arrays, self.params(params))
+        return np.broadcast_to(np.asarray(result, dtype=bool), (length,))
+
+    def evaluate_last(self, df, params=None):
+        """Evaluate the rule on the last bar only, reading just the rows it depends on"""
+        if not len(df):
+            return False
+        return bool(self.evaluate(df.iloc[-(self.lookback + 1):], params)[-1])
+
+def _as_array(value):
+    return np.asarray(value, dtype=float)
+
+_compiled = {}
+
+def compile_rule(text):
+    """Compile a rule once; the same text returns the cached Rule"""
+    rule = _compiled.get(text)
+    if rule is None:
+        rule = _compiled[text] = Rule(text)
+    return rule
+
+def compile_rules(rules=None):
+    """Compile {direction: text} (SIGNAL_RULES by default) in declaration order"""
+    return {direction: compile_rule(text) for direction, text in (rules or SIGNAL_RULES).items()}
+
+def first_match(compiled, df, allows=None, params=None):
+    """
+    Direction of the first rule that holds on the last bar
+
+    Args:
+        compiled (dict): Output of compile_rules
+        df (pd.DataFrame): Candles with indicators
+        allows (callable, optional): allows(direction) -> bool, extra filter
+        params (dict, optional): Constant overrides
+
+    Returns:
+        str or None: Direction, e.g. "ПОКУПКА"
+    """
+    for direction, rule in compiled.items():
+        if rule.evaluate_last(df, params) and (allows is None or allows(direction)):
+            return direction
+    return None
+
+def signal_mask(compiled, columns, params=None):
+    """
+    Direction per bar over a whole history, the first matching rule wins
+
+    Returns:
+        np.ndarray: Object array of directions, None where no rule holds
+    """
+    masks = [(direction, rule.evaluate(columns, params)) for direction, rule in compiled.items()]
+    directions = np.full(len(masks[0][1]) if masks else 0, None, dtype=object)
+    for direction, mask in reversed(masks):
+        directions[mask] = direction
+    return directions
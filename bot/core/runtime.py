@@ -0,0 +1,285 @@
+# runtime.py
+
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка между процессами недоступна
+    fcntl = None
+
+from bot.config import (
+    BOT_RUNTIME_MODE, BOT_LOCK_FILE, BOT_RESTART_BACKOFF, BOT_RESTART_MAX_BACKOFF, BOT_LOCK_RETRY,
+    BOT_STATUS_INTERVAL, SHARD_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+def _run_loop(on_cycle):
+    """run_bot, or the sharded coordinator when SHARD_WORKERS is set"""
+    if SHARD_WORKERS:
+        from bot.core.sharding import run_sharded
+        run_sharded(SHARD_WORKERS, on_cycle=on_cycle)
+    else:
+        from bot.core.main import run_bot
+        run_bot(on_cycle=on_cycle)
+
+def _run_child(cycles, last_cycle_at, last_cycle_seconds):
+    """Entry point of the bot subprocess: run the loop and publish cycle stats"""
+
+    def on_cycle(elapsed):
+        with cycles.get_lock():
+            cycles.value += 1
+        last_cycle_at.value = time.time()
+        last_cycle_seconds.value = elapsed
+
+    _run_loop(on_cycle)
+
+class BotRuntime:
+    """
+    Supervisor that keeps exactly one bot loop alive per process
+
+    The loop runs either in a daemon thread ("thread" mode) or in a child
+    process ("process" mode, which also gets working SIGTERM handling and
+    its own GIL). If the loop dies it is restarted with exponential backoff.
+    With a lock file only one process per host runs the bot; the others stay
+    in "standby" and retry the lock every lock_retry seconds, so one of them
+    takes over when the holder exits. Cycle statistics live in shared memory
+    values so that status requests never touch the trading loop; the holder
+    also writes them to "<lock_file>.status" every status_interval seconds,
+    which standby processes serve (marked "stale" once the holder stops
+    refreshing it).
+    """
+
+    def __init__(self, mode=BOT_RUNTIME_MODE, lock_file=BOT_LOCK_FILE,
+                 backoff=BOT_RESTART_BACKOFF, max_backoff=BOT_RESTART_MAX_BACKOFF, target=None,
+                 lock_retry=BOT_LOCK_RETRY, status_interval=BOT_STATUS_INTERVAL):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown runtime mode: {mode}")
+        self.mode = mode
+        self.lock_file = lock_file
+        self.status_file = f"{lock_file}.status" if lock_file else None
+        self.lock_retry = lock_retry
+        self.status_interval = status_interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._target = target
+        self._ctx = multiprocessing.get_context("spawn")
+        self._cycles = self._ctx.Value("i", 0)
+        self._last_cycle_at = self._ctx.Value("d", 0.0)
+        self._last_cycle_seconds = self._ctx.Value("d", 0.0)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._supervisor = None
+        self._status_thread = None
+        self._status_lock = threading.Lock()
+        self._process = None
+        self._lock_handle = None
+        self.state = "stopped"
+        self.restarts = 0
+        self.started_at = None
+        self.last_error = None
+
+    def start(self):
+        """Start the supervisor once; repeated calls are no-ops"""
+        with self._lock:
+            if self._supervisor is not None:
+                return False
+            self._stop_event.clear()
+            acquired = self._acquire_host_lock()
+            if acquired:
+                self._take_over()
+            else:
+                # Супервизор периодически повторяет попытку и заменяет ушедшего владельца
+                self.state = "standby"
+                logger.info("Another process already runs the bot, staying in standby")
+            self._supervisor = threading.Thread(target=self._supervise, name="bot-supervisor", daemon=True)
+            self._supervisor.start()
+            if self.mode == "process" and SHARD_WORKERS:
+                # Процесс с воркерами не может быть daemon, поэтому останавливается явно
+                atexit.register(self.stop)
+            return acquired
+
+    def stop(self, timeout=30):
+        """Stop the loop and the supervisor"""
+        self._stop_event.set()
+        if self.mode == "process":
+            process = self._process
+            if process is not None and process.is_alive():
+                process.terminate()  # SIGTERM -> корректная остановка run_bot
+        else:
+            from bot.core.main import stop_bot
+            stop_bot()
+        for thread in (self._supervisor, self._status_thread):
+            if thread is not None:
+                thread.join(timeout)
+        with self._lock:
+            self._status_thread = None
+            self._supervisor = None
+            self.state = "stopped"
+        self._publish_status()
+        self._release_host_lock()
+
+    def snapshot(self):
+        """Cheap status dictionary for health checks; in standby the lock holder's status"""
+        if self.state == "standby" and self.status_file:
+            try:
+                with open(self.status_file) as handle:
+                    status = json.load(handle)
+            except (OSError, ValueError):
+                status = None
+            if isinstance(status, dict):
+                status["standby_pid"] = os.getpid()
+                # Запас в два интервала: запись по таймеру может немного запоздать
+                status["stale"] = time.time() - status.get("status_at", 0) > 2 * self.status_interval
+                return status
+        last_cycle_at = self._last_cycle_at.value
+        return {
+            "state": self.state,
+            "mode": self.mode,
+            "pid": self._process.pid if self._process is not None else os.getpid(),
+            "started_at": self.started_at,
+            "restarts": self.restarts,
+            "cycles": self._cycles.value,
+            "last_cycle_at": last_cycle_at or None,
+            "last_cycle_seconds": self._last_cycle_seconds.value if last_cycle_at else None,
+            "last_error": self.last_error
+        }
+
+    def _on_cycle(self, elapsed):
+        with self._cycles.get_lock():
+            self._cycles.value += 1
+        self._last_cycle_at.value = time.time()
+        self._last_cycle_seconds.value = elapsed
+        self._publish_status()
+
+    def _publish_status(self):
+        """Write the snapshot for standby processes; only the lock holder does it"""
+        if self._lock_handle is None or not self.status_file:
+            return
+        status = self.snapshot()
+        status["status_at"] = time.time()
+        temp_file = f"{self.status_file}.{os.getpid()}"
+        try:
+            with self._status_lock:
+                with open(temp_file, "w") as handle:
+                    json.dump(status, handle)
+                os.replace(temp_file, self.status_file)  # Читатель не увидит файл наполовину записанным
+        except OSError as e:
+            logger.warning(f"Could not write bot status: {str(e)}")
+
+    def _publish_loop(self):
+        while not self._stop_event.wait(self.status_interval):
+            self._publish_status()
+
+    def _take_over(self):
+        """Become the running instance once the host lock is held (called under self._lock)"""
+        self.started_at = time.time()
+        self.state = "starting"
+        # Статус публикуется сразу, чтобы standby не отдавал свое состояние до первого цикла
+        self._publish_status()
+        if self._lock_handle is not None and self.status_file:
+            self._status_thread = threading.Thread(target=self._publish_loop, name="bot-status", daemon=True)
+            self._status_thread.start()
+
+    def _run_once(self):
+        """Run the bot loop until it returns; raise if it failed"""
+        if self.mode == "process":
+            if self._target is not None:
+                target, args = self._target, ()
+            else:
+                target = _run_child
+                args = (self._cycles, self._last_cycle_at, self._last_cycle_seconds)
+            # daemon-процессу нельзя запускать свои процессы, а координатору шардов это нужно
+            self._process = self._ctx.Process(target=target, args=args, name="bot-worker",
+                                              daemon=not SHARD_WORKERS)
+            self._process.start()
+            self.state = "running"
+            self._publish_status()
+            self._process.join()
+            if self._process.exitcode != 0 and not self._stop_event.is_set():
+                raise RuntimeError(f"Bot process exited with code {self._process.exitcode}")
+        else:
+            self.state = "running"
+            self._publish_status()
+            if self._target is not None:
+                self._target()
+            else:
+                _run_loop(self._on_cycle)
+
+    def _wait_for_host_lock(self):
+        """Retry the host lock until it is acquired; False if stopped first"""
+        while not self._stop_event.wait(self.lock_retry):
+            with self._lock:
+                if self._stop_event.is_set():
+                    return False
+                if self._acquire_host_lock():
+                    self._take_over()
+                    logger.info("Host lock acquired, taking over the bot")
+                    return True
+        return False
+
+    def _supervise(self):
+        if self.state == "standby" and not self._wait_for_host_lock():
+            return
+        delay = self.backoff
+        while not self._stop_event.is_set():
+            started = time.time()
+            try:
+                self._run_once()
+                if self._stop_event.is_set():
+                    break
+                self.last_error = "Bot loop exited unexpectedly"
+            except BaseException as e:  # sys.exit() внутри run_bot тоже должен перезапускаться
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.error(f"Bot loop failed: {self.last_error}")
+
+            # Сброс задержки, если бот успел проработать дольше максимальной паузы
+            if time.time() - started > self.max_backoff:
+                delay = self.backoff
+            self.restarts += 1
+            self.state = "backoff"
+            self._publish_status()
+            logger.info(f"Restarting bot in {delay:.0f} seconds (restart #{self.restarts})")
+            if self._stop_event.wait(delay):
+                break
+            delay = min(delay * 2, self.max_backoff)
+        self.state = "stopped"
+
+    def _acquire_host_lock(self):
+        if not self.lock_file or fcntl is None:
+            return True
+        handle = open(self.lock_file, "a+")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._lock_handle = handle
+        return True
+
+    def _release_host_lock(self):
+        if self._lock_handle is not None:
+            fcntl.flock(self._lock_handle, fcntl.LOCK_UN)
+            self._lock_handle.close()
+            self._lock_handle = None
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+def get_runtime():
+    """Process-wide BotRuntime singleton"""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = BotRuntime()
+        return _runtime
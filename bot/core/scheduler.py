@@ -0,0 +1,139 @@
+# scheduler.py
+
+import logging
+import time
+import numpy as np
+from bot.config import (
+    FUTURES_INTERVAL, RSI_OVERSOLD, RSI_OVERBOUGHT, POLL_MIN_INTERVAL, POLL_MAX_INTERVAL,
+    POLL_BUDGET, POLL_RSI_BAND
+)
+from bot.monitoring.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+POLL_DUE = gauge("bot_poll_due_symbols", "Symbols due for a refresh at the last scheduler tick")
+POLL_DEFERRED = counter("bot_poll_deferred_total", "Due symbols postponed because the request budget was spent")
+
+def _ratio(df, column):
+    """Last value of a column relative to its mean over the frame (1.0 - as usual)"""
+    values = df[column].to_numpy(dtype=float)
+    mean = np.nanmean(values) if len(values) else np.nan
+    if not np.isfinite(mean) or mean <= 0:
+        return 1.0
+    return float(values[-1] / mean)
+
+def activity_score(df, rsi_band=POLL_RSI_BAND):
+    """
+    How close a symbol is to firing, from 0 (dormant) to 1 (near a trigger)
+
+    Combines the indicators the strategy already has: the larger of the RSI
+    proximity to RSI_OVERSOLD/RSI_OVERBOUGHT (1 at or beyond a threshold, 0
+    `rsi_band` points away) and the expansion of ATR %, Bollinger width and
+    volume_ratio over their usual level (0 at the mean, 1 at twice the mean).
+
+    Args:
+        df (pd.DataFrame): Candles with add_indicators columns
+
+    Returns:
+        float: Score in [0, 1]
+    """
+    last = df.iloc[-1]
+    rsi = last["rsi"]
+    if np.isnan(rsi):
+        proximity = 0.0
+    else:
+        distance = max(0.0, min(rsi - RSI_OVERSOLD, RSI_OVERBOUGHT - rsi))
+        proximity = max(0.0, 1.0 - distance / rsi_band)
+
+    atr_percent = df["atr"] / df["close"] * 100
+    ratios = [float(atr_percent.iloc[-1] / atr_percent.mean()) if atr_percent.mean() > 0 else 1.0,
+              _ratio(df, "bb_width")]
+    volume_ratio = last.get("volume_ratio", np.nan)
+    ratios.append(1.0 if np.isnan(volume_ratio) else float(volume_ratio))
+    expansion = min(1.0, max(0.0, float(np.mean(ratios)) - 1.0))
+    return max(proximity, expansion)
+
+class AdaptiveScheduler:
+    """
+    Per-symbol refresh cadence driven by activity_score
+
+    A symbol with score s is refreshed every max_interval * (min_interval /
+    max_interval) ** s seconds: near a trigger every min_interval, dormant
+    every max_interval. New symbols are due at once. Requests are limited by
+    a token bucket of `budget` refreshes per FUTURES_INTERVAL (by default one
+    per symbol, what the fixed cadence costs); when more symbols are due than
+    the bucket allows, the most overdue relative to their interval go first
+    and the rest wait for the next tick.
+    """
+
+    def __init__(self, min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL, budget=POLL_BUDGET,
+                 period=FUTURES_INTERVAL, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = budget
+        self.period = period
+        self.clock = clock
+        self._next_due = {}
+        self._interval = {}
+        self.scores = {}
+        self._tokens = None
+        self._refilled = None
+
+    def interval_for(self, score):
+        return self.max_interval * (self.min_interval / self.max_interval) ** score
+
+    def _refill(self, capacity, now):
+        if self._tokens is None:
+            self._tokens = capacity
+        else:
+            self._tokens = min(capacity, self._tokens + (now - self._refilled) * capacity / self.period)
+        self._refilled = now
+
+    def due(self, symbols):
+        """
+        Symbols to refresh now, most urgent first, within the request budget
+
+        Args:
+            symbols (list): Current universe; symbols outside it are forgotten
+
+        Returns:
+            list: Subset of symbols
+        """
+        now = self.clock()
+        for symbol in set(self._next_due) - set(symbols):
+            self._next_due.pop(symbol)
+            self._interval.pop(symbol, None)
+            self.scores.pop(symbol, None)
+
+        capacity = self.budget or len(symbols)
+        self._refill(capacity, now)
+        candidates = [symbol for symbol in symbols if self._next_due.get(symbol, now) <= now]
+        # Сначала самые просроченные относительно своего интервала; новые символы - первыми
+        candidates.sort(key=lambda symbol: -(now - self._next_due.get(symbol, -np.inf))
+                        / self._interval.get(symbol, self.max_interval))
+        selected = candidates[:int(self._tokens)]
+        self._tokens -= len(selected)
+        POLL_DUE.set(len(candidates))
+        if len(candidates) > len(selected):
+            POLL_DEFERRED.inc(len(candidates) - len(selected))
+        for symbol in selected:
+            # До observe() символ не запрашивается повторно, даже если анализ не удался
+            self._next_due[symbol] = now + self._interval.get(symbol, self.max_interval)
+        return selected
+
+    def observe(self, symbol, df):
+        """Reschedule a symbol from its freshly computed indicators"""
+        score = activity_score(df)
+        interval = self.interval_for(score)
+        self.scores[symbol] = score
+        self._interval[symbol] = interval
+        self._next_due[symbol] = self.clock() + interval
+
+    def snapshot(self):
+        """Score, interval and seconds until the next refresh per symbol"""
+        now = self.clock()
+        return {
+            symbol: {"score": self.scores.get(symbol), "interval": self._interval.get(symbol),
+                     "due_in": max(0.0, due - now)}
+            for symbol, due in self._next_due.items()
+        }
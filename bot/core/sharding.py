@@ -0,0 +1,353 @@
+# sharding.py
+
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from contextlib import nullcontext
+from bot.config import (
+    SHARD_WORKERS, SHARD_VIRTUAL_NODES, FUTURES_INTERVAL, SIGNAL_COOLDOWN_SECONDS,
+    SIGNAL_STATE_DB, SCREENER_ENABLED, PROFILE_ENABLED, FETCH_CYCLE_DEADLINE, MARKET_DATA_ENABLED,
+    EXECUTION_ENABLED, PAPER_TRADING_ENABLED, CORRELATION_CLUSTERING, NOTIFY_DIGEST, POLL_ADAPTIVE
+)
+from bot.core.signal_state import SignalStateStore
+from bot.logging_config import setup_logging, setup_worker_logging, forward_worker_logs
+from bot.monitoring.metrics import counter, gauge
+from bot.monitoring.profiling import CycleProfiler
+
+logger = logging.getLogger(__name__)
+
+SHARD_WORKERS_ALIVE = gauge("bot_shard_workers", "Shard worker processes alive")
+SHARD_MOVES = counter("bot_shard_symbol_moves_total", "Symbols reassigned to another worker")
+SHARD_SIGNALS = counter("bot_shard_signals_total", "Signals received from shard workers by outcome",
+                        labels=("outcome",))
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+class HashRing:
+    """
+    Consistent hash ring mapping symbols to worker names
+
+    Each worker owns `replicas` points on the ring, a symbol belongs to the
+    first point clockwise from its hash. Adding or removing a worker only
+    moves the symbols between that worker and its neighbours, roughly
+    1/N of the universe.
+    """
+
+    def __init__(self, nodes=(), replicas=SHARD_VIRTUAL_NODES):
+        self.replicas = replicas
+        self._points = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self):
+        return sorted(set(self._owners.values()))
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node):
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                self._points.remove(point)
+
+    def node_for(self, key):
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+    def assign(self, keys):
+        """Group keys by owner: {node: [keys]} (every node is present)"""
+        assignment = {node: [] for node in self.nodes}
+        for key in keys:
+            node = self.node_for(key)
+            if node is not None:
+                assignment[node].append(key)
+        return assignment
+
+class _WorkerStateStore(SignalStateStore):
+    """
+    Worker-side copy of the coordinator's dedup state
+
+    record(), which analyze_symbol calls once a signal is handed to the
+    coordinator, does nothing: the signal is remembered only when the
+    coordinator acknowledges that it was sent, so a failed send is retried
+    on the next cycle instead of being suppressed.
+    """
+
+    def record(self, symbol, direction, bar_time, now=None):
+        pass
+
+    def acknowledge(self, symbol, direction, bar_time):
+        SignalStateStore.record(self, symbol, direction, bar_time)
+
+def _run_shard_worker(name, assignments, signals, log_queue, interval):
+    """
+    Entry point of a shard worker process
+
+    The worker owns its exchange connection and analyzes only the symbols
+    of its latest assignment. Signals are not sent to Telegram here: they go
+    to the coordinator through `signals`, and the coordinator acknowledges
+    sent ones through `assignments` with ("ack", symbol, direction,
+    bar_time), which the worker's dedup then suppresses. A None assignment
+    stops the worker.
+    """
+    setup_worker_logging(log_queue)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Остановкой управляет координатор
+    from bot.core.main import initialize_exchange, run_cycle
+    from bot.data.market_data import MarketDataFeed
+
+    def deliver(symbol, trade_signal, bar_time, message, chart_path):
+        signals.put({
+            "worker": name,
+            "symbol": symbol,
+            "direction": trade_signal["signal"],
+            "bar_time": str(bar_time),
+            "message": message,
+            "chart_path": chart_path
+        })
+
+    exchange = initialize_exchange(set_leverage=False)  # Плечо выставляет координатор
+    local_store = _WorkerStateStore(SIGNAL_COOLDOWN_SECONDS)
+    market_feed = MarketDataFeed(exchange) if MARKET_DATA_ENABLED else None
+    profiler = CycleProfiler(name=name) if PROFILE_ENABLED else None
+    symbols = assignments.get()
+    cycle = 0
+    while symbols is not None:
+        cycle += 1
+        cycle_start = time.time()
+        if symbols:
+            with profiler.profile_cycle(cycle) if profiler else nullcontext():
+                run_cycle(exchange, symbols, local_store, cycle=cycle, market_feed=market_feed, deliver=deliver,
+                          deadline=time.monotonic() + interval * FETCH_CYCLE_DEADLINE if interval else None)
+        # Пауза до следующего цикла, но новое назначение применяется сразу
+        while True:
+            try:
+                message = assignments.get(timeout=max(0, interval - (time.time() - cycle_start)))
+            except queue.Empty:
+                break
+            if isinstance(message, tuple):
+                local_store.acknowledge(*message[1:])
+                continue
+            symbols = message
+            break
+    logger.info(f"Shard worker {name} stopped")
+
+def _send_to_telegram(message, chart_path):
+    from bot.notifications.notifier import send_telegram_message
+    return send_telegram_message(message, chart_path)
+
+class ShardCoordinator:
+    """
+    Distributes the symbol universe over worker processes
+
+    Symbols are assigned with a consistent hash ring and pushed to each
+    worker through its own queue; only workers whose share changed get a new
+    assignment. All workers report signals through one queue to the
+    coordinator, which is the single dedup point (SignalStateStore keyed by
+    symbol, direction and bar) and the only Telegram sender. A sent signal
+    is acknowledged to its worker, which then stops re-sending it. While a
+    symbol is handed over, the old and the new owner may both analyze the
+    same bar, and the second alert is dropped here.
+    """
+
+    def __init__(self, interval=FUTURES_INTERVAL, replicas=SHARD_VIRTUAL_NODES, state_store=None,
+                 notify=None, target=_run_shard_worker):
+        self.interval = interval
+        self.ring = HashRing(replicas=replicas)
+        self.state_store = state_store or SignalStateStore(SIGNAL_COOLDOWN_SECONDS, SIGNAL_STATE_DB)
+        self.notify = notify or _send_to_telegram
+        self._target = target
+        self._ctx = multiprocessing.get_context("spawn")
+        self._signals = self._ctx.Queue()
+        self._logs = self._ctx.Queue()
+        self._workers = {}  # name -> (process, assignments queue)
+        self._assigned = {}
+        self._lock = threading.RLock()
+        self._threads = []
+        self._next_id = 0
+        self.symbols = []
+
+    def start(self, workers, symbols):
+        """Start the notifier and log threads, then the workers"""
+        self._threads = [
+            threading.Thread(target=self._notify_loop, name="shard-notifier", daemon=True),
+            threading.Thread(target=forward_worker_logs, args=(self._logs,), name="shard-logs", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.symbols = sorted(set(symbols))
+        for _ in range(workers):
+            self.add_worker()
+
+    def _spawn(self, name):
+        assignments = self._ctx.Queue()
+        process = self._ctx.Process(target=self._target, name=name, daemon=True,
+                                    args=(name, assignments, self._signals, self._logs, self.interval))
+        process.start()
+        return process, assignments
+
+    def add_worker(self, name=None):
+        """Start a worker and move its share of symbols to it"""
+        with self._lock:
+            if name is None:
+                name = f"shard-{self._next_id}"
+                self._next_id += 1
+            self._workers[name] = self._spawn(name)
+            self.ring.add(name)
+            self._rebalance()
+            SHARD_WORKERS_ALIVE.set(len(self._workers))
+            return name
+
+    def remove_worker(self, name, timeout=10):
+        """Hand the worker's symbols to the others, then stop it"""
+        with self._lock:
+            self.ring.remove(name)
+            process, assignments = self._workers.pop(name)
+            self._rebalance()
+            self._assigned.pop(name, None)
+            SHARD_WORKERS_ALIVE.set(len(self._workers))
+        assignments.put(None)
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+
+    def set_symbols(self, symbols):
+        """Replace the universe (e.g. after a screener run)"""
+        with self._lock:
+            self.symbols = sorted(set(symbols))
+            self._rebalance()
+
+    def _rebalance(self):
+        assignment = self.ring.assign(self.symbols)
+        previous = {symbol: name for name, owned in self._assigned.items() for symbol in owned}
+        for name, (process, assignments) in self._workers.items():
+            share = assignment.get(name, [])
+            if share != self._assigned.get(name):
+                assignments.put(share)
+                self._assigned[name] = share
+        moved = sum(1 for symbol in self.symbols
+                    if symbol in previous and previous[symbol] != self.ring.node_for(symbol))
+        if moved:
+            SHARD_MOVES.inc(moved)
+            logger.info(f"Rebalanced {len(self.symbols)} symbols over {len(self._workers)} workers, "
+                        f"{moved} moved")
+
+    def check_workers(self):
+        """Restart dead workers under the same name, so the ring does not change"""
+        with self._lock:
+            for name, (process, _) in list(self._workers.items()):
+                if process.is_alive():
+                    continue
+                logger.error(f"Shard worker {name} exited with code {process.exitcode}, restarting")
+                self._workers[name] = self._spawn(name)
+                self._workers[name][1].put(self._assigned.get(name, []))
+
+    def deliver(self, item):
+        """Dedup a signal from a worker and send it if it is new (recorded only once sent)"""
+        if not self.state_store.should_emit(item["symbol"], item["direction"], item["bar_time"]):
+            SHARD_SIGNALS.inc(outcome="duplicate")
+            logger.info(f"Сигнал для {item['symbol']} от {item['worker']} подавлен: дубликат или период охлаждения")
+            if item.get("chart_path") and os.path.exists(item["chart_path"]):
+                os.remove(item["chart_path"])
+            return False
+        if self.notify(item["message"], item.get("chart_path")) is False:
+            SHARD_SIGNALS.inc(outcome="failed")
+            return False
+        SHARD_SIGNALS.inc(outcome="sent")
+        self.state_store.record(item["symbol"], item["direction"], item["bar_time"])
+        with self._lock:
+            worker = self._workers.get(item["worker"])
+        if worker is not None:
+            worker[1].put(("ack", item["symbol"], item["direction"], item["bar_time"]))
+        return True
+
+    def _notify_loop(self):
+        while True:
+            item = self._signals.get()
+            if item is None:
+                break
+            try:
+                self.deliver(item)
+            except Exception as e:
+                logger.error(f"Failed to deliver signal for {item.get('symbol')}: {str(e)}")
+
+    def snapshot(self):
+        """Workers with pid, liveness and symbol count"""
+        with self._lock:
+            return {
+                name: {"pid": process.pid, "alive": process.is_alive(),
+                       "symbols": len(self._assigned.get(name, []))}
+                for name, (process, _) in self._workers.items()
+            }
+
+    def stop(self, timeout=10):
+        """Stop every worker, then the notifier and log threads"""
+        for name in list(self._workers):
+            self.remove_worker(name, timeout)
+        self._signals.put(None)
+        self._logs.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+def run_sharded(workers=SHARD_WORKERS, on_cycle=None):
+    """
+    Sharded replacement for run_bot: a coordinator plus `workers` processes
+
+    The coordinator refreshes the universe every FUTURES_INTERVAL (when the
+    screener is enabled), restarts dead workers and delivers signals. It
+    stops on SIGINT/SIGTERM or stop_bot(), like run_bot. Workers run the
+    fetch, market data and signal stages only: order execution is refused,
+    and paper trading, clustering, the digest and adaptive polling are
+    ignored with a warning.
+    """
+    from bot.core import main
+
+    setup_logging()
+    if EXECUTION_ENABLED:
+        raise RuntimeError("EXECUTION_ENABLED is not supported with SHARD_WORKERS, orders would never be placed")
+    ignored = [name for name, enabled in (("PAPER_TRADING_ENABLED", PAPER_TRADING_ENABLED),
+                                          ("CORRELATION_CLUSTERING", CORRELATION_CLUSTERING),
+                                          ("NOTIFY_DIGEST", NOTIFY_DIGEST), ("POLL_ADAPTIVE", POLL_ADAPTIVE))
+               if enabled]
+    if ignored:
+        logger.warning(f"Ignored with SHARD_WORKERS: {', '.join(ignored)}")
+    logger.info(f"Starting sharded bot with {workers} workers...")
+    main.running = True
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, main.signal_handler)
+        signal.signal(signal.SIGTERM, main.signal_handler)
+
+    exchange = main.initialize_exchange()
+    coordinator = ShardCoordinator()
+    try:
+        coordinator.start(workers, main.get_cycle_symbols(exchange))
+        while main.running:
+            cycle_start = time.time()
+            coordinator.check_workers()
+            if SCREENER_ENABLED:
+                coordinator.set_symbols(main.get_cycle_symbols(exchange))
+            if on_cycle is not None:
+                on_cycle(time.time() - cycle_start)
+            sleep_time = FUTURES_INTERVAL
+            while sleep_time > 0 and main.running:
+                time.sleep(min(sleep_time, 1.0))
+                sleep_time -= 1.0
+    finally:
+        coordinator.stop()
+        logger.info("Sharded bot stopped")
@@ -0,0 +1,109 @@
+# signal_state.py
+
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class SignalStateStore:
+    """
+    Per-symbol memory of the last emitted signal
+
+    A signal is suppressed if the same direction was already emitted for the
+    same bar (even with an opposite signal in between, so a BUY-SELL-BUY
+    flip within one bar sends BUY once), or if the last signal had the same
+    direction and was emitted less than cooldown_seconds ago. A reversal is
+    not held back by the cooldown. State lives in memory; with db_path it is
+    also mirrored to a local SQLite file so that a restart does not re-send
+    the alerts of the current bar.
+    """
+
+    def __init__(self, cooldown_seconds=0, db_path=None):
+        self.cooldown_seconds = cooldown_seconds
+        self.db_path = db_path
+        self._state = {}
+        self._bars = {}  # (symbol, direction) -> последний бар, на котором сигнал отправлен
+        self._lock = threading.RLock()
+        self._conn = None
+
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS signal_state ("
+                "symbol TEXT PRIMARY KEY, direction TEXT, bar_time TEXT, emitted_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS signal_bars ("
+                "symbol TEXT, direction TEXT, bar_time TEXT, PRIMARY KEY (symbol, direction))"
+            )
+            self._conn.commit()
+            for symbol, direction, bar_time, emitted_at in self._conn.execute(
+                    "SELECT symbol, direction, bar_time, emitted_at FROM signal_state"):
+                self._state[symbol] = (direction, bar_time, emitted_at)
+                self._bars[(symbol, direction)] = bar_time
+            for symbol, direction, bar_time in self._conn.execute(
+                    "SELECT symbol, direction, bar_time FROM signal_bars"):
+                self._bars[(symbol, direction)] = bar_time
+            logger.info(f"Loaded signal state for {len(self._state)} symbols from {db_path}")
+
+    def should_emit(self, symbol, direction, bar_time, now=None):
+        """
+        Check whether a signal should be delivered
+
+        Args:
+            symbol (str): Trading pair symbol
+            direction (str): Signal type ('ПОКУПКА' or 'ПРОДАЖА')
+            bar_time: Open time of the bar the signal was generated on
+            now (float, optional): Current unix time
+
+        Returns:
+            bool: False if the signal is a duplicate or still in cooldown
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            last = self._state.get(symbol)
+            if self._bars.get((symbol, direction)) == str(bar_time):
+                return False
+        if last is None:
+            return True
+
+        last_direction, _, emitted_at = last
+        if last_direction != direction:
+            return True
+        return now - emitted_at >= self.cooldown_seconds
+
+    def record(self, symbol, direction, bar_time, now=None):
+        """Remember that a signal was emitted for the symbol (call once it was delivered)"""
+        now = time.time() if now is None else now
+        entry = (direction, str(bar_time), now)
+        with self._lock:
+            self._state[symbol] = entry
+            self._bars[(symbol, direction)] = str(bar_time)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO signal_state (symbol, direction, bar_time, emitted_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (symbol, *entry)
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO signal_bars (symbol, direction, bar_time) VALUES (?, ?, ?)",
+                    (symbol, direction, str(bar_time))
+                )
+                self._conn.commit()
+
+    def check_and_record(self, symbol, direction, bar_time, now=None):
+        """Atomically check a signal and record it if it passes"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self.should_emit(symbol, direction, bar_time, now):
+                return False
+            self.record(symbol, direction, bar_time, now)
+            return True
+
+    def close(self):
+        """Close the SQLite backing, if any"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
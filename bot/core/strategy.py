@@ -1,25 +1,24 @@
 # strategy.py
 
 from bot.indicators.indicators import add_indicators
-from bot.notifications.notifier import send_telegram_message
 from bot.data.data_fetch import fetch_ohlcv
 from bot.config import (
     TIMEFRAME, RSI_OVERSOLD, RSI_OVERBOUGHT, STOCH_OVERSOLD,
     STOCH_OVERBOUGHT, ADX_THRESHOLD, VOLUME_THRESHOLD,
-    STOP_LOSS_PCT, TAKE_PROFIT_PCT, LEVERAGE
+    STOP_LOSS_PCT, TAKE_PROFIT_PCT, LEVERAGE, MAX_FUNDING_RATE, BOOK_IMBALANCE_LIMIT
 )
-from bot.visualization.visualizer import plot_chart, plot_signal
+from bot.core.rules import compile_rules, first_match
+from bot.notifications.templates import render_signal
+from bot.monitoring.metrics import STAGE_SECONDS
 import logging
+from functools import partial
 import pandas as pd
 import numpy as np
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+SIGNAL_RULE_SET = compile_rules()
+
 def analyze_trend(df):
     """Анализ краткосрочного тренда с использованием нескольких индикаторов"""
     last_row = df.iloc[-1]
@@ -148,138 +147,170 @@ def calculate_position_size(price, atr):
     
     return min(position_size, 1.0)  # Ограничение в 100% доступной маржи
 
-def generate_signal(symbol, df):
-    """Генерация торгового сигнала на основе комплексного анализа"""
+def market_allows(direction, market):
+    """Фильтр по ставке финансирования и дисбалансу стакана (нет данных - фильтр пропускается)"""
+    if not market:
+        return True
+    sign = 1 if direction == "ПОКУПКА" else -1
+    funding_rate = market.get("funding_rate")
+    if funding_rate is not None and sign * funding_rate > MAX_FUNDING_RATE:
+        return False
+    imbalance = market.get("book_imbalance")
+    if imbalance is not None and sign * imbalance < -BOOK_IMBALANCE_LIMIT:
+        return False
+    return True
+
+def build_signal(direction, price, atr):
+    """Entry, stop-loss, take-profit and size of a signal in `direction` at `price`"""
+    long = direction == "ПОКУПКА"
+    return {
+        "signal": direction,
+        "strength": "СИЛЬНЫЙ",
+        "price": price,
+        "stop_loss": price * (1 - STOP_LOSS_PCT) if long else price * (1 + STOP_LOSS_PCT),  # Для шорта стоп выше цены входа
+        "take_profit": price * (1 + TAKE_PROFIT_PCT) if long else price * (1 - TAKE_PROFIT_PCT),
+        "position_size": calculate_position_size(price, atr),
+        "leverage": LEVERAGE
+    }
+
+def generate_signal(symbol, df, market=None):
+    """Генерация торгового сигнала на основе комплексного анализа
+
+    market - снимок MarketDataFeed (ставка финансирования, открытый интерес,
+    стакан); если передан, сигналы против толпы и стакана отбрасываются.
+    """
     trend = analyze_trend(df)
     momentum = analyze_momentum(df)
     volatility = analyze_volatility(df)
     volume = analyze_volume(df)
     
-    last_row = df.iloc[-1]
-    close_price = last_row["close"]
-    
-    # Расчет размера позиции и уровней стопов
-    position_size = calculate_position_size(close_price, last_row["atr"])
-    stop_loss = close_price * (1 - STOP_LOSS_PCT)
-    take_profit = close_price * (1 + TAKE_PROFIT_PCT)
-    
-    # Логирование текущих условий
-    logger.info(f"\nАнализ условий для {symbol}:")
-    logger.info(f"Сила тренда: {trend['trend_strength']:.2f} (Порог: {ADX_THRESHOLD})")
-    logger.info(f"RSI: {momentum['rsi']:.2f} (Перепродан: {RSI_OVERSOLD}, Перекуплен: {RSI_OVERBOUGHT})")
-    logger.info(f"Стохастик: {momentum['stoch_k']:.2f}/{momentum['stoch_d']:.2f}")
-    logger.info(f"Всплеск объема: {volume['volume_spike']}")
-    
-    # Условия для сильного сигнала на покупку (ослабленные для тестирования)
-    if (trend["ema_trend"] == "бычий" and  # Убрали проверку is_strong_trend
-        momentum["rsi_signal"] == "перепродан" and
-        volume["volume_trend"]):  # Заменили volume_spike на volume_trend
-        
-        return {
-            "signal": "ПОКУПКА",
-            "strength": "СИЛЬНЫЙ",
-            "price": close_price,
-            "stop_loss": stop_loss,
-            "take_profit": take_profit,
-            "position_size": position_size,
-            "leverage": LEVERAGE,
-            "analysis": {
-                "trend": trend,
-                "momentum": momentum,
-                "volatility": volatility,
-                "volume": volume
-            }
-        }
+    # Логирование текущих условий (одна запись, форматируется лениво в потоке логгера)
+    logger.info(
+        "Анализ условий для %s: сила тренда %.2f (порог %s), RSI %.2f (перепродан %s, перекуплен %s), "
+        "стохастик %.2f/%.2f, всплеск объема %s",
+        symbol, trend['trend_strength'], ADX_THRESHOLD, momentum['rsi'], RSI_OVERSOLD, RSI_OVERBOUGHT,
+        momentum['stoch_k'], momentum['stoch_d'], volume['volume_spike']
+    )
     
-    # Условия для сильного сигнала на продажу (ослабленные для тестирования)
-    elif (trend["ema_trend"] == "медвежий" and  # Убрали проверку is_strong_trend
-          momentum["rsi_signal"] == "перекуплен" and
-          volume["volume_trend"]):  # Заменили volume_spike на volume_trend
-        
-        return {
-            "signal": "ПРОДАЖА",
-            "strength": "СИЛЬНЫЙ",
-            "price": close_price,
-            "stop_loss": stop_loss,
-            "take_profit": take_profit,
-            "position_size": position_size,
-            "leverage": LEVERAGE,
-            "analysis": {
-                "trend": trend,
-                "momentum": momentum,
-                "volatility": volatility,
-                "volume": volume
-            }
-        }
+    # Условия заданы в SIGNAL_RULES и скомпилированы один раз при импорте
+    direction = first_match(SIGNAL_RULE_SET, df, allows=lambda d: market_allows(d, market))
+    if direction is None:
+        return None
     
-    return None
+    last_row = df.iloc[-1]
+    signal = build_signal(direction, last_row["close"], last_row["atr"])
+    signal["analysis"] = {
+        "trend": trend,
+        "momentum": momentum,
+        "volatility": volatility,
+        "volume": volume,
+        "market": market
+    }
+    return signal
+
+def format_signal_message(symbol, signal):
+    """Текст сообщения о сигнале для Telegram (шаблон по направлению, значения экранированы для Markdown)"""
+    return render_signal(symbol, signal)
+
+def publish_signal(symbol, signal, bar_time, message, df, deliver=None):
+    """
+    Render the chart of a signal and send it (or hand it to deliver)
+
+    A chart that fails to render does not hold the alert back: the text is
+    sent without it.
+
+    Returns:
+        bool: True if the signal was sent or handed over
+    """
+    # Графики и Telegram нужны только при сигнале, поэтому импорт отложен
+    from bot.visualization.visualizer import plot_signal
+    from bot.notifications.notifier import send_telegram_message
 
-def analyze_symbol(symbol, exchange):
-    """Analyze a single symbol and generate trading signals"""
+    try:
+        with STAGE_SECONDS.time(stage="render"):
+            chart_path = plot_signal(df, symbol, TIMEFRAME, signal['signal'],
+                                     signal['price'], signal['stop_loss'], signal['take_profit'])
+    except Exception as e:
+        chart_path = None
+        logger.error(f"Failed to render the chart for {symbol}: {str(e)}")
+    if not chart_path:
+        logger.warning(f"No chart for {symbol}, sending the text only")
+    if deliver is not None:
+        deliver(symbol, signal, bar_time, message, chart_path)
+        return True
+    with STAGE_SECONDS.time(stage="notify"):
+        return send_telegram_message(message, chart_path) is not False
+
+def _nothing():
+    pass
+
+def analyze_symbol(symbol, exchange, df=None, state_store=None, market=None, deliver=None, observe=None,
+                   collect=None):
+    """Analyze a single symbol and generate trading signals
+
+    If df is given, the already fetched candles are reused instead of
+    requesting them from the exchange again. If state_store is given,
+    duplicate or cooling-down signals are dropped before any chart is
+    rendered or message is sent. market is the MarketDataFeed snapshot
+    of the symbol for the funding/order book filters. If deliver is given,
+    deliver(symbol, signal, bar_time, message, chart_path) is called instead
+    of sending to Telegram (shard workers hand signals to the coordinator).
+    observe(symbol, df), if given, receives the candles with indicators
+    (the adaptive poll scheduler rates the symbol's activity from them).
+    collect(symbol, signal, bar_time, message, df, confirm=...), if given,
+    takes the signal instead of rendering and sending it now (cluster
+    alerts, digest) and calls confirm() once it has been sent. A signal is
+    recorded in state_store only after it was delivered, so a failed chart
+    or send does not suppress it for the rest of the bar and the cooldown.
+    Stale candles (served from cache after a failed fetch) only reach
+    observe; no signal is generated from them.
+
+    Returns the delivered signal, or None if nothing was sent. With collect
+    the signal is only queued: act on it once the stage's flush() reports
+    it delivered.
+    """
     try:
         # Fetch OHLCV data
-        df = fetch_ohlcv(symbol, exchange, timeframe=TIMEFRAME)
+        if df is None:
+            df = fetch_ohlcv(symbol, exchange, timeframe=TIMEFRAME)
         if df is None or df.empty:
             logger.error(f"Failed to fetch data for {symbol}")
             return
+        stale = df.attrs.get("stale", False)
 
         # Add technical indicators
-        df = add_indicators(df)
-        df = df.dropna()  # Очистка NaN после добавления индикаторов
-
-        # Analyze market conditions
-        trend_strength = analyze_trend(df)
-        momentum = analyze_momentum(df)
-        volume_surge = analyze_volume(df)
-
-        # Log analysis results
-        logger.info(f"\nАнализ условий для {symbol}:")
-        logger.info(f"Сила тренда: {trend_strength['trend_strength']:.2f} (Порог: {ADX_THRESHOLD})")
-        logger.info(f"RSI: {momentum['rsi']:.2f} (Перепродан: {RSI_OVERSOLD}, Перекуплен: {RSI_OVERBOUGHT})")
-        logger.info(f"Стохастик: {momentum['stoch_k']:.2f}/{momentum['stoch_d']:.2f}")
-        logger.info(f"Всплеск объема: {volume_surge['volume_spike']}")
+        with STAGE_SECONDS.time(stage="indicators"):
+            df = add_indicators(df)
+            df = df.dropna()  # Очистка NaN после добавления индикаторов
+        if observe is not None:
+            observe(symbol, df)
+        if stale:
+            # Свечи из кэша после сбоя запроса: цена могла уйти, сигнал по ним не отправляем
+            logger.warning(f"Stale candles for {symbol}, signal check skipped")
+            return
 
-        # Generate trading signal
-        signal = generate_signal(symbol, df)
+        # Generate trading signal (generate_signal also logs the analysis)
+        with STAGE_SECONDS.time(stage="signal"):
+            signal = generate_signal(symbol, df, market=market)
+        bar_time = df["timestamp"].iloc[-1] if "timestamp" in df.columns else df.index[-1]
+        if signal and state_store is not None:
+            if not state_store.should_emit(symbol, signal['signal'], bar_time):
+                logger.info("Сигнал для %s (%s) подавлен: дубликат или период охлаждения", symbol, signal['signal'])
+                return
         if signal:
-            # Send signal to Telegram
-            message = f"🔔 Сигнал для {symbol}:\n{signal['signal']} {symbol}\n"
-            message += f"Сила сигнала: {signal['strength']}\n"
-            message += f"Цена входа: {signal['price']:.2f}$\n"
-            message += f"Стоп-лосс: {signal['stop_loss']:.2f}$ ({STOP_LOSS_PCT*100}%)\n"
-            message += f"Тейк-профит: {signal['take_profit']:.2f}$ ({TAKE_PROFIT_PCT*100}%)\n"
-            message += f"Размер позиции: {signal['position_size']*100:.1f}%\n"
-            message += f"Плечо: {LEVERAGE}x\n"
-            
-            # Add analysis details
-            analysis = signal['analysis']
-            message += f"\nАнализ тренда:\n"
-            message += f"- Сила тренда: {analysis['trend']['trend_strength']:.2f}\n"
-            message += f"- Тренд EMA: {analysis['trend']['ema_trend']}\n"
-            message += f"- Тренд MACD: {analysis['trend']['macd_trend']}\n"
-            message += f"- Тренд Ишимоку: {analysis['trend']['ichimoku_trend']}\n"
-            
-            message += f"\nАнализ импульса:\n"
-            message += f"- RSI: {analysis['momentum']['rsi']:.2f} ({analysis['momentum']['rsi_signal']})\n"
-            message += f"- Стохастик: {analysis['momentum']['stoch_k']:.2f}/{analysis['momentum']['stoch_d']:.2f}\n"
-            message += f"- Williams %R: {analysis['momentum']['williams_r']:.2f} ({analysis['momentum']['williams_signal']})\n"
-            message += f"- Скорость изменения: {analysis['momentum']['roc']:.2f}% ({analysis['momentum']['roc_signal']})\n"
-            
-            message += f"\nАнализ объема:\n"
-            message += f"- Всплеск объема: {'Да' if analysis['volume']['volume_spike'] else 'Нет'}\n"
-            message += f"- Тренд индекса силы: {'Положительный' if analysis['volume']['force_trend'] else 'Отрицательный'}\n"
-            message += f"- Тренд OBV: {'Положительный' if analysis['volume']['obv_trend'] else 'Отрицательный'}\n"
-            
-            message += f"\nАнализ волатильности:\n"
-            message += f"- ATR: {analysis['volatility']['atr']:.2f} ({analysis['volatility']['atr_percent']:.2f}%)\n"
-            message += f"- Ширина полос Боллинджера: {analysis['volatility']['bb_width']:.2f}\n"
-            
-            # Plot and send chart
-            chart_path = plot_signal(df, symbol, TIMEFRAME, signal['signal'], 
-                                       signal['price'], signal['stop_loss'], signal['take_profit'])
-            if chart_path:
-                send_telegram_message(message, chart_path)
-            logger.info(f"Сгенерирован сигнал для {symbol}: {signal['signal']}")
+            message = format_signal_message(symbol, signal)
+            confirm = partial(state_store.record, symbol, signal['signal'], bar_time) \
+                if state_store is not None else _nothing
+            if collect is not None:
+                collect(symbol, signal, bar_time, message, df, confirm=confirm)
+            elif publish_signal(symbol, signal, bar_time, message, df, deliver):
+                confirm()
+            else:
+                logger.error("Сигнал для %s не доставлен, повтор на следующем цикле", symbol)
+                return
+            logger.info("Сгенерирован сигнал для %s: %s", symbol, signal['signal'])
+
+        return signal
 
     except Exception as e:
         logger.error(f"Error analyzing {symbol}: {str(e)}")
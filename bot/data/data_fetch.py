@@ -1,82 +1,143 @@
 # data_fetch.py
 
-import ccxt
 import pandas as pd
 import logging
+import random
 from datetime import datetime, timedelta
 import time
 import numpy as np
+from bot.config import (
+    FETCH_TIMEOUT, FETCH_MAX_RETRIES, FETCH_RETRY_DELAY, FETCH_STALE_MAX_AGE, MEMORY_MAX_CACHED_SYMBOLS
+)
+from bot.data.resilience import CallTimeout, CircuitOpen, endpoint
+from bot.monitoring.metrics import counter, histogram, STAGE_SECONDS
+from bot.monitoring.memory import BoundedCache
 
 logger = logging.getLogger(__name__)
 
-def fetch_ohlcv(symbol, exchange, timeframe, limit=500):
+FETCH_SECONDS = histogram("bot_fetch_seconds", "OHLCV request latency per symbol", labels=("symbol",))
+FETCH_RETRIES = counter("bot_fetch_retries_total", "OHLCV fetch retries per symbol", labels=("symbol",))
+API_ERRORS = counter("bot_api_errors_total", "Exchange API errors by type", labels=("symbol", "error"))
+STALE_SERVED = counter("bot_stale_candles_total", "Fetches answered from cached candles after a miss",
+                       labels=("symbol",))
+
+# (symbol, timeframe, limit) -> (monotonic time, сырые OHLCV) последнего успешного запроса
+_last_candles = BoundedCache(MEMORY_MAX_CACHED_SYMBOLS, "stale_candles")
+
+def _to_frame(ohlcv):
+    """Build the candle DataFrame with derived columns from raw OHLCV rows"""
+    # Convert to DataFrame
+    df = pd.DataFrame(
+        ohlcv,
+        columns=["timestamp", "open", "high", "low", "close", "volume"]
+    )
+    
+    # Convert timestamp to datetime
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    
+    # Add additional time-based features
+    df["hour"] = df["timestamp"].dt.hour
+    df["day_of_week"] = df["timestamp"].dt.dayofweek
+    
+    # Calculate returns
+    df["returns"] = df["close"].pct_change()
+    df["log_returns"] = np.log(df["close"] / df["close"].shift(1))
+    
+    # Calculate volatility
+    df["volatility"] = df["returns"].rolling(window=20).std()
+    
+    # Calculate price ranges
+    df["price_range"] = df["high"] - df["low"]
+    df["body_size"] = abs(df["close"] - df["open"])
+    
+    # Calculate volume metrics
+    df["volume_ma"] = df["volume"].rolling(window=20).mean()
+    df["volume_std"] = df["volume"].rolling(window=20).std()
+    
+    # Clean up data
+    return df.dropna()
+
+def _serve_stale(key, symbol, error):
+    """Cached candles marked stale, or raise the fetch error if there are none fresh enough"""
+    import ccxt
+
+    cached = _last_candles.get(key)
+    if cached is not None and time.monotonic() - cached[0] <= FETCH_STALE_MAX_AGE:
+        STALE_SERVED.inc(symbol=symbol)
+        logger.warning(f"Serving cached candles for {symbol} ({time.monotonic() - cached[0]:.0f} s old): {error}")
+        df = _to_frame(cached[1])
+        df.attrs["stale"] = True
+        return df
+    logger.error(f"Failed to fetch data for {symbol}: {error}")
+    if isinstance(error, CallTimeout):
+        raise ccxt.RequestTimeout(str(error)) from error
+    if isinstance(error, CircuitOpen):
+        raise ccxt.ExchangeNotAvailable(str(error)) from error
+    raise error
+
+def fetch_ohlcv(symbol, exchange, timeframe, limit=500, deadline=None):
     """
     Fetch OHLCV data from exchange with retry mechanism and proper error handling
     
+    Every request has a deadline (FETCH_TIMEOUT, or the earlier `deadline`)
+    and goes through the "fetch_ohlcv" circuit breaker; network errors are
+    retried with exponential backoff only while the deadline allows. Only
+    network errors and FETCH_TIMEOUT misses count against the circuit; once
+    `deadline` has passed, no request is sent at all. When
+    no fresh candles arrive in time, the last successfully fetched ones are
+    returned with df.attrs["stale"] = True if they are at most
+    FETCH_STALE_MAX_AGE seconds old.
+    
     Args:
         symbol (str): Trading pair symbol
         exchange (ccxt.Exchange): Exchange instance
         timeframe (str): Timeframe for the data
         limit (int): Number of candles to fetch
+        deadline (float, optional): time.monotonic() by which data is needed
+            (the end of the cycle's fetch budget)
         
     Returns:
         pd.DataFrame: DataFrame with OHLCV data
     """
-    max_retries = 3
-    retry_delay = 5  # seconds
+    import ccxt  # Не нужен для офлайн-бенчмарков до первого запроса
+
+    key = (symbol, timeframe, limit)
+    if deadline is not None and deadline <= time.monotonic():
+        # Бюджет цикла исчерпан: биржу не трогаем и в цепь ошибку не пишем
+        return _serve_stale(key, symbol, CallTimeout("cycle fetch budget exhausted"))
+    timeout_deadline = time.monotonic() + FETCH_TIMEOUT
+    call_deadline = timeout_deadline if deadline is None else min(timeout_deadline, deadline)
+    ohlcv_endpoint = endpoint("fetch_ohlcv", failures=(ccxt.NetworkError,))
+    retry_delay = FETCH_RETRY_DELAY
     
-    for attempt in range(max_retries):
+    for attempt in range(FETCH_MAX_RETRIES):
         try:
             # Fetch OHLCV data
-            ohlcv = exchange.fetch_ohlcv(
-                symbol,
-                timeframe=timeframe,
-                limit=limit
-            )
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(
-                ohlcv,
-                columns=["timestamp", "open", "high", "low", "close", "volume"]
-            )
-            
-            # Convert timestamp to datetime
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-            
-            # Add additional time-based features
-            df["hour"] = df["timestamp"].dt.hour
-            df["day_of_week"] = df["timestamp"].dt.dayofweek
-            
-            # Calculate returns
-            df["returns"] = df["close"].pct_change()
-            df["log_returns"] = np.log(df["close"] / df["close"].shift(1))
-            
-            # Calculate volatility
-            df["volatility"] = df["returns"].rolling(window=20).std()
-            
-            # Calculate price ranges
-            df["price_range"] = df["high"] - df["low"]
-            df["body_size"] = abs(df["close"] - df["open"])
-            
-            # Calculate volume metrics
-            df["volume_ma"] = df["volume"].rolling(window=20).mean()
-            df["volume_std"] = df["volume"].rolling(window=20).std()
+            with FETCH_SECONDS.time(symbol=symbol), STAGE_SECONDS.time(stage="fetch"):
+                ohlcv = ohlcv_endpoint.call(
+                    lambda: exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit),
+                    timeout_deadline, budget=deadline
+                )
             
-            # Clean up data
-            df = df.dropna()
+            df = _to_frame(ohlcv)
+            _last_candles[key] = (time.monotonic(), np.asarray(ohlcv, dtype=float))
             
-            logger.info(f"Successfully fetched {len(df)} candles for {symbol}")
+            logger.info("Successfully fetched %d candles for %s", len(df), symbol)
             return df
             
-        except ccxt.NetworkError as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"Network error while fetching {symbol}, retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                logger.error(f"Failed to fetch data for {symbol} after {max_retries} attempts: {str(e)}")
-                raise
+        except (ccxt.NetworkError, CallTimeout, CircuitOpen) as e:
+            API_ERRORS.inc(symbol=symbol, error=type(e).__name__)
+            wait = retry_delay * (1 + random.random())
+            if isinstance(e, CircuitOpen) or attempt == FETCH_MAX_RETRIES - 1 \
+                    or time.monotonic() + wait >= call_deadline:
+                return _serve_stale(key, symbol, e)
+            FETCH_RETRIES.inc(symbol=symbol)
+            logger.warning(f"Network error while fetching {symbol}, retrying in {wait:.1f} seconds...")
+            time.sleep(wait)
+            retry_delay *= 2
                 
         except ccxt.ExchangeError as e:
+            API_ERRORS.inc(symbol=symbol, error=type(e).__name__)
             logger.error(f"Exchange error while fetching {symbol}: {str(e)}")
             raise
             
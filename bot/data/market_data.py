@@ -0,0 +1,167 @@
+# market_data.py
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bot.config import (
+    MARKET_DATA_DEPTH, MARKET_FUNDING_TTL, MARKET_OPEN_INTEREST_TTL,
+    MARKET_BOOK_TTL, MARKET_DATA_WORKERS, MEMORY_MAX_CACHED_SYMBOLS
+)
+from bot.monitoring.metrics import counter, STAGE_SECONDS
+from bot.monitoring.memory import BoundedCache
+
+logger = logging.getLogger(__name__)
+
+MARKET_DATA_ERRORS = counter("bot_market_data_errors_total", "Failed market data requests by kind",
+                             labels=("kind",))
+
+def book_features(order_book):
+    """
+    Imbalance, spread and depth of a limited-depth order book
+
+    Args:
+        order_book (dict): Unified ccxt order book with bids and asks
+
+    Returns:
+        dict: book_imbalance in [-1, 1] (positive - more bids), spread_pct and
+        bid/ask depth in quote currency
+    """
+    bids = order_book.get("bids") or []
+    asks = order_book.get("asks") or []
+    bid_depth = sum(price * amount for price, amount, *_ in bids)
+    ask_depth = sum(price * amount for price, amount, *_ in asks)
+    total = bid_depth + ask_depth
+
+    spread_pct = None
+    if bids and asks:
+        best_bid, best_ask = bids[0][0], asks[0][0]
+        spread_pct = (best_ask - best_bid) / ((best_ask + best_bid) / 2) * 100
+
+    return {
+        "book_imbalance": (bid_depth - ask_depth) / total if total else 0.0,
+        "spread_pct": spread_pct,
+        "bid_depth": bid_depth,
+        "ask_depth": ask_depth
+    }
+
+class MarketDataFeed:
+    """
+    Funding rate, open interest and order book features for a set of symbols
+
+    The premium index (mark price and funding rate) of the whole futures
+    market comes from one bulk request. Binance has no bulk endpoint for open
+    interest and depth, so those are requested concurrently from a small
+    thread pool. Every value is cached with its own TTL, so a cycle never
+    requests the same data twice and slow-changing data is not refetched
+    every cycle.
+    """
+
+    def __init__(self, exchange, depth=MARKET_DATA_DEPTH, funding_ttl=MARKET_FUNDING_TTL,
+                 open_interest_ttl=MARKET_OPEN_INTEREST_TTL, book_ttl=MARKET_BOOK_TTL,
+                 workers=MARKET_DATA_WORKERS, clock=time.monotonic, max_symbols=MEMORY_MAX_CACHED_SYMBOLS):
+        self.exchange = exchange
+        self.depth = depth
+        self.ttls = {"funding": funding_ttl, "open_interest": open_interest_ttl, "book": book_ttl}
+        self.clock = clock
+        # kind -> symbol -> (fetched_at, value); символы, выпавшие из скринера, вытесняются
+        self._cache = {kind: BoundedCache(max_symbols, f"market_{kind}") for kind in self.ttls}
+        self._previous_oi = BoundedCache(max_symbols, "market_previous_oi")
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-data")
+
+    def _stale(self, kind, symbols, now):
+        cache = self._cache[kind]
+        ttl = self.ttls[kind]
+        return [s for s in symbols if s not in cache or now - cache[s][0] >= ttl]
+
+    def refresh(self, symbols):
+        """
+        Fetch whatever is missing or expired for the symbols
+
+        Returns:
+            dict: Feature snapshot per symbol (see snapshot())
+        """
+        now = self.clock()
+        with STAGE_SECONDS.time(stage="market_data"):
+            if self._stale("funding", symbols, now):
+                self._fetch_premium_index(symbols, now)
+
+            jobs = [(self._fetch_open_interest, "open_interest", s)
+                    for s in self._stale("open_interest", symbols, now)]
+            jobs += [(self._fetch_book, "book", s) for s in self._stale("book", symbols, now)]
+            futures = [(kind, symbol, self._pool.submit(fetch, symbol)) for fetch, kind, symbol in jobs]
+            for kind, symbol, future in futures:
+                try:
+                    value = future.result()
+                except Exception as e:
+                    MARKET_DATA_ERRORS.inc(kind=kind)
+                    logger.warning(f"Failed to fetch {kind} for {symbol}: {str(e)}")
+                    continue
+                if kind == "open_interest" and symbol in self._cache[kind]:
+                    self._previous_oi[symbol] = self._cache[kind][symbol][1]
+                self._cache[kind][symbol] = (now, value)
+
+        return {symbol: self.snapshot(symbol) for symbol in symbols}
+
+    def _fetch_premium_index(self, symbols, now):
+        ids = {self.exchange.market(symbol)["id"]: symbol for symbol in symbols}
+        try:
+            # Без параметра symbol Binance отдает индекс премии по всем контрактам
+            rows = self.exchange.fapiPublicGetPremiumIndex()
+        except Exception as e:
+            MARKET_DATA_ERRORS.inc(kind="funding")
+            logger.warning(f"Failed to fetch premium index: {str(e)}")
+            return
+        missing = set(symbols)
+        for row in rows:
+            symbol = ids.get(row.get("symbol"))
+            if symbol is None:
+                continue
+            missing.discard(symbol)
+            mark = float(row["markPrice"])
+            index = float(row.get("indexPrice") or 0)
+            self._cache["funding"][symbol] = (now, {
+                "funding_rate": float(row["lastFundingRate"]),
+                "next_funding_time": int(row.get("nextFundingTime") or 0),
+                "mark_price": mark,
+                "basis_pct": (mark - index) / index * 100 if index else None
+            })
+        # Символов нет в ответе (делистинг, поставочные контракты): пустая запись, чтобы TTL
+        # действовал и для них и индекс не запрашивался заново каждый цикл
+        for symbol in missing:
+            self._cache["funding"][symbol] = (now, None)
+
+    def _fetch_open_interest(self, symbol):
+        market_id = self.exchange.market(symbol)["id"]
+        row = self.exchange.fapiPublicGetOpenInterest({"symbol": market_id})
+        return float(row["openInterest"])
+
+    def _fetch_book(self, symbol):
+        return book_features(self.exchange.fetch_order_book(symbol, limit=self.depth))
+
+    def snapshot(self, symbol):
+        """
+        Cached features of one symbol; missing values are None
+
+        Returns:
+            dict: funding_rate, next_funding_time, mark_price, basis_pct,
+            open_interest, open_interest_change_pct, book_imbalance, spread_pct,
+            bid_depth, ask_depth
+        """
+        features = dict.fromkeys(("funding_rate", "next_funding_time", "mark_price", "basis_pct",
+                                  "open_interest", "open_interest_change_pct", "book_imbalance",
+                                  "spread_pct", "bid_depth", "ask_depth"))
+        for kind in ("funding", "book"):
+            if symbol in self._cache[kind] and self._cache[kind][symbol][1] is not None:
+                features.update(self._cache[kind][symbol][1])
+
+        if symbol in self._cache["open_interest"]:
+            open_interest = self._cache["open_interest"][symbol][1]
+            features["open_interest"] = open_interest
+            previous = self._previous_oi.get(symbol)
+            if previous:
+                features["open_interest_change_pct"] = (open_interest - previous) / previous * 100
+        return features
+
+    def close(self):
+        """Release the worker threads"""
+        self._pool.shutdown(wait=False)
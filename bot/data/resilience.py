@@ -0,0 +1,245 @@
+# resilience.py
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+from bot.config import (
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, FETCH_HEDGE, FETCH_HEDGE_PERCENTILE, FETCH_HEDGE_MIN_DELAY,
+    FETCH_WORKERS
+)
+from bot.monitoring.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATE = gauge("bot_circuit_state", "Circuit breaker state per endpoint (0 closed, 1 open, 2 half-open)",
+                      labels=("endpoint",))
+CIRCUIT_REJECTED = counter("bot_circuit_rejected_total", "Calls refused while a circuit was open",
+                           labels=("endpoint",))
+HEDGED_REQUESTS = counter("bot_hedged_requests_total", "Duplicate requests sent after the p95 latency",
+                          labels=("endpoint", "winner"))
+
+CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+class CallTimeout(Exception):
+    """No attempt of a call finished before its deadline"""
+
+class CircuitOpen(Exception):
+    """The endpoint's circuit breaker refused the call"""
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused for `reset_seconds`, so a degraded endpoint is not hit
+    again and again. Then one probe call is let through (half-open): success
+    closes the circuit, failure opens it for another period.
+    """
+
+    def __init__(self, endpoint, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(CLOSED, endpoint=endpoint)
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning(f"Circuit {self.endpoint}: {('closed', 'open', 'half-open')[state]}")
+        self.state = state
+        CIRCUIT_STATE.set(state, endpoint=self.endpoint)
+
+    def allow(self):
+        """Whether a call may go out now (reserves the probe when half-open)"""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                self._set_state(HALF_OPEN)
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                return True
+        CIRCUIT_REJECTED.inc(endpoint=self.endpoint)
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def release(self):
+        """Neither success nor failure (the caller gave up): free the half-open probe"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+                self._set_state(OPEN)
+
+class LatencyTracker:
+    """Recent call latencies of an endpoint, for the hedging delay"""
+
+    def __init__(self, size=200, min_samples=20):
+        self._samples = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def observe(self, seconds):
+        self._samples.append(seconds)
+
+    def percentile(self, q):
+        """q-th percentile of the recent latencies, None until min_samples are seen"""
+        if len(self._samples) < self.min_samples:
+            return None
+        return float(np.percentile(self._samples, q))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+        return _pool
+
+def call_with_deadline(function, deadline, hedge_after=None, endpoint="call"):
+    """
+    Run function() and wait for it no longer than until `deadline`
+
+    The call runs on a shared worker pool so that the caller can give up at
+    the deadline; an abandoned call finishes in the background (the client
+    timeout bounds it) and its result is dropped. With `hedge_after`, a
+    duplicate call is started if the first one has not returned after that
+    many seconds, and whichever finishes first wins.
+
+    Args:
+        function (callable): Call without arguments
+        deadline (float): time.monotonic() by which a result is needed
+        hedge_after (float, optional): Seconds before the duplicate request
+        endpoint (str): Name for metrics
+
+    Returns:
+        Result of function(); its exception is re-raised
+
+    Raises:
+        CallTimeout: Nothing finished before the deadline
+    """
+    if deadline <= time.monotonic():
+        raise CallTimeout(f"{endpoint}: deadline already passed")
+    pool = _executor()
+    first = pool.submit(function)
+    futures = [first]
+    if hedge_after is not None and hedge_after < deadline - time.monotonic():
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            futures.append(pool.submit(function))
+    hedged = len(futures) > 1
+    error = None
+    while futures:
+        done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            futures.remove(future)
+            if future.exception() is None:
+                for other in futures:
+                    other.cancel()
+                if hedged:
+                    HEDGED_REQUESTS.inc(endpoint=endpoint, winner="first" if future is first else "hedge")
+                return future.result()
+            error = future.exception()
+    if not futures:
+        raise error
+    # Ответ опоздал: запросы дорабатывают в фоне, их результат не нужен
+    for future in futures:
+        future.cancel()
+    raise CallTimeout(f"{endpoint} did not finish in time")
+
+class Endpoint:
+    """
+    One exchange endpoint: circuit breaker, latency history and hedging
+
+    Exceptions of `failures` types and missed deadlines count against the
+    circuit; other exceptions (e.g. an unknown symbol) are the caller's
+    problem and do not. With hedging, the duplicate request goes out after
+    the `hedge_percentile` latency of recent successful calls.
+    """
+
+    def __init__(self, name, failures=(Exception,), hedge=FETCH_HEDGE, hedge_percentile=FETCH_HEDGE_PERCENTILE,
+                 hedge_min_delay=FETCH_HEDGE_MIN_DELAY, breaker=None):
+        self.name = name
+        self.failures = failures
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker(name)
+        self.latency = LatencyTracker()
+
+    def hedge_delay(self):
+        if not self.hedge:
+            return None
+        percentile = self.latency.percentile(self.hedge_percentile)
+        return None if percentile is None else max(self.hedge_min_delay, percentile)
+
+    def call(self, function, deadline, budget=None):
+        """
+        call_with_deadline through the circuit breaker
+
+        Only a miss of the call's own `deadline` counts against the circuit.
+        When the caller's `budget` (e.g. the cycle's fetch deadline) ends
+        first, the endpoint is not to blame: a miss is not recorded, and a
+        budget that has already run out returns at once without a request.
+
+        Args:
+            function (callable): Call without arguments
+            deadline (float): time.monotonic() by which the endpoint must answer
+            budget (float, optional): time.monotonic() after which the caller stops waiting
+
+        Raises:
+            CircuitOpen: The circuit is open
+            CallTimeout: The deadline or the budget passed
+        """
+        limit = deadline if budget is None else min(deadline, budget)
+        if limit <= time.monotonic():
+            raise CallTimeout(f"{self.name}: no time left for the call")
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{self.name}: circuit open")
+        start = time.monotonic()
+        try:
+            result = call_with_deadline(function, limit, self.hedge_delay(), self.name)
+        except CallTimeout:
+            if limit < deadline:
+                self.breaker.release()  # Кончился бюджет вызывающего, а не терпение к эндпоинту
+            else:
+                self.breaker.record_failure()
+            raise
+        except self.failures:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_success()  # Ответ получен - эндпоинт жив
+            raise
+        self.latency.observe(time.monotonic() - start)
+        self.breaker.record_success()
+        return result
+
+_endpoints = {}
+
+def endpoint(name, failures=(Exception,)):
+    """Shared Endpoint of this process for `name`"""
+    with _pool_lock:
+        if name not in _endpoints:
+            _endpoints[name] = Endpoint(name, failures)
+        return _endpoints[name]
@@ -0,0 +1,139 @@
+# screener.py
+
+import ccxt
+import logging
+from bot.config import (
+    SCREENER_QUOTE, SCREENER_MIN_QUOTE_VOLUME, SCREENER_MIN_PRICE_CHANGE_PCT,
+    SCREENER_MAX_SPREAD_PCT, SCREENER_MAX_SYMBOLS
+)
+
+logger = logging.getLogger(__name__)
+
+def load_futures_universe(exchange, quote=SCREENER_QUOTE):
+    """
+    Collect all active linear perpetual contracts settled in the quote currency
+
+    Args:
+        exchange (ccxt.Exchange): Exchange instance
+        quote (str): Quote/settlement currency (USDT for USDT-M futures)
+
+    Returns:
+        list: Unified ccxt symbols of the perpetual contracts
+    """
+    markets = exchange.load_markets()
+    universe = []
+    for symbol, market in markets.items():
+        if not market.get("swap") or not market.get("linear"):
+            continue
+        if market.get("quote") != quote or market.get("settle") != quote:
+            continue
+        if market.get("active") is False:
+            continue
+        universe.append(symbol)
+    return sorted(universe)
+
+def fetch_bulk_tickers(exchange, symbols=None):
+    """
+    Fetch 24h statistics for the whole futures market in one bulk request
+
+    The Binance futures 24h ticker carries no bid/ask, so when it is missing
+    the book tops are merged in from one bulk bookTicker request.
+
+    Args:
+        exchange (ccxt.Exchange): Exchange instance
+        symbols (list, optional): Restrict the result to these symbols
+
+    Returns:
+        dict: Tickers keyed by unified symbol
+    """
+    tickers = exchange.fetch_tickers()
+    if symbols is not None:
+        wanted = set(symbols)
+        tickers = {s: t for s, t in tickers.items() if s in wanted}
+
+    missing_book = any(t.get("bid") is None or t.get("ask") is None for t in tickers.values())
+    if missing_book and exchange.has.get("fetchBidsAsks"):
+        try:
+            books = exchange.fetch_bids_asks()
+            for symbol, ticker in tickers.items():
+                book = books.get(symbol)
+                if book:
+                    ticker["bid"] = book.get("bid")
+                    ticker["ask"] = book.get("ask")
+        except ccxt.BaseError as e:
+            logger.warning(f"Failed to fetch book tickers, spread filter disabled: {str(e)}")
+
+    return tickers
+
+def score_ticker(ticker):
+    """
+    Extract pre-filter metrics from a ticker
+
+    Args:
+        ticker (dict): Unified ccxt ticker
+
+    Returns:
+        dict: quote_volume, price_change_pct and spread_pct (None if unknown)
+    """
+    quote_volume = ticker.get("quoteVolume")
+    if quote_volume is None and ticker.get("baseVolume") is not None and ticker.get("last"):
+        quote_volume = ticker["baseVolume"] * ticker["last"]
+
+    bid = ticker.get("bid")
+    ask = ticker.get("ask")
+    spread_pct = None
+    if bid and ask and ask >= bid:
+        spread_pct = (ask - bid) / ((ask + bid) / 2) * 100
+
+    return {
+        "quote_volume": quote_volume or 0.0,
+        "price_change_pct": ticker.get("percentage") or 0.0,
+        "spread_pct": spread_pct
+    }
+
+def screen_universe(exchange, universe=None, max_symbols=SCREENER_MAX_SYMBOLS,
+                    min_quote_volume=SCREENER_MIN_QUOTE_VOLUME,
+                    min_price_change_pct=SCREENER_MIN_PRICE_CHANGE_PCT,
+                    max_spread_pct=SCREENER_MAX_SPREAD_PCT):
+    """
+    Stage one of the screener: cheap pre-filter over bulk ticker data
+
+    Symbols are kept if they trade enough quote volume, moved at least
+    min_price_change_pct in either direction over 24h and have a tight
+    spread. The survivors are ranked by volume * |price change| and the top
+    max_symbols make up the shortlist for the full indicator pipeline.
+
+    Args:
+        exchange (ccxt.Exchange): Exchange instance
+        universe (list, optional): Symbols to screen, defaults to all USDT-M perpetuals
+        max_symbols (int): Shortlist size
+        min_quote_volume (float): Minimum 24h volume in quote currency
+        min_price_change_pct (float): Minimum absolute 24h price change in %
+        max_spread_pct (float): Maximum bid/ask spread in %
+
+    Returns:
+        list: Shortlisted symbols, most active first
+    """
+    if universe is None:
+        universe = load_futures_universe(exchange)
+
+    tickers = fetch_bulk_tickers(exchange, universe)
+
+    candidates = []
+    for symbol, ticker in tickers.items():
+        metrics = score_ticker(ticker)
+        if metrics["quote_volume"] < min_quote_volume:
+            continue
+        if abs(metrics["price_change_pct"]) < min_price_change_pct:
+            continue
+        if metrics["spread_pct"] is not None and metrics["spread_pct"] > max_spread_pct:
+            continue
+        score = metrics["quote_volume"] * abs(metrics["price_change_pct"])
+        candidates.append((score, symbol))
+
+    candidates.sort(reverse=True)
+    shortlist = [symbol for _, symbol in candidates[:max_symbols]]
+
+    logger.info(f"Screener: {len(tickers)} markets scanned, {len(candidates)} passed pre-filter, "
+                f"{len(shortlist)} shortlisted")
+    return shortlist
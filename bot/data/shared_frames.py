@@ -0,0 +1,125 @@
+# shared_frames.py
+
+import logging
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Все, что нужно другому процессу для подключения: имя блока, число строк,
+# колонки как (имя, dtype, смещение) и индекс (dtype, смещение) или None для RangeIndex
+SharedFrameDescriptor = namedtuple("SharedFrameDescriptor", "name length columns index")
+
+_ALIGN = 8
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+class SharedFrame:
+    """
+    Columns of a DataFrame stored once in a shared memory block
+
+    The owner copies the frame in with from_frame() and passes the small,
+    picklable `descriptor` to other processes, which attach() and read the
+    same memory without copying or pickling the data. Attached arrays are
+    read-only; frame() wraps them in a DataFrame without a copy, new columns
+    added to it live in the process that adds them.
+
+    Attaching is meant for processes started by the owner (process pools,
+    shard workers): they share its resource tracker, which only removes the
+    block when the owner unlinks it or exits.
+    """
+
+    def __init__(self, shm, descriptor, owner):
+        self._shm = shm
+        self.descriptor = descriptor
+        self.owner = owner
+        self._arrays = {}
+        for column, dtype, offset in descriptor.columns:
+            self._arrays[column] = self._view(dtype, offset)
+        self._index = self._view(*descriptor.index) if descriptor.index else None
+
+    def _view(self, dtype, offset):
+        array = np.ndarray((self.descriptor.length,), dtype=np.dtype(dtype), buffer=self._shm.buf, offset=offset)
+        if not self.owner:
+            array.flags.writeable = False
+        return array
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        """
+        Copy the numeric and datetime columns of df into a new shared block
+
+        Args:
+            df (pd.DataFrame): Source frame (e.g. from fetch_ohlcv)
+            columns (list, optional): Columns to share, defaults to all fixed-size ones
+
+        Returns:
+            SharedFrame: Owner handle; call unlink() when no process needs it
+        """
+        if columns is None:
+            columns = [c for c in df.columns if df[c].dtype.kind in "biufmM"]
+        length = len(df)
+
+        layout = []
+        offset = 0
+        for column in columns:
+            dtype = df[column].dtype
+            layout.append((column, dtype.str, offset))
+            offset = _aligned(offset + dtype.itemsize * length)
+        index = None
+        if not (isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1):
+            index = (df.index.dtype.str, offset)
+            offset = _aligned(offset + df.index.dtype.itemsize * length)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        shared = cls(shm, SharedFrameDescriptor(shm.name, length, tuple(layout), index), owner=True)
+        for column, _, _ in layout:
+            shared._arrays[column][:] = df[column].to_numpy()
+        if index is not None:
+            shared._index[:] = df.index.to_numpy()
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        """Map a block created by another process (read-only, no copy)"""
+        return cls(shared_memory.SharedMemory(name=descriptor.name), descriptor, owner=False)
+
+    @property
+    def nbytes(self):
+        return self._shm.size
+
+    def array(self, column):
+        return self._arrays[column]
+
+    def frame(self):
+        """DataFrame backed by the shared arrays"""
+        index = self._index if self._index is not None else None
+        return pd.DataFrame(self._arrays, index=index, copy=False)
+
+    def close(self):
+        """Unmap the block in this process"""
+        self._arrays = {}
+        self._index = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Кадры из frame() еще живы - отображение освободится вместе с ними
+            logger.debug(f"Shared frame {self.descriptor.name} is still referenced, leaving it mapped")
+
+    def unlink(self):
+        """Close and remove the block (owner only)"""
+        self.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
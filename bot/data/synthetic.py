@@ -0,0 +1,79 @@
+# synthetic.py
+
+import zlib
+import numpy as np
+
+TIMEFRAME_MS = {
+    "1m": 60_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000
+}
+
+DEFAULT_START_MS = 1_700_000_000_000  # 2023-11-14, фиксированная точка для воспроизводимости
+
+def symbol_seed(symbol, seed):
+    """Stable per-symbol seed (hash() is randomized between runs, crc32 is not)"""
+    return (seed + zlib.crc32(symbol.encode("utf-8"))) % (2 ** 32)
+
+def generate_ohlcv(bars, seed=42, start_price=100.0, timeframe="5m", start_ms=DEFAULT_START_MS,
+                   volatility=0.002):
+    """
+    Generate a reproducible random-walk OHLCV history
+
+    Args:
+        bars (int): Number of candles
+        seed (int): RNG seed, the same seed always gives the same candles
+        start_price (float): Open of the first candle
+        timeframe (str): Candle timeframe, used for the timestamps
+        start_ms (int): Open time of the first candle in ms
+        volatility (float): Standard deviation of the per-bar log return
+
+    Returns:
+        np.ndarray: Array of shape (bars, 6): timestamp, open, high, low, close, volume
+    """
+    rng = np.random.default_rng(seed)
+    log_returns = rng.normal(0.0, volatility, bars)
+    close = start_price * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    wick_up = np.abs(rng.normal(0.0, volatility / 2, bars))
+    wick_down = np.abs(rng.normal(0.0, volatility / 2, bars))
+    high = np.maximum(open_, close) * (1 + wick_up)
+    low = np.minimum(open_, close) * (1 - wick_down)
+    volume = rng.lognormal(mean=8.0, sigma=0.5, size=bars)
+    timestamps = start_ms + np.arange(bars, dtype=np.int64) * TIMEFRAME_MS[timeframe]
+
+    return np.column_stack([timestamps.astype("f8"), open_, high, low, close, volume])
+
+class StubExchange:
+    """
+    Offline stand-in for a ccxt exchange that serves synthetic candles
+
+    Only fetch_ohlcv is implemented. Each symbol gets its own deterministic
+    history of history_bars candles; fetch_ohlcv returns the last `limit` of
+    them in the ccxt list-of-lists format.
+    """
+
+    def __init__(self, history_bars=500, seed=42, timeframe="5m"):
+        self.history_bars = history_bars
+        self.seed = seed
+        self.timeframe = timeframe
+        self._candles = {}
+
+    def candles(self, symbol):
+        """Return the full synthetic history for a symbol"""
+        if symbol not in self._candles:
+            self._candles[symbol] = generate_ohlcv(self.history_bars, seed=symbol_seed(symbol, self.seed),
+                                                   timeframe=self.timeframe)
+        return self._candles[symbol]
+
+    def fetch_ohlcv(self, symbol, timeframe=None, since=None, limit=None, params=None):
+        rows = self.candles(symbol)
+        if limit is not None:
+            rows = rows[-limit:]
+        ohlcv = rows.tolist()
+        for row in ohlcv:
+            row[0] = int(row[0])
+        return ohlcv
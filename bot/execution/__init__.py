@@ -0,0 +1 @@
+from .executor import OrderExecutor, build_bracket_orders, build_exit_orders
\ No newline at end of file
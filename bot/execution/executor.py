@@ -0,0 +1,380 @@
+# executor.py
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bot.config import (
+    POSITION_SIZE, EXECUTION_DRY_RUN, EXECUTION_DRY_RUN_MARGIN, EXECUTION_BATCH_SIZE,
+    FILL_POLL_INTERVAL, FILL_TIMEOUT, ORDER_WORKERS, EXECUTION_RECONCILE_INTERVAL
+)
+from bot.monitoring.metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+ORDER_SECONDS = histogram("bot_order_batch_seconds", "Latency of batchOrders requests", labels=("phase",))
+ORDERS = counter("bot_orders_total", "Orders sent by type and outcome", labels=("type", "outcome"))
+
+BINANCE_BATCH_LIMIT = 5  # Максимум ордеров в одном запросе batchOrders
+
+SIDES = {"ПОКУПКА": ("BUY", "SELL"), "ПРОДАЖА": ("SELL", "BUY")}
+
+FINAL_STATUSES = ("FILLED", "CANCELED", "EXPIRED", "REJECTED")
+
+def build_bracket_orders(exchange, symbol, signal, free_margin, max_position_size=POSITION_SIZE):
+    """
+    Turn a generate_signal result into Binance futures order payloads
+
+    The margin used is free_margin * min(signal position_size, max_position_size),
+    multiplied by the signal leverage for the notional.
+
+    Args:
+        exchange (ccxt.Exchange): Exchange with loaded markets (for ids and precision)
+        symbol (str): Trading pair symbol
+        signal (dict): Signal with signal, price, stop_loss, take_profit, position_size, leverage
+        free_margin (float): Available USDT margin
+        max_position_size (float): Cap on the fraction of margin per trade
+
+    Returns:
+        tuple: (entry order, [stop-loss order, take-profit order]) or None if the
+        quantity is below the market minimum
+    """
+    market = exchange.market(symbol)
+    entry_side, exit_side = SIDES[signal["signal"]]
+    margin = free_margin * min(signal["position_size"], max_position_size)
+    quantity = float(exchange.amount_to_precision(symbol, margin * signal["leverage"] / signal["price"]))
+
+    min_amount = (market.get("limits", {}).get("amount", {}) or {}).get("min") or 0
+    if quantity <= 0 or quantity < min_amount:
+        logger.warning(f"Order quantity {quantity} for {symbol} is below the market minimum {min_amount}")
+        return None
+
+    quantity = exchange.amount_to_precision(symbol, quantity)
+    entry = {
+        "symbol": market["id"],
+        "side": entry_side,
+        "type": "MARKET",
+        "quantity": quantity,
+        "newOrderRespType": "RESULT"  # Цена и объем исполнения сразу в ответе, без опроса
+    }
+    return entry, build_exit_orders(exchange, symbol, exit_side, quantity, signal["stop_loss"], signal["take_profit"])
+
+def build_exit_orders(exchange, symbol, side, quantity, stop_loss, take_profit):
+    """
+    Reduce-only stop-loss and take-profit orders closing `quantity` on `side`
+
+    Returns:
+        list: [stop-loss order, take-profit order]
+    """
+    market_id = exchange.market(symbol)["id"]
+    return [
+        {
+            "symbol": market_id,
+            "side": side,
+            "type": order_type,
+            "quantity": exchange.amount_to_precision(symbol, quantity),
+            "stopPrice": exchange.price_to_precision(symbol, price),
+            "reduceOnly": "true",
+            "workingType": "MARK_PRICE"
+        }
+        for order_type, price in (("STOP_MARKET", stop_loss), ("TAKE_PROFIT_MARKET", take_profit))
+    ]
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class OrderExecutor:
+    """
+    Places entry orders with reduce-only SL/TP brackets for a cycle's signals
+
+    Orders of all symbols that fired in a cycle go out through the Binance
+    batchOrders endpoint, up to 5 orders per request: first every entry, then
+    the brackets of the entries that were filled. Entry fills come back in
+    the batch response (newOrderRespType=RESULT); orders that are not final
+    yet are polled concurrently from a small thread pool, which also sends
+    the batches of a phase in parallel. Brackets are sized from the filled
+    quantity (executedQty), so an unfilled or partly filled entry is not
+    over-protected. In dry-run mode nothing is sent and the planned orders
+    are only logged.
+
+    The executor remembers the brackets it placed per symbol. reconcile()
+    cancels the remaining leg once the other one has triggered; a new entry
+    on a symbol replaces its earlier brackets with one pair covering the
+    whole resulting position, so brackets never stack. With db_path the
+    tracked brackets are mirrored to a local SQLite file, so after a restart
+    the surviving legs are still cancelled and replaced.
+    """
+
+    def __init__(self, exchange, dry_run=EXECUTION_DRY_RUN, batch_size=EXECUTION_BATCH_SIZE,
+                 poll_interval=FILL_POLL_INTERVAL, fill_timeout=FILL_TIMEOUT, workers=ORDER_WORKERS,
+                 db_path=None, reconcile_interval=EXECUTION_RECONCILE_INTERVAL):
+        self.exchange = exchange
+        self.dry_run = dry_run
+        self.batch_size = min(batch_size, BINANCE_BATCH_LIMIT)
+        self.poll_interval = poll_interval
+        self.fill_timeout = fill_timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="orders")
+        self._leverage = {}
+        self.reconcile_interval = reconcile_interval
+        self._reconciled_at = 0.0
+        # symbol -> {"ids": [...], "position": объем со знаком, "stop_loss", "take_profit"} защитных ордеров
+        self._brackets = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS brackets ("
+                "symbol TEXT PRIMARY KEY, ids TEXT, position REAL, stop_loss REAL, take_profit REAL)"
+            )
+            self._conn.commit()
+            for symbol, ids, position, stop_loss, take_profit in self._conn.execute(
+                    "SELECT symbol, ids, position, stop_loss, take_profit FROM brackets"):
+                self._brackets[symbol] = {"ids": json.loads(ids), "position": position,
+                                          "stop_loss": stop_loss, "take_profit": take_profit}
+            logger.info(f"Loaded brackets of {len(self._brackets)} symbols from {db_path}")
+
+    def _track(self, symbol, tracked):
+        with self._lock:
+            self._brackets[symbol] = tracked
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO brackets (symbol, ids, position, stop_loss, take_profit) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (symbol, json.dumps(tracked["ids"]), tracked["position"], tracked["stop_loss"],
+                     tracked["take_profit"])
+                )
+                self._conn.commit()
+
+    def _untrack(self, symbol):
+        with self._lock:
+            self._brackets.pop(symbol, None)
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM brackets WHERE symbol = ?", (symbol,))
+                self._conn.commit()
+
+    def execute(self, signals):
+        """
+        Place orders for a list of (symbol, signal) pairs
+
+        Returns:
+            list: One dict per symbol with entry, brackets and error fields
+        """
+        if not signals:
+            return []
+
+        self.reconcile(force=True)  # Сработавшие стопы/тейки закрыли позиции - их не прибавлять к новым
+        free_margin = self._free_margin()
+        plans = []
+        for symbol, signal in signals:
+            try:
+                orders = build_bracket_orders(self.exchange, symbol, signal, free_margin)
+            except Exception as e:
+                logger.error(f"Failed to build orders for {symbol}: {str(e)}")
+                continue
+            if orders is not None:
+                plans.append({"symbol": symbol, "signal": signal, "leverage": signal["leverage"],
+                              "entry": orders[0], "brackets": orders[1]})
+                # Следующие сигналы цикла делят уже оставшуюся маржу
+                free_margin -= float(orders[0]["quantity"]) * signal["price"] / signal["leverage"]
+
+        if self.dry_run:
+            for plan in plans:
+                logger.info(f"[DRY RUN] {plan['symbol']}: {json.dumps([plan['entry']] + plan['brackets'])}")
+                plan.update(entry_result={"status": "DRY_RUN"}, bracket_results=[], error=None)
+            return plans
+
+        for plan in list(plans):
+            try:
+                self._ensure_leverage(plan["symbol"], plan["leverage"])
+            except Exception as e:
+                logger.error(f"Failed to set leverage for {plan['symbol']}, skipping: {str(e)}")
+                plans.remove(plan)
+
+        # Этап 1: все входы пакетами
+        entry_results = self._send_batches([plan["entry"] for plan in plans], phase="entry")
+        accepted = []
+        for plan, result in zip(plans, entry_results):
+            plan["entry_result"] = result
+            plan["bracket_results"] = []
+            plan["error"] = result.get("msg") if "code" in result else None
+            if plan["error"] is None:
+                accepted.append(plan)
+            else:
+                logger.error(f"Entry order for {plan['symbol']} rejected: {plan['error']}")
+
+        # Этап 2: дождаться исполнения входов
+        self._await_fills(accepted)
+
+        # Этап 3: стоп-лосс и тейк-профит на исполненный объем
+        protected = []
+        for plan in accepted:
+            plan["brackets"] = self._exit_orders(plan)
+            if plan["brackets"]:
+                protected.append(plan)
+        bracket_results = iter(self._send_batches([order for plan in protected for order in plan["brackets"]],
+                                                  phase="bracket"))
+        for plan in protected:
+            plan["bracket_results"] = [next(bracket_results) for _ in plan["brackets"]]
+            for result in plan["bracket_results"]:
+                if "code" in result:
+                    logger.error(f"Bracket order for {plan['symbol']} rejected: {result.get('msg')}")
+            ids = [result["orderId"] for result in plan["bracket_results"] if "orderId" in result]
+            if ids:
+                self._track(plan["symbol"], dict(plan.pop("position"), ids=ids))
+        return plans
+
+    def _exit_orders(self, plan):
+        """
+        Brackets for the position after this entry's fill
+
+        Earlier brackets of the symbol are cancelled first and their position
+        is added to the fill, so one pair protects the whole position. A fill
+        that only reduces an older position keeps the older levels.
+        """
+        symbol = plan["symbol"]
+        signal = plan["signal"]
+        filled = float(plan["entry_result"].get("executedQty") or 0)
+        if filled <= 0:
+            logger.warning(f"Entry for {symbol} not filled in {self.fill_timeout} s, no brackets placed")
+            return []
+        sign = 1 if signal["signal"] == "ПОКУПКА" else -1
+        levels = {"stop_loss": signal["stop_loss"], "take_profit": signal["take_profit"]}
+        position = sign * filled
+        previous = self._brackets.get(symbol)
+        if previous is not None:
+            try:
+                self._cancel(symbol, previous["ids"])
+            except Exception as e:
+                logger.error(f"Failed to cancel earlier brackets for {symbol}, keeping them: {str(e)}")
+                return []
+            self._untrack(symbol)
+            position += previous["position"]
+            if position * sign < 0:  # Вход лишь уменьшил прежнюю позицию
+                levels = {"stop_loss": previous["stop_loss"], "take_profit": previous["take_profit"]}
+        if float(self.exchange.amount_to_precision(symbol, abs(position))) <= 0:
+            return []
+        plan["position"] = dict(levels, position=position)
+        exit_side = "SELL" if position > 0 else "BUY"
+        return build_exit_orders(self.exchange, symbol, exit_side, abs(position),
+                                 levels["stop_loss"], levels["take_profit"])
+
+    def reconcile(self, force=False):
+        """
+        Cancel the remaining leg of every bracket pair whose other leg triggered
+
+        One open-orders request per call, for just that symbol when only one
+        is tracked (the all-symbols request weighs 40). Without force the
+        check runs at most once per reconcile_interval; does nothing while no
+        brackets are tracked or in dry-run mode.
+
+        Returns:
+            list: Symbols whose position was closed by a bracket
+        """
+        if self.dry_run or not self._brackets:
+            return []
+        now = time.monotonic()
+        if not force and now - self._reconciled_at < self.reconcile_interval:
+            return []
+        self._reconciled_at = now
+        params = {"symbol": self.exchange.market(next(iter(self._brackets)))["id"]} \
+            if len(self._brackets) == 1 else {}
+        try:
+            open_ids = {order["orderId"] for order in self.exchange.fapiPrivateGetOpenOrders(params)}
+        except Exception as e:
+            logger.error(f"Failed to fetch open orders: {str(e)}")
+            return []
+        closed = []
+        for symbol, tracked in list(self._brackets.items()):
+            remaining = [order_id for order_id in tracked["ids"] if order_id in open_ids]
+            if len(remaining) == len(tracked["ids"]):
+                continue
+            try:
+                if remaining:
+                    self._cancel(symbol, remaining)
+            except Exception as e:
+                logger.error(f"Failed to cancel the remaining bracket of {symbol}: {str(e)}")
+                continue
+            logger.info(f"Bracket of {symbol} triggered, the other leg is cancelled")
+            self._untrack(symbol)
+            closed.append(symbol)
+        return closed
+
+    def _cancel(self, symbol, order_ids):
+        response = self.exchange.fapiPrivateDeleteBatchOrders({
+            "symbol": self.exchange.market(symbol)["id"],
+            "orderIdList": json.dumps(order_ids)
+        })
+        for result in response:
+            # -2011: ордер уже исполнен или отменен - цель достигнута
+            if "code" in result and result["code"] != -2011:
+                raise RuntimeError(result.get("msg"))
+
+    def _free_margin(self):
+        try:
+            return float(self.exchange.fetch_balance()["USDT"]["free"])
+        except Exception as e:
+            if not self.dry_run:
+                raise
+            logger.warning(f"Balance unavailable in dry run, assuming {EXECUTION_DRY_RUN_MARGIN} USDT: {str(e)}")
+            return EXECUTION_DRY_RUN_MARGIN
+
+    def _send_batch(self, batch, phase):
+        try:
+            with ORDER_SECONDS.time(phase=phase):
+                response = self.exchange.fapiPrivatePostBatchOrders({"batchOrders": json.dumps(batch)})
+        except Exception as e:
+            logger.error(f"batchOrders request failed: {str(e)}")
+            response = [{"code": -1, "msg": str(e)} for _ in batch]
+        for order, result in zip(batch, response):
+            ORDERS.inc(type=order["type"], outcome="rejected" if "code" in result else "accepted")
+        return response
+
+    def _send_batches(self, orders, phase):
+        """Send all batches of a phase concurrently, results in order"""
+        batches = list(_chunks(orders, self.batch_size))
+        results = []
+        for response in self._pool.map(lambda batch: self._send_batch(batch, phase), batches):
+            results.extend(response)
+        return results
+
+    def _ensure_leverage(self, symbol, leverage):
+        """Set leverage once per symbol (screener symbols are not set at startup)"""
+        if self._leverage.get(symbol) == leverage:
+            return
+        self.exchange.set_leverage(leverage, symbol)
+        self._leverage[symbol] = leverage
+
+    def _await_fills(self, plans):
+        """Poll entries that were not final in the batch response, all at once"""
+        pending = [plan for plan in plans
+                   if plan["entry_result"].get("status") not in FINAL_STATUSES]
+        futures = {self._pool.submit(self._poll_order, plan): plan for plan in pending}
+        for future, plan in futures.items():
+            try:
+                plan["entry_result"] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to poll fill for {plan['symbol']}: {str(e)}")
+
+    def _poll_order(self, plan):
+        result = plan["entry_result"]
+        deadline = time.monotonic() + self.fill_timeout
+        while time.monotonic() < deadline:
+            result = self.exchange.fapiPrivateGetOrder({
+                "symbol": plan["entry"]["symbol"],
+                "orderId": result["orderId"]
+            })
+            if result.get("status") in FINAL_STATUSES:
+                break
+            time.sleep(self.poll_interval)
+        return result
+
+    def close(self):
+        """Release the worker threads and the SQLite backing, if any"""
+        self._pool.shutdown(wait=False)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
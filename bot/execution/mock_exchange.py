@@ -0,0 +1,117 @@
+# mock_exchange.py
+
+import itertools
+import json
+
+class MockFuturesExchange:
+    """
+    Local stand-in for the Binance futures endpoints used by OrderExecutor
+
+    Market orders fill immediately at the configured mark price, conditional
+    orders stay NEW until trigger(). Every batch request is recorded in
+    `batches`, so tests can check how orders were grouped. Symbols listed in
+    `reject` get an error entry in the batch response instead of an order.
+    `fill_ratio` fills only that share of a market order. Open-orders
+    requests are recorded in `open_order_requests` with their params.
+    """
+
+    def __init__(self, prices, free_margin=1000.0, amount_step=0.001, min_amount=0.001, reject=(),
+                 fill_market_orders=True, fill_ratio=1.0):
+        self.prices = dict(prices)
+        self.free_margin = free_margin
+        self.amount_step = amount_step
+        self.min_amount = min_amount
+        self.reject = set(reject)
+        self.fill_market_orders = fill_market_orders
+        self.fill_ratio = fill_ratio
+        self.cancelled = []
+        self.batches = []
+        self.orders = {}
+        self.order_polls = 0
+        self.open_order_requests = []
+        self.leverage = {}
+        self._ids = itertools.count(1)
+
+    def market(self, symbol):
+        return {
+            "id": symbol.split(":")[0].replace("/", ""),
+            "symbol": symbol,
+            "limits": {"amount": {"min": self.min_amount}}
+        }
+
+    def amount_to_precision(self, symbol, amount):
+        steps = int(float(amount) / self.amount_step)
+        return f"{steps * self.amount_step:.8f}".rstrip("0").rstrip(".")
+
+    def price_to_precision(self, symbol, price):
+        return f"{float(price):.2f}"
+
+    def set_leverage(self, leverage, symbol):
+        self.leverage[symbol] = leverage
+
+    def fetch_balance(self):
+        return {"USDT": {"free": self.free_margin}}
+
+    def _symbol_for_id(self, market_id):
+        for symbol in self.prices:
+            if self.market(symbol)["id"] == market_id:
+                return symbol
+        return market_id
+
+    def fapiPrivatePostBatchOrders(self, params):
+        batch = json.loads(params["batchOrders"])
+        if len(batch) > 5:
+            raise ValueError("Binance accepts at most 5 orders per batch")
+        self.batches.append(batch)
+
+        response = []
+        for order in batch:
+            symbol = self._symbol_for_id(order["symbol"])
+            if symbol in self.reject:
+                response.append({"code": -2019, "msg": "Margin is insufficient."})
+                continue
+            order_id = next(self._ids)
+            filled = order["type"] == "MARKET" and self.fill_market_orders
+            result = dict(order)
+            result.update({
+                "orderId": order_id,
+                "status": "FILLED" if filled else "NEW",
+                "avgPrice": str(self.prices[symbol]) if filled else "0",
+                "executedQty": self._filled(symbol, order) if filled else "0"
+            })
+            self.orders[order_id] = result
+            response.append(result)
+        return response
+
+    def fapiPrivateGetOrder(self, params):
+        self.order_polls += 1
+        order = self.orders[params["orderId"]]
+        if order["type"] == "MARKET" and order["status"] == "NEW":
+            order.update(status="FILLED", avgPrice=str(self.prices[self._symbol_for_id(order["symbol"])]),
+                         executedQty=self._filled(self._symbol_for_id(order["symbol"]), order))
+        return dict(order)
+
+    def _filled(self, symbol, order):
+        return self.amount_to_precision(symbol, float(order["quantity"]) * self.fill_ratio)
+
+    def trigger(self, order_id):
+        """Fill a conditional order as if its stop price was reached"""
+        self.orders[order_id].update(status="FILLED", executedQty=self.orders[order_id]["quantity"])
+
+    def fapiPrivateGetOpenOrders(self, params=None):
+        self.open_order_requests.append(params)
+        market_id = (params or {}).get("symbol")
+        return [dict(order) for order in self.orders.values()
+                if order["status"] == "NEW" and market_id in (None, order["symbol"])]
+
+    def fapiPrivateDeleteBatchOrders(self, params):
+        response = []
+        for order_id in json.loads(params["orderIdList"]):
+            order = self.orders.get(order_id)
+            if order is None or order["status"] != "NEW":
+                response.append({"code": -2011, "msg": "Unknown order sent."})
+                continue
+            order["status"] = "CANCELED"
+            self.cancelled.append(order_id)
+            response.append(dict(order))
+        return response
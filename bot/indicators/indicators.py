@@ -1,25 +1,52 @@
 # indicators.py
 
-from ta.momentum import RSIIndicator, StochasticOscillator, WilliamsRIndicator
-from ta.trend import MACD, EMAIndicator, ADXIndicator, IchimokuIndicator
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice, OnBalanceVolumeIndicator, ForceIndexIndicator
 import numpy as np
+from bot.config import INDICATOR_BACKEND
 
-def add_indicators(df):
+BACKENDS = ("ta", "fast")
+
+def add_indicators(df, backend=INDICATOR_BACKEND):
+    """
+    Add all indicator columns used by the strategy
+
+    backend="ta" computes everything with the ta library. backend="fast"
+    computes the recursive indicators (EMA, MACD, RSI, ATR, ADX, OBV, force
+    index) with the kernels from bot.indicators.kernels, which are compiled
+    with numba when it is installed. Both produce the same columns.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown indicator backend {backend!r}, expected one of {BACKENDS}")
+    fast = backend == "fast"
+    if fast:
+        from bot.indicators import kernels
+    
+    # ta тянет за собой много модулей, поэтому импортируется при первом вызове
+    from ta.momentum import RSIIndicator, StochasticOscillator, WilliamsRIndicator
+    from ta.trend import MACD, EMAIndicator, ADXIndicator, IchimokuIndicator
+    from ta.volatility import BollingerBands, AverageTrueRange
+    from ta.volume import VolumeWeightedAveragePrice, OnBalanceVolumeIndicator, ForceIndexIndicator
+    
     # Short-term Trend Indicators
-    macd = MACD(close=df["close"], window_slow=26, window_fast=12, window_sign=9)
-    df["macd"] = macd.macd()
-    df["macd_signal"] = macd.macd_signal()
-    df["macd_histogram"] = macd.macd_diff()
+    if fast:
+        df["macd"], df["macd_signal"], df["macd_histogram"] = kernels.macd(df["close"].to_numpy(), 12, 26, 9)
+    else:
+        macd = MACD(close=df["close"], window_slow=26, window_fast=12, window_sign=9)
+        df["macd"] = macd.macd()
+        df["macd_signal"] = macd.macd_signal()
+        df["macd_histogram"] = macd.macd_diff()
     
     # Fast Moving Averages for short-term trading
-    df["ema8"] = EMAIndicator(close=df["close"], window=8).ema_indicator()
-    df["ema13"] = EMAIndicator(close=df["close"], window=13).ema_indicator()
-    df["ema21"] = EMAIndicator(close=df["close"], window=21).ema_indicator()
+    for window in (8, 13, 21):
+        if fast:
+            df[f"ema{window}"] = kernels.ema(df["close"].to_numpy(), window)
+        else:
+            df[f"ema{window}"] = EMAIndicator(close=df["close"], window=window).ema_indicator()
     
     # Momentum Indicators
-    df["rsi"] = RSIIndicator(close=df["close"], window=14).rsi()
+    if fast:
+        df["rsi"] = kernels.rsi(df["close"].to_numpy(), 14)
+    else:
+        df["rsi"] = RSIIndicator(close=df["close"], window=14).rsi()
     
     # Fast Stochastic for short-term
     stoch = StochasticOscillator(high=df["high"], low=df["low"], close=df["close"], window=14, smooth_window=3)
@@ -37,7 +64,10 @@ def add_indicators(df):
     df["bb_width"] = (df["bb_upper"] - df["bb_lower"]) / df["bb_middle"]
     
     # ATR for volatility and stop loss calculation
-    df["atr"] = AverageTrueRange(high=df["high"], low=df["low"], close=df["close"]).average_true_range()
+    if fast:
+        df["atr"] = kernels.atr(df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy(), 14)
+    else:
+        df["atr"] = AverageTrueRange(high=df["high"], low=df["low"], close=df["close"]).average_true_range()
     
     # Volume Indicators
     df["vwap"] = VolumeWeightedAveragePrice(
@@ -47,16 +77,24 @@ def add_indicators(df):
         volume=df["volume"]
     ).volume_weighted_average_price()
     
-    df["obv"] = OnBalanceVolumeIndicator(close=df["close"], volume=df["volume"]).on_balance_volume()
-    
-    # Force Index for volume-price relationship
-    df["force_index"] = ForceIndexIndicator(close=df["close"], volume=df["volume"]).force_index()
+    if fast:
+        df["obv"] = kernels.obv(df["close"].to_numpy(), df["volume"].to_numpy())
+        df["force_index"] = kernels.force_index(df["close"].to_numpy(), df["volume"].to_numpy(), 13)
+    else:
+        df["obv"] = OnBalanceVolumeIndicator(close=df["close"], volume=df["volume"]).on_balance_volume()
+        
+        # Force Index for volume-price relationship
+        df["force_index"] = ForceIndexIndicator(close=df["close"], volume=df["volume"]).force_index()
     
     # Trend Strength
-    adx = ADXIndicator(high=df["high"], low=df["low"], close=df["close"])
-    df["adx"] = adx.adx()
-    df["adx_pos"] = adx.adx_pos()
-    df["adx_neg"] = adx.adx_neg()
+    if fast:
+        df["adx"], df["adx_pos"], df["adx_neg"] = kernels.adx(
+            df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy(), 14)
+    else:
+        adx = ADXIndicator(high=df["high"], low=df["low"], close=df["close"])
+        df["adx"] = adx.adx()
+        df["adx_pos"] = adx.adx_pos()
+        df["adx_neg"] = adx.adx_neg()
     
     # Ichimoku Cloud for trend direction
     ichimoku = IchimokuIndicator(high=df["high"], low=df["low"])
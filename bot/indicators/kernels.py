@@ -0,0 +1,166 @@
+# kernels.py
+
+"""
+Array kernels for the recursive indicators (EMA, MACD, Wilder RSI, ATR, ADX, OBV)
+
+Every recursion here has the form y[i] = a * y[i-1] + x[i]. With numba
+installed it runs as a compiled loop; otherwise a NumPy version evaluates
+it in closed form block by block, so no Python loop runs per bar. The
+kernels reproduce the `ta` 0.10 formulas, including its warm-up values
+(e.g. leading zeros in ATR and ADX), so both backends give the same columns.
+"""
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba - необязательная зависимость
+    numba = None
+
+JIT_AVAILABLE = numba is not None
+
+# Максимальный рост a**-k внутри блока: дальше теряется точность cumsum
+_BLOCK_GROWTH = 1e12
+
+def _recurse_loop(x, a, y0):
+    y = np.empty_like(x)
+    prev = y0
+    for i in range(len(x)):
+        prev = a * prev + x[i]
+        y[i] = prev
+    return y
+
+def _recurse_numpy(x, a, y0):
+    n = len(x)
+    y = np.empty(n)
+    if a == 0:
+        y[:] = x
+        return y
+    block = n if a == 1 else max(1, int(np.log(_BLOCK_GROWTH) / -np.log(a)))
+    steps = np.arange(min(block, n))
+    powers = a ** steps  # a**j
+    inverse = a ** -steps  # a**-j
+    prev = y0
+    for start in range(0, n, block):
+        chunk = x[start:start + block]
+        size = len(chunk)
+        # y[j] = a**(j+1) * y0 + a**j * sum(x[k] * a**-k, k <= j)
+        y[start:start + size] = powers[:size] * (a * prev + np.cumsum(chunk * inverse[:size]))
+        prev = y[start + size - 1]
+    return y
+
+recurse = numba.njit(cache=True)(_recurse_loop) if JIT_AVAILABLE else _recurse_numpy
+
+def _shift(values):
+    shifted = np.empty_like(values)
+    shifted[0] = np.nan
+    shifted[1:] = values[:-1]
+    return shifted
+
+def ema(values, span=None, alpha=None, min_periods=None):
+    """
+    pandas ewm(adjust=False).mean() with ta's min_periods
+
+    Leading NaNs are skipped, the recursion starts at the first valid value.
+    """
+    values = np.asarray(values, dtype=float)
+    if alpha is None:
+        alpha = 2.0 / (span + 1)
+    if min_periods is None:
+        min_periods = span
+    out = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0:
+        return out
+    start = valid[0]
+    out[start] = values[start]
+    out[start + 1:] = recurse(alpha * values[start + 1:], 1.0 - alpha, values[start])
+    out[start:start + min_periods - 1] = np.nan
+    return out
+
+def macd(close, window_fast=12, window_slow=26, window_sign=9):
+    """MACD line, signal line and histogram"""
+    line = ema(close, window_fast) - ema(close, window_slow)
+    signal = ema(line, window_sign)
+    return line, signal, line - signal
+
+def rsi(close, window=14):
+    """Wilder RSI (ewm with alpha=1/window)"""
+    close = np.asarray(close, dtype=float)
+    diff = close - _shift(close)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    ema_up = ema(up, alpha=1.0 / window, min_periods=window)
+    ema_down = ema(down, alpha=1.0 / window, min_periods=window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ema_down == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_down))
+
+def atr(high, low, close, window=14):
+    """Average true range with Wilder smoothing, zeros during warm-up as in ta"""
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    prev_close = _shift(close)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    out = np.zeros(len(close))
+    if len(close) < window:
+        return out
+    out[window - 1] = true_range[:window].mean()
+    out[window:] = recurse(true_range[window:] / window, (window - 1) / window, out[window - 1])
+    return out
+
+def _wilder_sum(values, window, size):
+    # ta: s[0] = сумма первых window значений, s[i] = s[i-1] - s[i-1]/window + values[window+i]
+    sums = np.zeros(size)
+    sums[0] = values[1:window + 1].sum()
+    sums[1:size - 1] = recurse(values[window + 1:window + size - 1], 1.0 - 1.0 / window, sums[0])
+    return sums
+
+def adx(high, low, close, window=14):
+    """
+    ADX, +DI and -DI exactly as ta.trend.ADXIndicator computes them
+
+    Returns:
+        tuple: (adx, adx_pos, adx_neg) arrays of len(close)
+    """
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    n = len(close)
+    size = n - (window - 1)
+    prev_close = _shift(close)
+    movement = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+
+    diff_up = high - _shift(high)
+    diff_down = _shift(low) - low
+    pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+    neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+
+    trs = _wilder_sum(movement, window, size)
+    dip = _wilder_sum(pos, window, size)
+    din = _wilder_sum(neg, window, size)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        di_pos = 100 * dip / trs
+        di_neg = 100 * din / trs
+        directional_index = 100 * np.abs((di_pos - di_neg) / (di_pos + di_neg))
+
+    smoothed = np.zeros(size)
+    smoothed[window] = directional_index[:window].mean()
+    smoothed[window + 1:] = recurse(directional_index[window:size - 1] / window,
+                                    (window - 1) / window, smoothed[window])
+    adx_line = np.concatenate((np.zeros(window - 1), smoothed))
+
+    # +DI/-DI в ta сдвинуты на одну свечу относительно ADX
+    adx_pos = np.zeros(n)
+    adx_neg = np.zeros(n)
+    adx_pos[window + 1:window + size - 1] = di_pos[1:size - 1]
+    adx_neg[window + 1:window + size - 1] = di_neg[1:size - 1]
+    return adx_line, adx_pos, adx_neg
+
+def obv(close, volume):
+    """On-balance volume"""
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    return np.cumsum(np.where(close < _shift(close), -volume, volume))
+
+def force_index(close, volume, window=13):
+    """EMA of price change times volume"""
+    close = np.asarray(close, dtype=float)
+    return ema((close - _shift(close)) * np.asarray(volume, dtype=float), window)
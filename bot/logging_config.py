@@ -0,0 +1,174 @@
+# logging_config.py
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from bot.config import (
+    LOG_LEVEL, LOG_DIR, LOG_FILE_PATTERN, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_JSON
+)
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Контекст цикла и символа, который добавляется к каждой записи
+_cycle = contextvars.ContextVar("log_cycle", default=None)
+_symbol = contextvars.ContextVar("log_symbol", default=None)
+
+_listener = None
+_setup_lock = threading.Lock()
+
+@contextmanager
+def log_context(cycle=None, symbol=None):
+    """Attach cycle and/or symbol to every record logged inside the block"""
+    tokens = []
+    if cycle is not None:
+        tokens.append((_cycle, _cycle.set(cycle)))
+    if symbol is not None:
+        tokens.append((_symbol, _symbol.set(symbol)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+class _ContextFilter(logging.Filter):
+    def filter(self, record):
+        # Записи из процессов-шардов приходят уже со своим контекстом
+        if not hasattr(record, "cycle"):
+            record.cycle = _cycle.get()
+            record.symbol = _symbol.get()
+        return True
+
+class _ThreadQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for an in-process listener
+
+    The stock prepare() formats the message in the calling thread so that the
+    record can be pickled. The listener lives in the same process, so the
+    record is passed as is and %-formatting happens in the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the cycle/symbol context"""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        cycle = getattr(record, "cycle", None)
+        symbol = getattr(record, "symbol", None)
+        if cycle is not None:
+            payload["cycle"] = cycle
+        if symbol is not None:
+            payload["symbol"] = symbol
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+class DatedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Writes to a file named after the current date, e.g. futures_analysis_20250529.log
+
+    A new file is opened when the date changes (time rotation). With
+    max_bytes > 0 the current file is also rotated by size.
+    """
+
+    def __init__(self, directory, pattern, max_bytes=0, backup_count=0):
+        self.directory = directory
+        self.pattern = pattern
+        self._date = datetime.now().strftime("%Y%m%d")
+        super().__init__(self._path(), maxBytes=max_bytes, backupCount=backup_count,
+                         encoding="utf-8", delay=True)
+
+    def _path(self):
+        return os.path.join(self.directory, self.pattern.format(date=self._date))
+
+    def emit(self, record):
+        today = datetime.now().strftime("%Y%m%d")
+        if today != self._date:
+            self._date = today
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            self.baseFilename = os.path.abspath(self._path())
+        super().emit(record)
+
+def setup_logging(level=LOG_LEVEL, json_logs=LOG_JSON, log_dir=LOG_DIR, console=True):
+    """
+    Configure the root logger once for the whole process
+
+    Loggers only enqueue records; console and file I/O happen in a
+    QueueListener thread, so disk writes stay off the analysis path.
+    Repeated calls are no-ops.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        formatter = JsonFormatter() if json_logs else logging.Formatter(LOG_FORMAT)
+        handlers = []
+        if console:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(formatter)
+            handlers.append(stream_handler)
+        if log_dir is not None:
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            file_handler = DatedRotatingFileHandler(log_dir, LOG_FILE_PATTERN, LOG_MAX_BYTES, LOG_BACKUP_COUNT)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _ThreadQueueHandler(log_queue)
+        queue_handler.addFilter(_ContextFilter())
+
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def setup_worker_logging(log_queue, level=LOG_LEVEL):
+    """
+    Send every record of a worker process to the parent through log_queue
+
+    Only the parent writes the console and the log file, so several
+    processes never rotate the same file. The parent re-emits the records
+    with forward_worker_logs().
+    """
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(_ContextFilter())
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+def forward_worker_logs(log_queue):
+    """Re-emit records from worker processes in this process until None arrives"""
+    while True:
+        record = log_queue.get()
+        if record is None:
+            break
+        logging.getLogger(record.name).handle(record)
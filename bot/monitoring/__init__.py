@@ -0,0 +1 @@
+from .metrics import counter, gauge, histogram, render_metrics, start_metrics_server
\ No newline at end of file
@@ -0,0 +1,200 @@
+# memory.py
+
+import glob
+import logging
+import os
+import sys
+import tracemalloc
+from collections import OrderedDict
+from bot.config import (
+    MEMORY_CHECK_EVERY, MEMORY_GROWTH_ALERT_MB, MEMORY_TOP_ALLOCATORS, MEMORY_TRACEMALLOC,
+    MEMORY_TRACE_FRAMES, MEMORY_MAX_CHARTS, CHART_EXTENSIONS
+)
+from bot.monitoring.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+# Графики любого формата CHART_FORMAT: png, jpg, webp
+_CHART_PATTERNS = tuple(sorted({f"*.{extension}" for extension in CHART_EXTENSIONS.values()}))
+
+RSS_BYTES = gauge("bot_memory_rss_bytes", "Resident set size of the bot process")
+TRACED_BYTES = gauge("bot_memory_traced_bytes", "Memory allocated by Python while tracemalloc traces")
+TOP_ALLOCATOR_BYTES = gauge("bot_memory_top_allocator_bytes",
+                            "Largest allocation sites at the last traced check", labels=("rank", "location"))
+MEMORY_GROWTH = counter("bot_memory_growth_alerts_total", "Checks where RSS grew past the alert threshold")
+CACHE_EVICTIONS = counter("bot_cache_evictions_total", "Entries evicted from bounded caches", labels=("cache",))
+
+_MB = 1024 * 1024
+
+def rss_bytes():
+    """Current resident set size of the process in bytes (0 if unknown)"""
+    try:
+        import psutil  # Необязательная зависимость
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows без psutil
+        return 0
+    # Пиковое значение, а не текущее: ru_maxrss в КБ на Linux и в байтах на macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def prune_directory(directory, max_files, pattern="*"):
+    """
+    Delete the oldest files of a directory beyond max_files
+
+    Args:
+        directory (str): Directory to prune
+        max_files (int): Files to keep, counted over all patterns together
+        pattern (str or tuple): Glob pattern(s) of the files to consider
+
+    Returns:
+        int: Number of files removed
+    """
+    patterns = (pattern,) if isinstance(pattern, str) else pattern
+    paths = {path for item in patterns for path in glob.glob(os.path.join(directory, item))}
+    files = sorted(paths, key=os.path.getmtime)
+    removed = 0
+    for path in files[:max(0, len(files) - max_files)]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Failed to remove {path}: {e}")
+    return removed
+
+class BoundedCache(OrderedDict):
+    """
+    Dict that keeps at most `maxsize` most recently written keys
+
+    Writing a key moves it to the end; past maxsize the least recently
+    written key is evicted and counted in bot_cache_evictions_total{cache=name}.
+    Reads do not change the order, so iteration stays cheap and thread-safe
+    enough for the single-writer caches it backs.
+    """
+
+    def __init__(self, maxsize, name="cache"):
+        super().__init__()
+        self.maxsize = maxsize
+        self.name = name
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self.move_to_end(key)
+        super().__setitem__(key, value)
+        if self.maxsize and len(self) > self.maxsize:
+            self.popitem(last=False)
+            CACHE_EVICTIONS.inc(cache=self.name)
+
+def _location(stat):
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+class MemoryGuard:
+    """
+    Periodic memory check of the long-running loop
+
+    Every `every` cycles the RSS is exported and the chart directory pruned.
+    When RSS has grown by more than `growth_mb` since the last baseline, a
+    warning is logged and tracemalloc is started; the next check logs the
+    allocation sites that grew in between (snapshot diff by line) and stops
+    tracing again. Tracing every allocation slows the indicator code several
+    times over, so by default it only runs for the one window after a jump;
+    with `tracemalloc_always` it runs all the time and the top allocators are
+    exported at every check.
+    """
+
+    def __init__(self, every=MEMORY_CHECK_EVERY, growth_mb=MEMORY_GROWTH_ALERT_MB, top=MEMORY_TOP_ALLOCATORS,
+                 tracemalloc_always=MEMORY_TRACEMALLOC, frames=MEMORY_TRACE_FRAMES, charts_dir="charts",
+                 max_charts=MEMORY_MAX_CHARTS, rss=rss_bytes):
+        self.every = max(1, every)
+        self.growth_bytes = growth_mb * _MB
+        self.top = top
+        self.tracemalloc_always = tracemalloc_always
+        self.frames = frames
+        self.charts_dir = charts_dir
+        self.max_charts = max_charts
+        self.rss = rss
+        self._baseline_rss = None
+        self._baseline_snapshot = None
+        self._armed = False  # tracemalloc запущен после скачка памяти до следующей проверки
+        if tracemalloc_always:
+            self._start_tracing()
+
+    def _start_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._baseline_snapshot = self._snapshot()
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ))
+
+    def _export_top(self, snapshot):
+        TRACED_BYTES.set(tracemalloc.get_traced_memory()[0])
+        TOP_ALLOCATOR_BYTES.clear()  # Места аллокаций меняются, старые метки не копятся
+        for rank, stat in enumerate(snapshot.statistics("lineno")[:self.top], 1):
+            TOP_ALLOCATOR_BYTES.set(stat.size, rank=rank, location=_location(stat))
+
+    def _log_diff(self, snapshot):
+        if snapshot is None:
+            return
+        lines = [f"{stat.size_diff / _MB:+.1f} MB ({stat.count_diff:+d} blocks) {_location(stat)}"
+                 for stat in snapshot.compare_to(self._baseline_snapshot, "lineno")[:self.top]
+                 if stat.size_diff > 0]
+        if lines:
+            logger.warning("Allocation growth since the memory baseline:\n" + "\n".join(lines))
+
+    def check(self, cycle):
+        """
+        Run the check if `cycle` is a multiple of `every`
+
+        Returns:
+            int or None: RSS in bytes, or None when no check was due
+        """
+        if cycle % self.every:
+            return None
+        rss = self.rss()
+        RSS_BYTES.set(rss)
+        if self.charts_dir and self.max_charts and os.path.isdir(self.charts_dir):
+            prune_directory(self.charts_dir, self.max_charts, _CHART_PATTERNS)
+
+        snapshot = self._snapshot() if tracemalloc.is_tracing() and self._baseline_snapshot is not None else None
+        if snapshot is not None:
+            self._export_top(snapshot)
+        if self._armed:
+            # Окно после скачка закончилось: показываем, что выросло, и выключаем трассировку
+            self._log_diff(snapshot)
+            self._armed = False
+            self._baseline_snapshot = None
+            tracemalloc.stop()
+            TRACED_BYTES.set(0)
+            self._baseline_rss = rss
+            return rss
+
+        if self._baseline_rss is None:
+            self._baseline_rss = rss
+        elif rss - self._baseline_rss > self.growth_bytes:
+            MEMORY_GROWTH.inc()
+            logger.warning(f"RSS grew from {self._baseline_rss / _MB:.0f} MB to {rss / _MB:.0f} MB "
+                           f"(alert threshold {self.growth_bytes / _MB:.0f} MB)")
+            if self.tracemalloc_always:
+                self._log_diff(snapshot)
+                self._baseline_snapshot = snapshot
+            else:
+                logger.warning(f"Tracing allocations until cycle {cycle + self.every} to find the growth")
+                self._start_tracing()
+                self._armed = True
+            self._baseline_rss = rss
+        return rss
@@ -0,0 +1,163 @@
+# profiling.py
+
+import glob
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from bot.config import (
+    PROFILE_SLOW_CYCLE_SECONDS, PROFILE_SAMPLE_INTERVAL, PROFILE_DIR, PROFILE_MAX_DUMPS
+)
+from bot.monitoring.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+SLOW_CYCLES = counter("bot_slow_cycles_total", "Cycles slower than the profiling threshold")
+
+_labels = {}
+
+def _short_path(filename):
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    try:
+        relative = os.path.relpath(filename)
+    except ValueError:  # Другой диск в Windows
+        return os.path.basename(filename)
+    return os.path.basename(filename) if relative.startswith("..") else relative
+
+def _label(code):
+    label = _labels.get(code)
+    if label is None:
+        label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+def collapse_stack(frame):
+    """Frame chain as one collapsed-stack line, root first, frames separated by ';'"""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+class CycleProfiler:
+    """
+    Low-rate stack sampler for the analysis loop
+
+    While a cycle runs, a background thread takes the stack of the loop
+    thread every `interval` seconds (50 Hz by default, a few percent of one
+    core at most). Samples are aggregated in memory; only when the cycle
+    took longer than `threshold` are they written as a collapsed-stack file
+    (<name>_<time>_c<cycle>_<seconds>s.folded), which flamegraph.pl and
+    speedscope open directly. The oldest dumps are removed beyond max_dumps.
+    """
+
+    def __init__(self, threshold=PROFILE_SLOW_CYCLE_SECONDS, interval=PROFILE_SAMPLE_INTERVAL,
+                 directory=PROFILE_DIR, max_dumps=PROFILE_MAX_DUMPS, name="cycle"):
+        self.threshold = threshold
+        self.interval = interval
+        self.directory = directory
+        self.max_dumps = max_dumps
+        self.name = name
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._target = None
+        self._stacks = Counter()
+        self._thread = None
+
+    def _sample_loop(self):
+        while True:
+            self._active.wait()
+            with self._lock:
+                target = self._target
+                frame = sys._current_frames().get(target) if target is not None else None
+                if frame is not None:
+                    self._stacks[collapse_stack(frame)] += 1
+            del frame
+            time.sleep(self.interval)
+
+    @contextmanager
+    def profile_cycle(self, cycle=None):
+        """Sample the calling thread for the duration of the block"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample_loop, name="cycle-profiler", daemon=True)
+            self._thread.start()
+        with self._lock:
+            self._target = threading.get_ident()
+            self._stacks = Counter()
+        self._active.set()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._active.clear()
+            with self._lock:
+                self._target = None
+                stacks = self._stacks
+            if elapsed > self.threshold:
+                SLOW_CYCLES.inc()
+                path = self.dump(stacks, cycle, elapsed)
+                logger.warning("Cycle %s took %.2f s (threshold %.2f s), profile saved to %s",
+                               cycle, elapsed, self.threshold, path)
+
+    def dump(self, stacks, cycle, elapsed):
+        """Write collapsed stacks and prune old dumps; returns the file path"""
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{self.name}_{stamp}_c{cycle}_{elapsed:.1f}s.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        dumps = sorted(glob.glob(os.path.join(self.directory, "*.folded")), key=os.path.getmtime)
+        for old in dumps[:max(0, len(dumps) - self.max_dumps)]:
+            os.remove(old)
+        return path
+
+def summarize_profiles(paths, top=20, sort="self"):
+    """
+    Aggregate collapsed-stack dumps into the hottest functions
+
+    Args:
+        paths (list): .folded files
+        top (int): Number of rows to return
+        sort (str): "self" (samples where the function was on top of the
+            stack) or "total" (samples where it was anywhere on the stack)
+
+    Returns:
+        tuple: (total samples, [(function, self samples, total samples), ...])
+    """
+    own = Counter()
+    inclusive = Counter()
+    samples = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if not stack:
+                    continue
+                count = int(count)
+                frames = stack.split(";")
+                samples += count
+                own[frames[-1]] += count
+                for frame in set(frames):
+                    inclusive[frame] += count
+    key = own if sort == "self" else inclusive
+    rows = [(function, own[function], inclusive[function])
+            for function, _ in key.most_common(top)]
+    return samples, rows
+
+def format_summary(samples, rows, dumps):
+    """Render summarize_profiles() output as a text table"""
+    if not samples:
+        return f"{dumps} dumps, no samples"
+    lines = [f"{dumps} dumps, {samples} samples", f"{'self %':>7} {'total %':>8}  function"]
+    for function, own, inclusive in rows:
+        lines.append(f"{own / samples * 100:>6.1f}% {inclusive / samples * 100:>7.1f}%  {function}")
+    return "\n".join(lines)
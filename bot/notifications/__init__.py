@@ -1 +1,6 @@
-from .notifier import send_telegram_message 
\ No newline at end of file
+def __getattr__(name):
+    # notifier тянет requests; шаблонам сообщений (импорт из strategy) он не нужен
+    if name == "send_telegram_message":
+        from .notifier import send_telegram_message
+        return send_telegram_message
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,179 @@
+# digest.py
+
+"""
+Per-cycle digest: one Telegram message with every signal of the cycle
+
+Instead of one message and one chart per signal, the cycle's signals are
+listed grouped by direction with their levels, followed by a compact
+summary of the market the bot analyzed (share of symbols above EMA21,
+median RSI and change, top gainer and loser). Only the chart of the signal
+with the strongest trend is attached; if it cannot be rendered or sent, the
+digest goes out as text. Enable with NOTIFY_DIGEST=true.
+
+The market summary covers every symbol analyzed in the last
+NOTIFY_DIGEST_MARKET_AGE seconds, not only those of the current cycle:
+with the adaptive poller a tick analyzes just the few symbols that are due.
+"""
+
+import logging
+import math
+import time
+import numpy as np
+from bot.config import (
+    NOTIFY_DIGEST_CHART, NOTIFY_DIGEST_CHANGE_BARS, NOTIFY_DIGEST_MARKET_AGE, TELEGRAM_MESSAGE_LIMIT,
+    MEMORY_MAX_CACHED_SYMBOLS
+)
+from bot.monitoring.memory import BoundedCache
+from bot.monitoring.metrics import counter
+from bot.notifications.templates import (
+    CLUSTER_MEMBER, DIGEST_CHART, DIGEST_DIRECTION, DIGEST_HEADER, DIGEST_LINE, DIGEST_MARKET, split_message
+)
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SIGNALS = counter("bot_digest_signals_total", "Signals sent as lines of the per-cycle digest")
+
+def _trend_strength(signal):
+    return ((signal.get("analysis") or {}).get("trend") or {}).get("trend_strength") or 0.0
+
+class CycleDigest:
+    """
+    Collects the signals of one cycle and sends them as one message
+
+    Used like SignalClusterer: analyze_symbol hands each signal to collect()
+    instead of sending it, observe() sees the candles of every analyzed
+    symbol for the market summary, flush() at the end of the cycle sends.
+    Only the leader's candles are kept, so the pending state stays small.
+
+    Args:
+        chart (bool): Attach the leader's chart to the digest
+        change_bars (int): Bars over which the market summary measures change
+        market_age (float): Seconds a symbol's last state stays in the market summary
+        limit (int): Telegram message length; longer digests are split
+        publish (callable, optional): publish(symbol, signal, bar_time, message, df, deliver)
+            for the part with the chart (publish_signal by default)
+        send (callable, optional): send(text) for the other parts (send_telegram_message by default)
+        clock (callable): Current unix time
+    """
+
+    def __init__(self, chart=NOTIFY_DIGEST_CHART, change_bars=NOTIFY_DIGEST_CHANGE_BARS,
+                 market_age=NOTIFY_DIGEST_MARKET_AGE, limit=TELEGRAM_MESSAGE_LIMIT, publish=None, send=None,
+                 clock=time.time):
+        self.chart = chart
+        self.change_bars = change_bars
+        self.market_age = market_age
+        self.limit = limit
+        self._publish = publish
+        self._send = send
+        self.clock = clock
+        # symbol -> (время наблюдения, close > ema21, rsi, изменение); переживает flush
+        self._market = BoundedCache(MEMORY_MAX_CACHED_SYMBOLS, "digest_market")
+        self._signals = []  # (symbol, signal)
+        self._confirms = []  # Подтверждения доставки сигналов цикла
+        self._leader = None  # (symbol, signal, bar_time, df)
+
+    def observe(self, symbol, df):
+        last = df.iloc[-1]
+        close = df["close"].to_numpy()
+        start = close[-self.change_bars - 1] if len(close) > self.change_bars else close[0]
+        self._market[symbol] = (self.clock(), bool(last["close"] > last["ema21"]), float(last["rsi"]),
+                                 close[-1] / start - 1)
+
+    def collect(self, symbol, signal, bar_time, message, df, deliver=None, confirm=None):
+        self._signals.append((symbol, signal))
+        if confirm is not None:
+            self._confirms.append(confirm)
+        if self._leader is None or _trend_strength(signal) > _trend_strength(self._leader[1]):
+            self._leader = (symbol, signal, bar_time, df)
+
+    def market_summary(self):
+        """Context of DIGEST_MARKET, None while no symbol was observed within market_age"""
+        now = self.clock()
+        recent = [(symbol, value) for symbol, value in self._market.items()
+                  if now - value[0] <= self.market_age and not np.isnan(value[2])]
+        if not recent:
+            return None
+        symbols = [symbol for symbol, _ in recent]
+        observed, above, rsi, change = (np.array(column, dtype=float) for column in zip(*(value for _, value in recent)))
+        top, bottom = int(np.argmax(change)), int(np.argmin(change))
+        return {
+            "symbols": len(recent),
+            "minutes": max(1, math.ceil((now - observed.min()) / 60)),
+            "above_ema": above.mean(),
+            "rsi_median": float(np.median(rsi)),
+            "change_median": float(np.median(change)),
+            "top_gainer": symbols[top],
+            "top_gain": float(change[top]),
+            "top_loser": symbols[bottom],
+            "top_loss": float(change[bottom])
+        }
+
+    def render(self):
+        """Digest text of the signals collected so far"""
+        blocks = [DIGEST_HEADER.render({"count": len(self._signals)})]
+        for direction in dict.fromkeys(signal["signal"] for _, signal in self._signals):
+            lines = [DIGEST_DIRECTION.render({"direction": direction})]
+            for symbol, signal in self._signals:
+                if signal["signal"] == direction:
+                    context = {"symbol": symbol, "signal": signal, "analysis": signal.get("analysis")}
+                    # Без анализа строка теряет ADX/RSI, но уровни остаются
+                    lines.append(DIGEST_LINE.render(context) or CLUSTER_MEMBER.render(context))
+            blocks.append("\n".join(lines))
+        market = self.market_summary()
+        if market is not None:
+            blocks.append(DIGEST_MARKET.render(market))
+        if self.chart and self._leader is not None:
+            blocks.append(DIGEST_CHART.render({"symbol": self._leader[0]}))
+        return "\n\n".join(blocks)
+
+    def flush(self, deliver=None):
+        """
+        Send the digest of this cycle and start the next one
+
+        Returns:
+            list: (symbol, signal) of the signals in the digest (empty if it was not delivered)
+        """
+        symbols = [symbol for symbol, _ in self._signals]
+        confirms = self._confirms
+        try:
+            if symbols:
+                parts = split_message(self.render(), self.limit)
+                delivered = [self._send_text(part) for part in parts[:-1]]
+                if self.chart:
+                    symbol, signal, bar_time, df = self._leader
+                    try:
+                        sent = self._publish_chart(symbol, signal, bar_time, parts[-1], df, deliver)
+                    except Exception as e:
+                        logger.error(f"График сводки не отправлен, сводка уходит текстом: {str(e)}")
+                        text = parts[-1]
+                        chart_line = DIGEST_CHART.render({"symbol": symbol})
+                        if text.endswith(chart_line):
+                            text = text[:-len(chart_line)].rstrip("\n")
+                        sent = self._send_text(text)
+                    delivered.append(sent)
+                else:
+                    delivered.append(self._send_text(parts[-1]))
+                if any(result is False for result in delivered):
+                    logger.error(f"Сводка цикла доставлена не полностью, {len(symbols)} сигналов будут повторены")
+                    return []
+                for confirm in confirms:
+                    confirm()
+                DIGEST_SIGNALS.inc(len(symbols))
+                logger.info(f"Сводка цикла: {len(symbols)} сигналов в {len(parts)} сообщениях")
+            return list(self._signals)
+        finally:
+            self._signals = []
+            self._confirms = []
+            self._leader = None
+
+    def _send_text(self, text):
+        if self._send is not None:
+            return self._send(text)
+        from bot.notifications.notifier import send_telegram_message
+        return send_telegram_message(text)
+
+    def _publish_chart(self, symbol, signal, bar_time, message, df, deliver):
+        if self._publish is not None:
+            return self._publish(symbol, signal, bar_time, message, df, deliver)
+        from bot.core.strategy import publish_signal
+        return publish_signal(symbol, signal, bar_time, message, df, deliver)
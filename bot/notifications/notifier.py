@@ -3,21 +3,33 @@
 import requests
 import logging
 import time
-from bot.config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID
+from bot.config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_API_URL
 from datetime import datetime
+from bot.monitoring.metrics import counter, histogram
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+TELEGRAM_SECONDS = histogram("bot_telegram_request_seconds", "Telegram API request latency", labels=("method",))
+TELEGRAM_ERRORS = counter("bot_telegram_errors_total", "Failed Telegram API requests", labels=("method",))
+
+_api_url = TELEGRAM_API_URL
+_verified_url = None  # API, для которого getMe уже прошел успешно
+_session = requests.Session()  # Одно keep-alive соединение вместо нового TLS на каждый запрос
+
+def set_api_url(url):
+    """Send Bot API requests to another server (e.g. the replay Telegram stub)"""
+    global _api_url, _verified_url
+    _api_url = url.rstrip("/")
+    _verified_url = None
+
+def _method_url(method):
+    return f"{_api_url}/bot{TELEGRAM_TOKEN}/{method}"
+
 def verify_telegram_credentials():
     """Проверка валидности токена и chat_id"""
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/getMe"
+    url = _method_url("getMe")
     try:
-        response = requests.get(url)
+        response = _session.get(url)
         if response.status_code == 200:
             bot_info = response.json()
             if bot_info.get("ok"):
@@ -33,6 +45,19 @@ def verify_telegram_credentials():
         logger.error(f"Ошибка при проверке токена Telegram: {str(e)}")
         return False
 
+def _credentials_ok():
+    """verify_telegram_credentials once per API url instead of before every send"""
+    global _verified_url
+    if _verified_url != _api_url:
+        if not verify_telegram_credentials():
+            return False
+        _verified_url = _api_url
+    return True
+
+def _parse_error(response):
+    """Telegram rejected the Markdown of the text (400 "can't parse entities")"""
+    return response.status_code == 400 and "can't parse entities" in response.text
+
 def send_telegram_message(message, image_path=None):
     """
     Отправка сообщения в Telegram
@@ -40,12 +65,16 @@ def send_telegram_message(message, image_path=None):
     Args:
         message (str): Текст сообщения
         image_path (str, optional): Путь к изображению для отправки
+
+    Returns:
+        bool: True, если сообщение доставлено
     """
-    if not verify_telegram_credentials():
+    global _verified_url
+    if not _credentials_ok():
         logger.error("Не удалось отправить сообщение: неверные учетные данные Telegram.")
-        return
+        return False
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
+    url = _method_url("sendMessage")
     data = {
         "chat_id": TELEGRAM_CHAT_ID,
         "text": message,
@@ -57,22 +86,34 @@ def send_telegram_message(message, image_path=None):
     
     for attempt in range(max_retries):
         try:
-            response = requests.post(url, data=data)
+            with TELEGRAM_SECONDS.time(method="sendMessage"):
+                response = _session.post(url, data=data)
+            if _parse_error(response) and "parse_mode" in data:
+                # Повтор с той же разметкой снова будет отклонен - отправляем простым текстом
+                logger.warning(f"Telegram не разобрал разметку, сообщение отправляется без нее: {response.text}")
+                data.pop("parse_mode")
+                with TELEGRAM_SECONDS.time(method="sendMessage"):
+                    response = _session.post(url, data=data)
             if response.status_code == 200:
                 logger.info("Сообщение успешно отправлено в Telegram.")
                 
                 # Если есть изображение, отправляем его
                 if image_path:
                     send_telegram_image(image_path)
-                return
+                return True
             else:
+                TELEGRAM_ERRORS.inc(method="sendMessage")
                 logger.error(f"Ошибка при отправке сообщения: {response.status_code}")
+                if response.status_code == 401:
+                    _verified_url = None  # Токен отозван - следующая отправка проверит его заново
                 if attempt < max_retries - 1:
                     time.sleep(retry_delay * (2 ** attempt))
         except Exception as e:
+            TELEGRAM_ERRORS.inc(method="sendMessage")
             logger.error(f"Ошибка при отправке сообщения: {str(e)}")
             if attempt < max_retries - 1:
                 time.sleep(retry_delay * (2 ** attempt))
+    return False
 
 def send_telegram_image(image_path):
     """
@@ -81,7 +122,7 @@ def send_telegram_image(image_path):
     Args:
         image_path (str): Путь к изображению
     """
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendPhoto"
+    url = _method_url("sendPhoto")
     data = {
         "chat_id": TELEGRAM_CHAT_ID
     }
@@ -90,12 +131,15 @@ def send_telegram_image(image_path):
     }
     
     try:
-        response = requests.post(url, data=data, files=files)
+        with TELEGRAM_SECONDS.time(method="sendPhoto"):
+            response = _session.post(url, data=data, files=files)
         if response.status_code == 200:
             logger.info("Изображение успешно отправлено в Telegram.")
         else:
+            TELEGRAM_ERRORS.inc(method="sendPhoto")
             logger.error(f"Ошибка при отправке изображения: {response.status_code}")
     except Exception as e:
+        TELEGRAM_ERRORS.inc(method="sendPhoto")
         logger.error(f"Ошибка при отправке изображения: {str(e)}")
     finally:
         files["photo"].close()
@@ -107,4 +151,6 @@ def test_telegram_connection():
         logger.info("Тестовое сообщение отправлено.")
 
 if __name__ == "__main__":
+    from bot.logging_config import setup_logging
+    setup_logging()
     test_telegram_connection()
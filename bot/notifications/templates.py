@@ -0,0 +1,263 @@
+# templates.py
+
+"""
+Telegram message templates compiled once at import
+
+A template is plain text with format fields whose names are dotted paths
+into the render context, e.g. "{signal.price:.2f}" or
+"{analysis.momentum.rsi:.2f}". Extra conversions turn booleans into
+words: "!y" (Да/Нет) and "!p" (Положительный/Отрицательный); "!f" writes
+a price in fixed notation with at least two decimals and four significant
+digits (65432.10, 0.0001234).
+
+Every substituted value is escaped for Telegram's Markdown parse mode, so a
+symbol or a label with "_" or "*" cannot make Telegram reject the message.
+A line is dropped when one of its values is None; a block (lines between
+blank lines) whose every field line was dropped is dropped as a whole,
+together with its title.
+"""
+
+import math
+import string
+from functools import lru_cache
+from bot.config import STOP_LOSS_PCT, TAKE_PROFIT_PCT, TELEGRAM_MESSAGE_LIMIT
+
+_MARKDOWN_SPECIAL = str.maketrans({"_": "\\_", "*": "\\*", "`": "\\`", "[": "\\["})
+
+def format_price(value):
+    """Price in fixed notation: at least 2 decimals and 4 significant digits"""
+    value = float(value)
+    decimals = 2 if value == 0 else max(2, 3 - math.floor(math.log10(abs(value))))
+    return f"{value:.{decimals}f}"
+
+_CONVERSIONS = {
+    None: None,
+    "y": lambda value: "Да" if value else "Нет",
+    "p": lambda value: "Положительный" if value else "Отрицательный",
+    "f": format_price,
+    "s": str,
+    "r": repr
+}
+
+@lru_cache(maxsize=1024)  # Подписи и символы повторяются от сигнала к сигналу
+def escape_markdown(text):
+    """Escape the characters Telegram's legacy Markdown treats as entity markers"""
+    return str(text).translate(_MARKDOWN_SPECIAL)
+
+class Template:
+    """
+    One compiled message template
+
+    Args:
+        text (str): Template source
+        escape (callable, optional): Applied to every substituted string
+            (escape_markdown by default, None for plain text)
+    """
+
+    def __init__(self, text, escape=escape_markdown):
+        self.text = text
+        self.escape = escape
+        formatter = string.Formatter()
+        self._fields = []  # (путь, преобразование) каждого поля по порядку
+        self._blocks = []  # [[(формат строки с локальными номерами полей, номера полей)]]
+        full = []
+        for block in text.split("\n\n"):
+            lines = []
+            block_full = []
+            for line in block.split("\n"):
+                local = []
+                numbered = []
+                indices = []
+                for literal, field, spec, conversion in formatter.parse(line):
+                    literal = literal.replace("{", "{{").replace("}", "}}")
+                    local.append(literal)
+                    numbered.append(literal)
+                    if field is None:
+                        continue
+                    if conversion not in _CONVERSIONS:
+                        raise ValueError(f"Unknown conversion !{conversion} in template {text!r}")
+                    spec = f":{spec}" if spec else ""
+                    local.append(f"{{{len(indices)}{spec}}}")
+                    numbered.append(f"{{{len(self._fields)}{spec}}}")
+                    indices.append(len(self._fields))
+                    self._fields.append((tuple(field.split(".")), _CONVERSIONS[conversion]))
+                lines.append(("".join(local), indices))
+                block_full.append("".join(numbered))
+            self._blocks.append(lines)
+            full.append("\n".join(block_full))
+        # Весь шаблон одним вызовом format, когда пропускать нечего
+        self._format = "\n\n".join(full).format
+        # Все значения одним выражением: ctx["analysis"]["trend"]["ema_trend"], ...
+        lookups = ("".join(f"[{key!r}]" for key in path) for path, _ in self._fields)
+        self._lookup = eval(f"lambda ctx: ({''.join(f'ctx{lookup}, ' for lookup in lookups)})")
+        self._converted = [(i, convert) for i, (_, convert) in enumerate(self._fields) if convert is not None]
+
+    def _value(self, path, convert, context):
+        value = context
+        for key in path:
+            if value is None:
+                return None
+            value = value.get(key)
+        if value is None:
+            return None
+        if convert is not None:
+            value = convert(value)
+        if self.escape is not None and isinstance(value, str):
+            value = self.escape(value)
+        return value
+
+    def render(self, context):
+        """
+        Fill the template
+
+        Args:
+            context (dict): Values, nested dicts are reached by dotted names
+
+        Returns:
+            str: Message text
+        """
+        try:
+            values = self._lookup(context)
+        except (KeyError, TypeError):  # Нет ключа или вложенный словарь None
+            values = (None,)
+        if None not in values:
+            values = list(values)
+            for i, convert in self._converted:
+                values[i] = convert(values[i])
+            if self.escape is not None:
+                values = [self.escape(value) if value.__class__ is str else value for value in values]
+            return self._format(*values)
+        values = [self._value(path, convert, context) for path, convert in self._fields]
+        blocks = []
+        for lines in self._blocks:
+            rendered = []
+            dropped = kept = 0
+            for line, indices in lines:
+                line_values = [values[i] for i in indices]
+                if None in line_values:
+                    dropped += 1
+                    continue
+                rendered.append(line.format(*line_values))
+                kept += bool(indices)
+            if dropped and not kept:
+                continue
+            blocks.append("\n".join(rendered))
+        return "\n\n".join(blocks)
+
+SIGNAL_TEMPLATE = Template("""🔔 Сигнал для {symbol}:
+{signal.signal} {symbol}
+Сила сигнала: {signal.strength}
+Цена входа: {signal.price:.2f}$
+Стоп-лосс: {signal.stop_loss:.2f}$ ({stop_loss_pct}%)
+Тейк-профит: {signal.take_profit:.2f}$ ({take_profit_pct}%)
+Размер позиции: {signal.position_size:.1%}
+Плечо: {signal.leverage}x
+
+Анализ тренда:
+- Сила тренда: {analysis.trend.trend_strength:.2f}
+- Тренд EMA: {analysis.trend.ema_trend}
+- Тренд MACD: {analysis.trend.macd_trend}
+- Тренд Ишимоку: {analysis.trend.ichimoku_trend}
+
+Анализ импульса:
+- RSI: {analysis.momentum.rsi:.2f} ({analysis.momentum.rsi_signal})
+- Стохастик: {analysis.momentum.stoch_k:.2f}/{analysis.momentum.stoch_d:.2f}
+- Williams %R: {analysis.momentum.williams_r:.2f} ({analysis.momentum.williams_signal})
+- Скорость изменения: {analysis.momentum.roc:.2f}% ({analysis.momentum.roc_signal})
+
+Анализ объема:
+- Всплеск объема: {analysis.volume.volume_spike!y}
+- Тренд индекса силы: {analysis.volume.force_trend!p}
+- Тренд OBV: {analysis.volume.obv_trend!p}
+
+Анализ волатильности:
+- ATR: {analysis.volatility.atr:.2f} ({analysis.volatility.atr_percent:.2f}%)
+- Ширина полос Боллинджера: {analysis.volatility.bb_width:.2f}
+
+Рыночные данные:
+- Ставка финансирования: {analysis.market.funding_rate:.4%}
+- Открытый интерес: {analysis.market.open_interest:.0f}{open_interest_change}
+- Дисбаланс стакана: {analysis.market.book_imbalance:+.1%}""")
+
+# Шаблон по направлению сигнала; направления без своего шаблона используют общий
+SIGNAL_TEMPLATES = {
+    "ПОКУПКА": SIGNAL_TEMPLATE,
+    "ПРОДАЖА": SIGNAL_TEMPLATE
+}
+
+CLUSTER_HEADER = Template("🔔 Кластер сигналов: {direction}, {count} пар (корреляция от {threshold:.2f})")
+CLUSTER_MEMBER = Template("- {symbol}: вход {signal.price!f}$, стоп {signal.stop_loss!f}$, "
+                          "тейк {signal.take_profit!f}$")
+CLUSTER_LEADER = Template("График и анализ: {symbol}")
+
+DIGEST_HEADER = Template("📋 Сигналы за цикл: {count}")
+DIGEST_DIRECTION = Template("{direction}:")
+DIGEST_LINE = Template("- {symbol}: вход {signal.price!f}$, стоп {signal.stop_loss!f}$, "
+                       "тейк {signal.take_profit!f}$ (ADX {analysis.trend.trend_strength:.0f}, "
+                       "RSI {analysis.momentum.rsi:.0f})")
+DIGEST_MARKET = Template("""Рынок, {symbols} пар за {minutes} мин: выше EMA21 {above_ema:.0%}, медиана RSI {rsi_median:.1f}, \
+медиана изменения {change_median:+.2%}
+- Рост: {top_gainer} {top_gain:+.2%}
+- Падение: {top_loser} {top_loss:+.2%}""")
+DIGEST_CHART = Template("График: {symbol}")
+
+def signal_context(symbol, signal):
+    """Render context of one signal (the values its template refers to)"""
+    analysis = signal.get("analysis") or {}
+    market = analysis.get("market") or {}
+    change = market.get("open_interest_change_pct")
+    return {
+        "symbol": symbol,
+        "signal": signal,
+        "analysis": analysis,
+        "stop_loss_pct": STOP_LOSS_PCT * 100,
+        "take_profit_pct": TAKE_PROFIT_PCT * 100,
+        "open_interest_change": f" ({change:+.2f}%)" if change is not None else ""
+    }
+
+def render_signal(symbol, signal):
+    """Alert text for one signal"""
+    template = SIGNAL_TEMPLATES.get(signal["signal"], SIGNAL_TEMPLATE)
+    return template.render(signal_context(symbol, signal)) + "\n"
+
+def render_cluster(direction, entries, leader, threshold):
+    """
+    One alert for a cluster: members with their levels, then the leader's full analysis
+
+    Args:
+        direction (str): Signal direction of the cluster
+        entries (list): (symbol, signal, bar_time, message, df) of every member
+        leader (tuple): Entry whose chart and message are attached
+        threshold (float): Correlation threshold of the cluster
+
+    Returns:
+        str: Message text
+    """
+    lines = [CLUSTER_HEADER.render({"direction": direction, "count": len(entries), "threshold": threshold})]
+    lines.extend(CLUSTER_MEMBER.render({"symbol": symbol, "signal": signal}) for symbol, signal, *_ in entries)
+    return "\n".join(lines) + "\n\n" + CLUSTER_LEADER.render({"symbol": leader[0]}) + "\n\n" + leader[3]
+
+def split_message(text, limit=TELEGRAM_MESSAGE_LIMIT):
+    """
+    Split text into Telegram-sized messages at line breaks
+
+    Returns:
+        list: Parts of at most `limit` characters
+    """
+    parts = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:  # Строка длиннее лимита режется как есть
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            parts.append(current)
+            candidate = line
+        current = candidate
+    if current:
+        parts.append(current)
+    return parts
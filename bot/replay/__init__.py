@@ -0,0 +1,2 @@
+from .fake_exchange import FakeExchange, ReplayClock, load_archive
+from .telegram_stub import TelegramStub
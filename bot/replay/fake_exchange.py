@@ -0,0 +1,164 @@
+# fake_exchange.py
+
+import glob
+import os
+import random
+import threading
+import time
+import ccxt
+import numpy as np
+from bot.data.synthetic import TIMEFRAME_MS, DEFAULT_START_MS, generate_ohlcv, symbol_seed
+
+class ReplayClock:
+    """
+    Market time of a replay in ms
+
+    With speed > 0 market time runs `speed` times faster than the wall
+    clock. With speed == 0 it only moves on advance(), which makes a run
+    fully deterministic: every cycle sees exactly the same candles.
+    """
+
+    def __init__(self, start_ms=DEFAULT_START_MS, speed=10.0):
+        self.start_ms = start_ms
+        self.speed = speed
+        self._offset_ms = 0.0
+        self._started = time.monotonic()
+
+    def now_ms(self):
+        elapsed = (time.monotonic() - self._started) * 1000 * self.speed if self.speed else 0.0
+        return int(self.start_ms + self._offset_ms + elapsed)
+
+    def advance(self, seconds):
+        self._offset_ms += seconds * 1000
+
+def load_archive(directory):
+    """
+    Read archived candles: one <BASE>_<QUOTE>.csv per symbol
+
+    Each file has ccxt OHLCV rows (timestamp ms, open, high, low, close,
+    volume), with or without a header line.
+
+    Returns:
+        dict: np.ndarray of shape (n, 6) keyed by symbol, e.g. "BTC/USDT"
+    """
+    archive = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.csv"))):
+        symbol = os.path.splitext(os.path.basename(path))[0].replace("_", "/", 1)
+        with open(path, encoding="utf-8") as f:
+            first = f.readline()
+        skip = 0 if first[:1].isdigit() else 1
+        archive[symbol] = np.loadtxt(path, delimiter=",", skiprows=skip, ndmin=2)[:, :6]
+    return archive
+
+class FakeExchange:
+    """
+    Local stand-in for the ccxt Binance futures client used by run_bot
+
+    Implements load_markets, fetch_ohlcv, fetch_balance and set_leverage.
+    Candles come from an archive (see load_archive) or are generated per
+    symbol; fetch_ohlcv only returns candles opened before the replay
+    clock's current time, the last one still forming, as on the live API.
+
+    Faults are injected with a seeded RNG: `latency` seconds (plus up to
+    `jitter`) per request, NetworkError with probability `error_rate`, and
+    RateLimitExceeded when more than `rate_limit` requests arrive within one
+    wall-clock second. Request latencies are recorded in `request_seconds`.
+    """
+
+    def __init__(self, symbols, clock=None, timeframe="5m", warmup_bars=600, archive=None, seed=42,
+                 latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, free_margin=10_000.0):
+        self.symbols = list(symbols)
+        self.clock = clock or ReplayClock()
+        self.timeframe = timeframe
+        self.warmup_bars = warmup_bars
+        self.archive = archive
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.free_margin = free_margin
+        self.markets = {}
+        self.leverage = {}
+        self.request_seconds = []
+        self.errors = {"NetworkError": 0, "RateLimitExceeded": 0}
+        self._candles = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_requests = 0
+
+    def _request(self):
+        """Apply latency and injected faults to one API call"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_requests = 0
+            self._window_requests += 1
+            limited = self.rate_limit is not None and self._window_requests > self.rate_limit
+            failed = self._rng.random() < self.error_rate
+            delay = self.latency + self._rng.random() * self.jitter
+        if delay:
+            time.sleep(delay)
+        if limited:
+            self.errors["RateLimitExceeded"] += 1
+            raise ccxt.RateLimitExceeded("fake exchange: request rate limit exceeded")
+        if failed:
+            self.errors["NetworkError"] += 1
+            raise ccxt.NetworkError("fake exchange: injected network error")
+
+    def load_markets(self, reload=False):
+        self._request()
+        for symbol in self.symbols:
+            base, quote = symbol.split("/")
+            self.markets[symbol] = {
+                "id": f"{base}{quote}", "symbol": symbol, "base": base, "quote": quote,
+                "settle": quote, "swap": True, "linear": True, "active": True,
+                "limits": {"amount": {"min": 0.001}}
+            }
+        return self.markets
+
+    def market(self, symbol):
+        return self.markets[symbol]
+
+    def fetch_balance(self, params=None):
+        self._request()
+        return {"USDT": {"free": self.free_margin, "used": 0.0, "total": self.free_margin}}
+
+    def set_leverage(self, leverage, symbol=None, params=None):
+        self._request()
+        self.leverage[symbol] = leverage
+        return {"symbol": symbol, "leverage": leverage}
+
+    def candles(self, symbol):
+        """Full candle history of a symbol (archived or generated on first use)"""
+        if symbol not in self._candles:
+            if self.archive is not None:
+                self._candles[symbol] = self.archive[symbol]
+            else:
+                # Прогрев до старта часов плюс сутки вперед; дальше история не нужна
+                step = TIMEFRAME_MS[self.timeframe]
+                bars = self.warmup_bars + 86_400_000 // step
+                self._candles[symbol] = generate_ohlcv(bars, seed=symbol_seed(symbol, self.seed),
+                                                       timeframe=self.timeframe,
+                                                       start_ms=self.clock.start_ms - self.warmup_bars * step)
+        return self._candles[symbol]
+
+    def fetch_ohlcv(self, symbol, timeframe=None, since=None, limit=None, params=None):
+        start = time.perf_counter()
+        try:
+            self._request()
+            rows = self.candles(symbol)
+            end = np.searchsorted(rows[:, 0], self.clock.now_ms(), side="right")
+            rows = rows[:end]
+            if since is not None:
+                rows = rows[rows[:, 0] >= since]
+            if limit is not None:
+                rows = rows[-limit:]
+            ohlcv = rows.tolist()
+            for row in ohlcv:
+                row[0] = int(row[0])
+            return ohlcv
+        finally:
+            self.request_seconds.append(time.perf_counter() - start)
@@ -0,0 +1,152 @@
+# harness.py
+
+"""
+Replay of the full bot loop against a local fake exchange and Telegram stub
+
+run_bot runs unchanged (fetch, indicators, signals, charts, notifier) with
+FakeExchange in place of Binance and TelegramStub in place of the Bot API.
+Market time runs `speed` times faster than real time and so does the cycle
+interval; speed 0 steps the clock by FUTURES_INTERVAL after every cycle and
+does not sleep, which gives the same candles and alerts on every run.
+
+Usage:
+    python -m bot replay --symbols 500 --speed 10 --cycles 3
+    python -m bot replay --archive data/candles --speed 0 --cycles 20 --error-rate 0.01
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+import numpy as np
+from bot.config import FUTURES_INTERVAL, TIMEFRAME
+from bot.benchmarks.common import run_metadata, write_results
+from bot.data.synthetic import DEFAULT_START_MS
+from bot.replay.fake_exchange import FakeExchange, ReplayClock, load_archive
+from bot.replay.telegram_stub import TelegramStub
+
+logger = logging.getLogger(__name__)
+
+def _percentiles(values):
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_s": float(p50), "p95_s": float(p95), "p99_s": float(p99), "max_s": float(max(values))}
+
+def replay_symbols(count):
+    """Synthetic universe of `count` symbols: R000/USDT, R001/USDT, ..."""
+    return [f"R{i:03d}/USDT" for i in range(count)]
+
+def run_replay(symbols, cycles=3, speed=10.0, exchange=None, stub=None, timeout=None):
+    """
+    Run run_bot for `cycles` cycles against a fake exchange and Telegram stub
+
+    Args:
+        symbols (list): Universe analyzed every cycle
+        cycles (int): Cycles to run before stopping the bot
+        speed (float): Replay speed, 0 for a stepped deterministic clock
+        exchange (FakeExchange, optional): Preconfigured exchange (faults, archive)
+        stub (TelegramStub, optional): Preconfigured Telegram stub
+        timeout (float, optional): Stop the bot after this many wall seconds
+
+    Returns:
+        dict: Throughput, cycle and request latency percentiles, deliveries and errors
+    """
+    from bot.core import main
+    from bot.notifications import notifier
+
+    exchange = exchange or FakeExchange(symbols, clock=ReplayClock(speed=speed), timeframe=TIMEFRAME)
+    stub = stub or TelegramStub()
+    clock = exchange.clock
+    interval = FUTURES_INTERVAL / speed if speed else 0
+    durations = []
+    done = threading.Event()
+
+    def on_cycle(elapsed):
+        durations.append(elapsed)
+        if not clock.speed:
+            clock.advance(FUTURES_INTERVAL)
+        if len(durations) >= cycles:
+            main.stop_bot()
+            done.set()
+
+    previous_url = notifier._api_url
+    notifier.set_api_url(stub.url)
+    stub.start()
+    # Отдельный поток: run_bot не ставит обработчики сигналов, Ctrl+C остается у вызывающего
+    thread = threading.Thread(target=main.run_bot, name="replay-bot",
+                              kwargs={"on_cycle": on_cycle, "exchange": exchange,
+                                      "symbols": list(symbols), "interval": interval})
+    start = time.perf_counter()
+    market_start = clock.now_ms()
+    try:
+        thread.start()
+        if not done.wait(timeout):
+            logger.warning(f"Replay timed out after {timeout} s, stopping the bot")
+    finally:
+        main.stop_bot()
+        thread.join()
+        wall = time.perf_counter() - start
+        stub.stop()
+        notifier.set_api_url(previous_url)
+
+    analyzed = len(symbols) * len(durations)
+    busy = sum(durations)
+    return {
+        "metadata": run_metadata(symbols=len(symbols), cycles=len(durations), speed=speed,
+                                 latency=exchange.latency, jitter=exchange.jitter,
+                                 error_rate=exchange.error_rate, rate_limit=exchange.rate_limit),
+        "wall_s": wall,
+        "market_s": (clock.now_ms() - market_start) / 1000,
+        "symbols_per_s": analyzed / busy if busy else 0.0,
+        "interval_s": interval,
+        "overruns": sum(1 for elapsed in durations if interval and elapsed > interval),
+        "cycle": _percentiles(durations),
+        "fetch": _percentiles(exchange.request_seconds),
+        "requests": len(exchange.request_seconds),
+        "errors": dict(exchange.errors),
+        "deliveries": {
+            "messages": sum(1 for _, method, _ in stub.deliveries if method == "sendMessage"),
+            "photos": sum(1 for _, method, _ in stub.deliveries if method == "sendPhoto"),
+            "failed": stub.failures
+        }
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay the bot loop against a fake exchange")
+    parser.add_argument("--symbols", type=int, default=500, help="Synthetic symbols (ignored with --archive)")
+    parser.add_argument("--archive", default=None, help="Directory with <BASE>_<QUOTE>.csv candles")
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--speed", type=float, default=10.0, help="Replay speed, 0 - stepped clock")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0.0, help="Exchange latency per request, s")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency up to this, s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with NetworkError")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests per second before RateLimitExceeded")
+    parser.add_argument("--telegram-latency", type=float, default=0.0)
+    parser.add_argument("--telegram-failure-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=None, help="Wall-clock limit, s")
+    parser.add_argument("--output", default=None, help="JSON file for the report")
+    args = parser.parse_args(argv)
+
+    archive = load_archive(args.archive) if args.archive else None
+    symbols = sorted(archive) if archive else replay_symbols(args.symbols)
+    start_ms = DEFAULT_START_MS
+    if archive:
+        # Старт, когда у каждого символа уже есть 500 свечей - столько запрашивает цикл
+        start_ms = int(max(rows[min(len(rows), 500) - 1, 0] for rows in archive.values())) + 1
+    clock = ReplayClock(start_ms, args.speed)
+    exchange = FakeExchange(symbols, clock=clock, timeframe=TIMEFRAME, archive=archive, seed=args.seed,
+                            latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            rate_limit=args.rate_limit)
+    stub = TelegramStub(latency=args.telegram_latency, failure_rate=args.telegram_failure_rate, seed=args.seed)
+
+    report = run_replay(symbols, args.cycles, args.speed, exchange, stub, args.timeout)
+    path = write_results(report, "replay", args.output)
+    print(json.dumps({k: v for k, v in report.items() if k != "metadata"}, indent=2))
+    print(f"Report written to {path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+# telegram_stub.py
+
+import json
+import random
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass  # Запросы учитываются в stub.deliveries, а не в stderr
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fields(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body)
+            fields = {}
+            for part in message.iter_parts():
+                payload = part.get_payload(decode=True)
+                name = part.get_param("name", header="content-disposition")
+                fields[name] = len(payload) if part.get_filename() else payload.decode("utf-8")
+            return fields
+        return {key: values[0] for key, values in parse_qs(body.decode("utf-8")).items()}
+
+    def _handle(self):
+        stub = self.server.stub
+        method = self.path.rstrip("/").rsplit("/", 1)[-1]
+        fields = self._fields() if self.command == "POST" else {}
+        if stub.latency:
+            time.sleep(stub.latency)
+        if method == "getMe":
+            self._reply(200, {"ok": True, "result": {"id": 1, "is_bot": True, "username": "replay_stub_bot"}})
+            return
+        if method not in ("sendMessage", "sendPhoto"):
+            self._reply(404, {"ok": False, "description": "Not Found"})
+            return
+        if stub.should_fail():
+            self._reply(500, {"ok": False, "description": "stub: injected failure"})
+            return
+        stub.record(method, fields)
+        self._reply(200, {"ok": True, "result": {"message_id": len(stub.deliveries)}})
+
+    do_GET = _handle
+    do_POST = _handle
+
+class TelegramStub:
+    """
+    Local HTTP server that answers the Bot API calls of the notifier
+
+    getMe always succeeds; sendMessage and sendPhoto are recorded in
+    `deliveries` as (wall time, method, fields), a photo as its size in
+    bytes. `latency` delays every response and `failure_rate` answers a
+    seeded share of sends with HTTP 500, so the notifier retries run too.
+    Point the notifier at it with notifier.set_api_url(stub.url).
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=42, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.deliveries = []
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def should_fail(self):
+        with self._lock:
+            failed = self._rng.random() < self.failure_rate
+            self.failures += failed
+            return failed
+
+    def record(self, method, fields):
+        with self._lock:
+            self.deliveries.append((time.time(), method, fields))
+
+    def messages(self):
+        """Texts of the recorded sendMessage calls"""
+        with self._lock:
+            return [fields.get("text") for _, method, fields in self.deliveries if method == "sendMessage"]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="telegram-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,8 +1,143 @@
+import io
+import logging
 import matplotlib.pyplot as plt
 import mplfinance as mpf
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image, features
+from bot.config import (
+    CHART_BARS, CHART_HISTORY_BARS, CHART_HISTORY_CANDLES, CHART_FORMAT, CHART_DPI, CHART_SIZE,
+    CHART_QUALITY, CHART_PNG_COLORS, CHART_MAX_BYTES, CHART_EXTENSIONS
+)
+
+logger = logging.getLogger(__name__)
+
+_EXTENSIONS = CHART_EXTENSIONS
+
+def aggregate_ohlc(df, factor):
+    """
+    Сворачивает каждые factor подряд идущих свечей в одну OHLC свечу
+
+    Группы выравниваются по концу, поэтому последняя группа всегда полная.
+    Объем суммируется, остальные столбцы (индикаторы) берутся по последней свече группы.
+
+    Args:
+        df (pd.DataFrame): Свечи
+        factor (int): Свечей в группе
+
+    Returns:
+        pd.DataFrame: Свернутые свечи
+    """
+    if factor <= 1 or df.empty:
+        return df
+    groups = (np.arange(len(df)) + (-len(df)) % factor) // factor
+    grouped = df.groupby(groups, sort=True)
+    result = grouped.last()
+    if "timestamp" in df.columns:
+        result["timestamp"] = grouped["timestamp"].first()
+    result["open"] = grouped["open"].first()
+    result["high"] = grouped["high"].max()
+    result["low"] = grouped["low"].min()
+    if "volume" in df.columns:
+        result["volume"] = grouped["volume"].sum()
+    result.index = df.index[np.flatnonzero(np.diff(groups, prepend=-1))]  # Начало каждой группы
+    return result
+
+def compact_frame(df, bars=CHART_BARS, history_bars=CHART_HISTORY_BARS, history_candles=CHART_HISTORY_CANDLES):
+    """
+    Окно свечей для графика: последние bars свечей как есть и history_bars
+    более старых, свернутых не более чем в history_candles свечей
+
+    Args:
+        df (pd.DataFrame): Свечи с индикаторами
+        bars (int): Последних свечей без изменений (0 - все)
+        history_bars (int): Сколько более старых свечей показать (0 - не показывать)
+        history_candles (int): Во сколько свечей свернуть историю
+
+    Returns:
+        pd.DataFrame: Свечи для отрисовки
+    """
+    if not bars or len(df) <= bars:
+        return df
+    recent = df.iloc[-bars:]
+    history = df.iloc[max(0, len(df) - bars - history_bars):len(df) - bars]
+    if history.empty or not history_candles:
+        return recent
+    factor = -(-len(history) // history_candles)
+    return pd.concat([aggregate_ohlc(history, factor), recent])
+
+def _plot_frame(df):
+    """Неглубокая копия с индексом дат для mplfinance"""
+    df_plot = df.copy(deep=False)  # Только новый индекс, данные не копируются
+    if "timestamp" in df_plot.columns:
+        df_plot.index = pd.DatetimeIndex(df_plot["timestamp"])
+    else:
+        df_plot.index = pd.to_datetime(df_plot.index)
+    return df_plot
+
+def _encode(image, fmt, quality, colors):
+    buffer = io.BytesIO()
+    if fmt == "png":
+        # Графики - несколько цветов: палитра вместо RGB уменьшает PNG в разы
+        image.convert("RGB").quantize(colors=colors).save(buffer, "PNG", optimize=True)
+    elif fmt == "jpeg":
+        image.convert("RGB").save(buffer, "JPEG", quality=quality, optimize=True)
+    else:
+        image.convert("RGB").save(buffer, "WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+def save_chart(fig, path_base, fmt=CHART_FORMAT, dpi=CHART_DPI, quality=CHART_QUALITY, colors=CHART_PNG_COLORS,
+               max_bytes=CHART_MAX_BYTES):
+    """
+    Сохраняет фигуру в компактном виде и закрывает ее
+
+    Фигура растеризуется один раз; если файл больше max_bytes, он
+    перекодируется с меньшим качеством (JPEG/WebP) или меньшей палитрой (PNG).
+
+    Args:
+        fig (matplotlib.figure.Figure): Фигура
+        path_base (str): Путь без расширения
+        fmt (str): "png", "jpeg" или "webp" (без поддержки WebP в Pillow - PNG)
+        dpi (int): Точек на дюйм
+        quality (int): Качество JPEG/WebP
+        colors (int): Цветов в палитре PNG
+        max_bytes (int): Целевой размер файла (0 - без ограничения)
+
+    Returns:
+        str: Путь к файлу
+    """
+    fmt = fmt.lower().replace("jpg", "jpeg")
+    if fmt not in _EXTENSIONS:
+        raise ValueError(f"Unsupported chart format {fmt!r}, use png, jpeg or webp")
+    if fmt == "webp" and not features.check("webp"):
+        logger.warning("Pillow is built without WebP support, saving the chart as PNG")
+        fmt = "png"
+    try:
+        fig.set_dpi(dpi)
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        image = Image.frombuffer("RGBA", canvas.get_width_height(), canvas.buffer_rgba(), "raw", "RGBA", 0, 1)
+    finally:
+        plt.close(fig)
+
+    data = _encode(image, fmt, quality, colors)
+    while max_bytes and len(data) > max_bytes:
+        if fmt == "png" and colors > 16:
+            colors //= 2
+        elif fmt != "png" and quality > 30:
+            quality -= 15
+        else:
+            logger.warning(f"Chart is {len(data)} bytes, above the {max_bytes} byte target")
+            break
+        data = _encode(image, fmt, quality, colors)
+
+    path = f"{path_base}.{_EXTENSIONS[fmt]}"
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
 
 def plot_chart(df, symbol, timeframe, indicators=True):
     """
@@ -19,8 +154,7 @@ def plot_chart(df, symbol, timeframe, indicators=True):
         os.makedirs('charts')
     
     # Подготовка данных для mplfinance
-    df_plot = df.copy()
-    df_plot.index = pd.to_datetime(df_plot.index)
+    df_plot = _plot_frame(compact_frame(df))
     
     # Настройка стиля
     mc = mpf.make_marketcolors(up='g', down='r',
@@ -53,12 +187,12 @@ def plot_chart(df, symbol, timeframe, indicators=True):
         add_plots.append(mpf.make_addplot(df_plot['volume'], type='bar', color='gray', panel=3))
     
     # Настройка размеров панелей
-    figsize = (15, 10)
+    figsize = CHART_SIZE
     panel_ratios = (3, 1, 1, 1) if indicators else (1,)
     
     # Создание имени файла
     safe_symbol = symbol.replace("/", "_").replace(":", "_")
-    filename = f'charts/{safe_symbol}_{timeframe}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png'
+    filename = f'charts/{safe_symbol}_{timeframe}_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
 
 
     
@@ -75,12 +209,10 @@ def plot_chart(df, symbol, timeframe, indicators=True):
                         returnfig=True)
     
     # Сохранение графика
-    fig.savefig(filename)
-    plt.close(fig)
-    
-    return filename
+    return save_chart(fig, filename)
 
-def plot_signal(df, symbol, timeframe, signal_type, entry_price, stop_loss, take_profit):
+def plot_signal(df, symbol, timeframe, signal_type, entry_price, stop_loss, take_profit, bars=CHART_BARS,
+                fmt=CHART_FORMAT, dpi=CHART_DPI):
     """
     Создает график с отметкой сигнала
     
@@ -92,14 +224,16 @@ def plot_signal(df, symbol, timeframe, signal_type, entry_price, stop_loss, take
         entry_price (float): Цена входа
         stop_loss (float): Уровень стоп-лосса
         take_profit (float): Уровень тейк-профита
+        bars (int): Последних свечей на графике (0 - все)
+        fmt (str): Формат файла: png, jpeg или webp
+        dpi (int): Точек на дюйм
     """
     # Создаем директорию для графиков если её нет
     if not os.path.exists('charts'):
         os.makedirs('charts')
     
     # Подготовка данных
-    df_plot = df.copy()
-    df_plot.index = pd.to_datetime(df_plot.index)
+    df_plot = _plot_frame(compact_frame(df, bars))
     
     # Настройка стиля
     mc = mpf.make_marketcolors(up='g', down='r',
@@ -122,7 +256,7 @@ def plot_signal(df, symbol, timeframe, signal_type, entry_price, stop_loss, take
     
     # Создание имени файла
     safe_symbol = symbol.replace("/", "_").replace(":", "_")
-    filename = f'charts/{safe_symbol}_{signal_type}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png'
+    filename = f'charts/{safe_symbol}_{signal_type}_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
 
     
     # Создание графика
@@ -133,11 +267,8 @@ def plot_signal(df, symbol, timeframe, signal_type, entry_price, stop_loss, take
                         ylabel='Цена',
                         volume=True,
                         addplot=add_plots,
-                        figsize=(15, 10),
+                        figsize=CHART_SIZE,
                         returnfig=True)
     
     # Сохранение графика
-    fig.savefig(filename)
-    plt.close(fig)
-    
-    return filename 
\ No newline at end of file
+    return save_chart(fig, filename, fmt=fmt, dpi=dpi) 
\ No newline at end of file
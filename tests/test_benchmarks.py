@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+
+from bot.benchmarks.common import write_results
+from bot.benchmarks.indicators import run_benchmarks as run_indicator_benchmarks
+from bot.benchmarks.pipeline import run_benchmarks
+from bot.data.synthetic import StubExchange, generate_ohlcv
+
+
+def test_synthetic_candles_are_reproducible():
+    first = generate_ohlcv(1000, seed=7)
+    second = generate_ohlcv(1000, seed=7)
+    assert np.array_equal(first, second)
+    assert (first[:, 2] >= np.maximum(first[:, 1], first[:, 4])).all()
+    assert (first[:, 3] <= np.minimum(first[:, 1], first[:, 4])).all()
+
+
+def test_stub_exchange_returns_ccxt_rows():
+    rows = StubExchange(history_bars=300).fetch_ohlcv("BTC/USDT", "5m", limit=100)
+    assert len(rows) == 100
+    assert isinstance(rows[0][0], int)
+
+
+def test_pipeline_benchmark_writes_json(tmp_path):
+    report = run_benchmarks(sizes=[300], symbol_counts=[2], repeat=1, render_max_bars=0)
+    names = [record["benchmark"] for record in report["results"]]
+    assert names == ["fetch_ohlcv", "add_indicators", "generate_signal", "cycle"]
+
+    path = write_results(report, "pipeline", str(tmp_path / "result.json"))
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["meta"]["seed"] == 42
+
+
+def test_indicator_benchmark_compares_backends():
+    report = run_indicator_benchmarks(sizes=[300], repeat=1)
+    assert [record["backend"] for record in report["results"]] == ["ta", "fast"]
+    assert report["results"][-1]["max_rel_deviation"] < 1e-7
+
+
+def test_chart_benchmark_measures_every_output():
+    from bot.benchmarks.charts import run_benchmarks as run_chart_benchmarks
+
+    report = run_chart_benchmarks(bars_list=[200], formats=["png", "jpeg"], repeat=1, window=60)
+    sizes = {record["output"]: record["file_bytes"] for record in report["results"]}
+    assert list(sizes) == ["legacy", "png", "jpeg"]
+    assert sizes["png"] < sizes["legacy"]
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from bot.visualization.visualizer import aggregate_ohlc, compact_frame, save_chart
+
+
+def candles(count):
+    close = np.arange(1, count + 1, dtype=float)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=count, freq="5min"),
+        "open": close - 0.5,
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+        "volume": np.ones(count),
+        "rsi": close * 10
+    })
+
+
+def test_aggregate_ohlc_aligns_groups_to_the_end():
+    agg = aggregate_ohlc(candles(7), 3)
+    # Группы: [0], [1, 2, 3], [4, 5, 6]
+    assert agg["open"].tolist() == [0.5, 1.5, 4.5]
+    assert agg["close"].tolist() == [1, 4, 7]
+    assert agg["high"].tolist() == [2, 5, 8]
+    assert agg["low"].tolist() == [0, 1, 4]
+    assert agg["volume"].tolist() == [1, 3, 3]
+    assert agg["rsi"].tolist() == [10, 40, 70]
+    assert agg.index.tolist() == [0, 1, 4]
+    assert agg["timestamp"].iloc[1] == candles(7)["timestamp"].iloc[1]
+
+
+def test_compact_frame_keeps_recent_bars_and_folds_history():
+    df = candles(500)
+    assert len(compact_frame(df, bars=0)) == 500
+    recent = compact_frame(df, bars=100, history_bars=0)
+    assert recent.equals(df.iloc[-100:])
+
+    folded = compact_frame(df, bars=100, history_bars=200, history_candles=20)
+    assert len(folded) == 120
+    assert folded.iloc[-100:].equals(df.iloc[-100:])
+    assert folded["high"].iloc[:20].max() == df["high"].iloc[200:400].max()
+
+
+def test_save_chart_meets_size_target(tmp_path):
+    fig, ax = plt.subplots(figsize=(8, 6))
+    rng = np.random.default_rng(0)
+    ax.imshow(rng.random((300, 400, 3)))  # Шум почти не сжимается
+
+    path = save_chart(fig, str(tmp_path / "chart"), fmt="jpeg", dpi=80, quality=95, max_bytes=60_000)
+    assert path.endswith(".jpg")
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data[:2] == b"\xff\xd8"
+    assert len(data) <= 60_000
+    assert not plt.get_fignums()
+
+    path = save_chart(plt.figure(), str(tmp_path / "plain"), fmt="png")
+    with open(path, "rb") as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
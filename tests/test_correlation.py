@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from bot.core.correlation import RollingCorrelation, SignalClusterer, find_clusters
+
+START = pd.Timestamp("2024-01-01")
+
+
+def returns_frame(returns):
+    """Свечи с log_returns; последняя строка - формирующаяся свеча"""
+    returns = np.append(returns, 0.0)
+    return pd.DataFrame({
+        "timestamp": START + pd.to_timedelta(np.arange(len(returns)) * 5, unit="min"),
+        "log_returns": returns
+    })
+
+
+def market(bars, seed=0):
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.01, bars)
+    return {
+        "BTC/USDT": common + rng.normal(0, 0.002, bars),
+        "ETH/USDT": common + rng.normal(0, 0.002, bars),
+        "SOL/USDT": common + rng.normal(0, 0.002, bars),
+        "XRP/USDT": rng.normal(0, 0.01, bars)
+    }
+
+
+def test_incremental_updates_match_full_recompute():
+    window = 50
+    series = market(200)
+    rolling = RollingCorrelation(window)
+    for end in [60, 61, 64, 90, 150, 200]:
+        for symbol, returns in series.items():
+            rolling.observe(symbol, returns_frame(returns[:end]))
+        rolling.update()
+        expected = np.corrcoef(np.array([series[s][end - window:end] for s in rolling.symbols]))
+        np.testing.assert_allclose(rolling.matrix(), expected, atol=1e-9)
+
+
+def test_new_symbol_rebuilds_and_unknown_is_uncorrelated():
+    series = market(100)
+    rolling = RollingCorrelation(40)
+    rolling.observe("BTC/USDT", returns_frame(series["BTC/USDT"]))
+    rolling.update()
+    assert rolling.symbols == ["BTC/USDT"]
+
+    rolling.observe("ETH/USDT", returns_frame(series["ETH/USDT"]))
+    rolling.update()
+    assert rolling.symbols == ["BTC/USDT", "ETH/USDT"]
+    corr = rolling.submatrix(["ETH/USDT", "DOGE/USDT", "BTC/USDT"])
+    assert corr[0, 2] > 0.9
+    assert corr[0, 1] == 0 and corr[1, 1] == 1
+
+
+def test_find_clusters():
+    corr = np.array([
+        [1.0, 0.8, 0.1, 0.0],
+        [0.8, 1.0, 0.75, 0.0],
+        [0.1, 0.75, 1.0, 0.0],
+        [0.0, 0.0, 0.0, 1.0]
+    ])
+    assert find_clusters(["A", "B", "C", "D"], corr, 0.7) == [[0, 1, 2], [3]]
+
+
+def signal(direction, price=100.0):
+    return {"signal": direction, "price": price, "stop_loss": price * 0.98, "take_profit": price * 1.06}
+
+
+def test_clusterer_sends_one_alert_per_correlated_group():
+    published = []
+    clusterer = SignalClusterer(window=100, threshold=0.7,
+                                publish=lambda *args: published.append((args[0], args[3])))
+    for symbol, returns in market(150).items():
+        df = returns_frame(returns)
+        clusterer.observe(symbol, df)
+        direction = "ПРОДАЖА" if symbol == "ETH/USDT" else "ПОКУПКА"
+        clusterer.collect(symbol, signal(direction), df["timestamp"].iloc[-1], f"сигнал {symbol}", df)
+
+    delivered = clusterer.flush()
+    assert sorted(symbol for symbol, _ in delivered) == ["BTC/USDT", "ETH/USDT", "SOL/USDT", "XRP/USDT"]
+    assert dict(delivered)["ETH/USDT"]["signal"] == "ПРОДАЖА"
+    assert len(published) == 3
+    cluster = next(message for _, message in published if "Кластер" in message)
+    assert "BTC/USDT" in cluster and "SOL/USDT" in cluster and "XRP/USDT" not in cluster
+    assert clusterer.flush() == []
+
+
+def test_symbols_polled_late_are_filled_in():
+    window = 60
+    returns = np.random.default_rng(1).normal(0, 0.01, 200)
+    rolling = RollingCorrelation(window)
+    for end in range(100, 201):
+        rolling.observe("BTC/USDT", returns_frame(returns[:end]))
+        if end % 3 == 0 or end == 200:  # ETH опрашивается раз в три свечи
+            rolling.observe("ETH/USDT", returns_frame(returns[:end]))
+        rolling.update()
+
+    np.testing.assert_allclose(rolling.matrix(), np.ones((2, 2)), atol=1e-9)
+    np.testing.assert_allclose(rolling._buffer[:, 1], returns[200 - window:200], atol=1e-12)
+
+
+def test_clusterer_confirms_only_delivered_signals():
+    confirmed = []
+    clusterer = SignalClusterer(window=100, threshold=0.7, publish=lambda symbol, *rest: symbol != "XRP/USDT")
+    for symbol, returns in market(150).items():
+        df = returns_frame(returns)
+        clusterer.observe(symbol, df)
+        clusterer.collect(symbol, signal("ПОКУПКА"), df["timestamp"].iloc[-1], "", df,
+                          confirm=lambda symbol=symbol: confirmed.append(symbol))
+    delivered = clusterer.flush()
+
+    assert sorted(confirmed) == ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
+    assert sorted(symbol for symbol, _ in delivered) == sorted(confirmed)
@@ -0,0 +1,138 @@
+from bot.execution.executor import OrderExecutor
+from bot.execution.mock_exchange import MockFuturesExchange
+
+
+def make_signal(side, price):
+    return {
+        "signal": side,
+        "price": price,
+        "stop_loss": price * (0.98 if side == "ПОКУПКА" else 1.02),
+        "take_profit": price * (1.06 if side == "ПОКУПКА" else 0.94),
+        "position_size": 0.5,
+        "leverage": 5
+    }
+
+
+def test_signals_are_sent_in_batches_with_reduce_only_brackets():
+    prices = {"BTC/USDT": 100.0, "ETH/USDT": 50.0, "SOL/USDT": 20.0}
+    exchange = MockFuturesExchange(prices, free_margin=1000.0)
+    executor = OrderExecutor(exchange, dry_run=False, batch_size=5)
+    signals = [("BTC/USDT", make_signal("ПОКУПКА", 100.0)),
+               ("ETH/USDT", make_signal("ПРОДАЖА", 50.0)),
+               ("SOL/USDT", make_signal("ПОКУПКА", 20.0))]
+
+    plans = executor.execute(signals)
+    executor.close()
+
+    # 3 входа в одном пакете, 6 защитных ордеров в двух пакетах
+    assert sorted(len(batch) for batch in exchange.batches) == [1, 3, 5]
+    assert exchange.leverage == {"BTC/USDT": 5, "ETH/USDT": 5, "SOL/USDT": 5}
+
+    btc = plans[0]
+    # 10% маржи (лимит POSITION_SIZE) * плечо 5 / цена
+    assert btc["entry"]["quantity"] == "5"
+    assert btc["entry_result"]["status"] == "FILLED"
+    assert [order["type"] for order in btc["brackets"]] == ["STOP_MARKET", "TAKE_PROFIT_MARKET"]
+    assert all(order["reduceOnly"] == "true" and order["side"] == "SELL" for order in btc["brackets"])
+    assert plans[1]["brackets"][0]["side"] == "BUY"
+    assert plans[1]["brackets"][0]["stopPrice"] == "51.00"
+
+
+def test_rejected_entry_gets_no_brackets():
+    exchange = MockFuturesExchange({"BTC/USDT": 100.0, "ETH/USDT": 50.0}, reject={"ETH/USDT"})
+    executor = OrderExecutor(exchange, dry_run=False)
+    plans = executor.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0)),
+                              ("ETH/USDT", make_signal("ПОКУПКА", 50.0))])
+    executor.close()
+
+    assert plans[1]["error"] == "Margin is insufficient."
+    assert plans[1]["bracket_results"] == []
+    assert len(plans[0]["bracket_results"]) == 2
+
+
+def test_unfilled_entries_are_polled():
+    exchange = MockFuturesExchange({"BTC/USDT": 100.0}, fill_market_orders=False)
+    executor = OrderExecutor(exchange, dry_run=False, poll_interval=0.01)
+    plans = executor.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0))])
+    executor.close()
+
+    assert plans[0]["entry_result"]["status"] == "FILLED"
+    assert exchange.order_polls == 1
+
+
+def test_dry_run_sends_nothing():
+    exchange = MockFuturesExchange({"BTC/USDT": 100.0})
+    executor = OrderExecutor(exchange, dry_run=True)
+    plans = executor.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0))])
+    executor.close()
+
+    assert exchange.batches == []
+    assert plans[0]["entry_result"]["status"] == "DRY_RUN"
+
+
+def test_brackets_follow_the_filled_quantity():
+    exchange = MockFuturesExchange({"BTC/USDT": 100.0}, fill_ratio=0.5)
+    executor = OrderExecutor(exchange, dry_run=False)
+    plans = executor.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0))])
+
+    assert plans[0]["entry"]["quantity"] == "5"
+    assert [order["quantity"] for order in plans[0]["brackets"]] == ["2.5", "2.5"]
+    # Брекеты уходят отдельным пакетом уже после исполнения входа
+    assert [order["type"] for order in exchange.batches[1]] == ["STOP_MARKET", "TAKE_PROFIT_MARKET"]
+
+    exchange.fill_ratio = 0.0
+    plans = executor.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0))])
+    executor.close()
+    assert plans[0]["brackets"] == [] and plans[0]["bracket_results"] == []
+
+
+def test_triggered_leg_cancels_its_sibling_and_new_entry_replaces_brackets():
+    exchange = MockFuturesExchange({"BTC/USDT": 100.0})
+    executor = OrderExecutor(exchange, dry_run=False, reconcile_interval=0)
+    first = executor.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0))])
+    stop_id, take_id = [result["orderId"] for result in first[0]["bracket_results"]]
+
+    second = executor.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0))])
+    assert exchange.cancelled == [stop_id, take_id]
+    # Одна пара на всю позицию: 5 прежних + 5 новых
+    assert [order["quantity"] for order in second[0]["brackets"]] == ["10", "10"]
+
+    stop_id, take_id = [result["orderId"] for result in second[0]["bracket_results"]]
+    exchange.trigger(stop_id)
+    assert executor.reconcile() == ["BTC/USDT"]
+    assert exchange.cancelled[-1] == take_id
+    assert executor.reconcile() == []
+    executor.close()
+
+
+def test_brackets_survive_restart_and_reconcile_is_throttled(tmp_path):
+    db_path = str(tmp_path / "brackets.db")
+    exchange = MockFuturesExchange({"BTC/USDT": 100.0, "ETH/USDT": 100.0})
+    executor = OrderExecutor(exchange, dry_run=False, db_path=db_path)
+    first = executor.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0))])
+    old_ids = [result["orderId"] for result in first[0]["bracket_results"]]
+    assert exchange.open_order_requests == []  # Пока ничего не отслеживается - запрос не нужен
+    executor.close()
+
+    # После перезапуска прежняя пара снимается и заменяется одной на всю позицию
+    restarted = OrderExecutor(exchange, dry_run=False, db_path=db_path)
+    second = restarted.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0))])
+    assert exchange.cancelled == old_ids
+    assert [order["quantity"] for order in second[0]["brackets"]] == ["10", "10"]
+    # Отслеживается один символ - открытые ордера запрашиваются только по нему
+    assert exchange.open_order_requests[-1] == {"symbol": "BTCUSDT"}
+    requests = len(exchange.open_order_requests)
+    assert restarted.reconcile() == []  # Цикл без сигналов сразу после сверки
+    assert len(exchange.open_order_requests) == requests
+    restarted.close()
+
+
+def test_cycle_signals_share_the_free_margin():
+    exchange = MockFuturesExchange({"BTC/USDT": 100.0, "ETH/USDT": 100.0}, free_margin=1000.0)
+    executor = OrderExecutor(exchange, dry_run=False)
+    plans = executor.execute([("BTC/USDT", make_signal("ПОКУПКА", 100.0)),
+                              ("ETH/USDT", make_signal("ПОКУПКА", 100.0))])
+    executor.close()
+
+    # Второй вход считается от 900 USDT, оставшихся после первого
+    assert [plan["entry"]["quantity"] for plan in plans] == ["5", "4.5"]
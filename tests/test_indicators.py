@@ -0,0 +1,40 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bot.data.synthetic import generate_ohlcv
+from bot.indicators import kernels
+from bot.indicators.indicators import add_indicators
+
+
+def make_frame(bars, seed=3):
+    raw = generate_ohlcv(bars, seed=seed)
+    return pd.DataFrame(raw, columns=["timestamp", "open", "high", "low", "close", "volume"])
+
+
+@pytest.mark.parametrize("bars", [120, 3000])
+def test_fast_backend_matches_ta(bars):
+    df = make_frame(bars)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # ta делит 0/0 в ADX
+        expected = add_indicators(df.copy(), backend="ta")
+    result = add_indicators(df.copy(), backend="fast")
+
+    assert list(result.columns) == list(expected.columns)
+    for column in expected.columns:
+        np.testing.assert_allclose(result[column].to_numpy(float), expected[column].to_numpy(float),
+                                   rtol=1e-7, atol=1e-9, err_msg=column)
+
+
+def test_numpy_recursion_matches_loop():
+    x = np.random.default_rng(0).normal(size=5000)
+    for a in (0.0, 0.5, 13 / 14, 1.0):
+        np.testing.assert_allclose(kernels._recurse_numpy(x, a, 2.0), kernels._recurse_loop(x, a, 2.0),
+                                   rtol=1e-9, atol=1e-9)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        add_indicators(make_frame(50), backend="talib")
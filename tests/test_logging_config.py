@@ -0,0 +1,37 @@
+import json
+import logging
+import os
+
+from bot.logging_config import DatedRotatingFileHandler, JsonFormatter, _ContextFilter, log_context
+
+
+def make_record(msg, *args):
+    return logging.LogRecord("bot.test", logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_json_records_carry_cycle_and_symbol():
+    context_filter = _ContextFilter()
+    with log_context(cycle=7, symbol="BTC/USDT"):
+        record = make_record("RSI %.1f", 28.123)
+        context_filter.filter(record)
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["msg"] == "RSI 28.1"
+    assert payload["cycle"] == 7
+    assert payload["symbol"] == "BTC/USDT"
+
+    outside = make_record("no context")
+    context_filter.filter(outside)
+    assert "symbol" not in json.loads(JsonFormatter().format(outside))
+
+
+def test_dated_file_handler_writes_to_date_named_file(tmp_path):
+    handler = DatedRotatingFileHandler(str(tmp_path), "futures_analysis_{date}.log", max_bytes=0)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.emit(make_record("hello"))
+    handler.close()
+
+    files = os.listdir(tmp_path)
+    assert len(files) == 1
+    assert files[0].startswith("futures_analysis_") and files[0].endswith(".log")
+    assert (tmp_path / files[0]).read_text(encoding="utf-8") == "hello\n"
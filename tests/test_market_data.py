@@ -0,0 +1,100 @@
+from bot.core.strategy import market_allows
+from bot.data.market_data import MarketDataFeed, book_features
+
+
+class FakeExchange:
+    """Биржа с индексом премии, открытым интересом и стаканом"""
+
+    def __init__(self):
+        self.calls = {"premium": 0, "open_interest": 0, "book": 0}
+        self.open_interest = {"BTCUSDT": 1000.0, "ETHUSDT": 500.0}
+
+    def market(self, symbol):
+        return {"id": symbol.split(":")[0].replace("/", "")}
+
+    def fapiPublicGetPremiumIndex(self):
+        self.calls["premium"] += 1
+        return [
+            {"symbol": "BTCUSDT", "markPrice": "100.5", "indexPrice": "100.0",
+             "lastFundingRate": "0.0001", "nextFundingTime": "1700000000000"},
+            {"symbol": "ETHUSDT", "markPrice": "10.0", "indexPrice": "10.0",
+             "lastFundingRate": "-0.001", "nextFundingTime": "1700000000000"},
+            {"symbol": "XRPUSDT", "markPrice": "1.0", "indexPrice": "1.0",
+             "lastFundingRate": "0.0", "nextFundingTime": "0"},
+        ]
+
+    def fapiPublicGetOpenInterest(self, params):
+        self.calls["open_interest"] += 1
+        return {"symbol": params["symbol"], "openInterest": str(self.open_interest[params["symbol"]])}
+
+    def fetch_order_book(self, symbol, limit=None):
+        self.calls["book"] += 1
+        return {"bids": [[99.0, 3.0], [98.0, 1.0]], "asks": [[101.0, 1.0]]}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_book_features():
+    features = book_features({"bids": [[99.0, 1.0]], "asks": [[101.0, 1.0]]})
+    assert features["book_imbalance"] == -1 / 100
+    assert features["spread_pct"] == 2.0
+
+
+def test_refresh_uses_one_bulk_request_and_ttls():
+    exchange = FakeExchange()
+    clock = Clock()
+    feed = MarketDataFeed(exchange, funding_ttl=120, open_interest_ttl=60, book_ttl=10, clock=clock)
+    symbols = ["BTC/USDT:USDT", "ETH/USDT:USDT"]
+
+    market = feed.refresh(symbols)
+    assert exchange.calls == {"premium": 1, "open_interest": 2, "book": 2}
+    btc = market["BTC/USDT:USDT"]
+    assert btc["funding_rate"] == 0.0001
+    assert round(btc["basis_pct"], 6) == 0.5
+    assert btc["open_interest"] == 1000.0
+    assert btc["open_interest_change_pct"] is None
+    assert btc["book_imbalance"] > 0
+
+    # Внутри TTL повторных запросов нет
+    feed.refresh(symbols)
+    assert exchange.calls == {"premium": 1, "open_interest": 2, "book": 2}
+
+    # Через минуту истекли стакан и открытый интерес, но не индекс премии
+    clock.now = 60
+    exchange.open_interest["BTCUSDT"] = 1100.0
+    market = feed.refresh(symbols)
+    assert exchange.calls == {"premium": 1, "open_interest": 4, "book": 4}
+    assert round(market["BTC/USDT:USDT"]["open_interest_change_pct"], 6) == 10.0
+    feed.close()
+
+
+def test_symbols_missing_from_premium_index_respect_the_ttl():
+    exchange = FakeExchange()
+    exchange.open_interest["DELISTEDUSDT"] = 1.0
+    clock = Clock()
+    feed = MarketDataFeed(exchange, funding_ttl=120, clock=clock)
+    symbols = ["BTC/USDT:USDT", "DELISTED/USDT:USDT"]
+
+    market = feed.refresh(symbols)
+    assert market["DELISTED/USDT:USDT"]["funding_rate"] is None
+    assert market["DELISTED/USDT:USDT"]["open_interest"] == 1.0
+    clock.now = 60
+    feed.refresh(symbols)
+    assert exchange.calls["premium"] == 1  # Символа нет в индексе, но запрос не повторяется каждый цикл
+    clock.now = 120
+    feed.refresh(symbols)
+    assert exchange.calls["premium"] == 2
+    feed.close()
+
+
+def test_market_filters():
+    assert market_allows("ПОКУПКА", None)
+    assert not market_allows("ПОКУПКА", {"funding_rate": 0.001, "book_imbalance": 0.0})
+    assert market_allows("ПРОДАЖА", {"funding_rate": 0.001, "book_imbalance": 0.0})
+    assert not market_allows("ПРОДАЖА", {"funding_rate": None, "book_imbalance": 0.5})
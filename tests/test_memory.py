@@ -0,0 +1,82 @@
+import logging
+import os
+import tracemalloc
+
+from bot.core.correlation import SignalClusterer
+from bot.monitoring.memory import BoundedCache, MemoryGuard, prune_directory, rss_bytes
+from bot.monitoring.metrics import render_metrics
+
+
+def test_bounded_cache_evicts_least_recently_written():
+    cache = BoundedCache(2, name="test")
+    cache["a"] = 1
+    cache["b"] = 2
+    cache["a"] = 3  # Перезапись освежает ключ
+    cache["c"] = 4
+
+    assert list(cache) == ["a", "c"]
+    assert cache["a"] == 3
+    assert 'bot_cache_evictions_total{cache="test"}' in render_metrics()
+
+
+def test_prune_directory_keeps_newest(tmp_path):
+    for i in range(5):
+        path = tmp_path / f"chart_{i}.png"
+        path.write_bytes(b"")
+        os.utime(path, (i, i))
+    (tmp_path / "notes.txt").write_text("")
+
+    assert prune_directory(str(tmp_path), 2, "*.png") == 3
+    assert sorted(os.listdir(tmp_path)) == ["chart_3.png", "chart_4.png", "notes.txt"]
+
+
+def test_guard_traces_only_after_growth(caplog, tmp_path):
+    readings = iter([100, 110, 400, 410, 420])
+    guard = MemoryGuard(every=2, growth_mb=50, rss=lambda: next(readings) * 1024 * 1024,
+                        tracemalloc_always=False, charts_dir=str(tmp_path))
+    leak = []
+    with caplog.at_level(logging.WARNING, logger="bot.monitoring.memory"):
+        assert guard.check(1) is None  # Не кратно every
+        guard.check(2)
+        guard.check(4)
+        assert not tracemalloc.is_tracing()
+
+        guard.check(6)  # +300 MB от базовой линии - включается трассировка
+        assert tracemalloc.is_tracing()
+        leak.extend(bytearray(1024) for _ in range(2000))
+        guard.check(8)  # Окно закончилось - diff в лог, трассировка выключена
+        assert not tracemalloc.is_tracing()
+        guard.check(10)
+
+    messages = "\n".join(record.getMessage() for record in caplog.records)
+    assert "RSS grew from 100 MB to 400 MB" in messages
+    assert "Allocation growth since the memory baseline" in messages
+    assert "test_memory.py" in messages
+    assert messages.count("RSS grew") == 1
+    assert "bot_memory_top_allocator_bytes{rank=\"1\"" in render_metrics()
+
+
+def test_rss_bytes_is_positive():
+    assert rss_bytes() > 0
+
+
+def test_clusterer_publishes_overflow_immediately():
+    published = []
+    clusterer = SignalClusterer(publish=lambda symbol, *rest: published.append(symbol), max_pending=2)
+    for symbol in ["A", "B", "C"]:
+        clusterer.collect(symbol, {"signal": "ПОКУПКА"}, 0, "", None)
+
+    assert published == ["A"]
+    assert [entry[0] for entry in clusterer._pending] == ["B", "C"]
+
+
+def test_guard_prunes_charts_of_every_format(tmp_path):
+    for i, extension in enumerate(["png", "jpg", "webp", "jpg", "webp"]):
+        path = tmp_path / f"chart_{i}.{extension}"
+        path.write_bytes(b"")
+        os.utime(path, (i, i))
+    (tmp_path / "notes.txt").write_text("")
+    guard = MemoryGuard(every=1, growth_mb=10 ** 6, rss=lambda: 1, charts_dir=str(tmp_path), max_charts=2)
+    guard.check(1)
+
+    assert sorted(os.listdir(tmp_path)) == ["chart_3.jpg", "chart_4.webp", "notes.txt"]
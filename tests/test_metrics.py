@@ -0,0 +1,34 @@
+import urllib.request
+
+from bot.monitoring.metrics import MetricsRegistry, start_metrics_server
+
+
+def test_histogram_and_counter_render():
+    registry = MetricsRegistry()
+    latency = registry.histogram("fetch_seconds", "Fetch latency", labels=("symbol",), buckets=(0.1, 1.0))
+    errors = registry.counter("api_errors_total", "API errors", labels=("symbol",))
+
+    latency.observe(0.05, symbol="BTC/USDT")
+    latency.observe(0.5, symbol="BTC/USDT")
+    latency.observe(5.0, symbol="BTC/USDT")
+    errors.inc(symbol="ETH/USDT")
+
+    text = registry.render()
+    assert "# TYPE fetch_seconds histogram" in text
+    assert 'fetch_seconds_bucket{symbol="BTC/USDT",le="0.1"} 1' in text
+    assert 'fetch_seconds_bucket{symbol="BTC/USDT",le="1.0"} 2' in text
+    assert 'fetch_seconds_bucket{symbol="BTC/USDT",le="+Inf"} 3' in text
+    assert 'fetch_seconds_count{symbol="BTC/USDT"} 3' in text
+    assert 'api_errors_total{symbol="ETH/USDT"} 1.0' in text
+
+
+def test_metrics_endpoint_serves_default_registry():
+    server = start_metrics_server(0)
+    try:
+        port = server.server_port
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode("utf-8")
+        assert response.status == 200
+        assert "# TYPE bot_stage_seconds histogram" in body
+    finally:
+        server.shutdown()
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+
+from bot.core.paper_trading import CLOSED_DTYPE, PaperPositionBook
+
+
+def make_signal(side, price, stop_loss, take_profit):
+    return {
+        "signal": side,
+        "price": price,
+        "stop_loss": stop_loss,
+        "take_profit": take_profit,
+        "position_size": 0.5,
+        "leverage": 5
+    }
+
+
+def test_long_and_short_exits():
+    book = PaperPositionBook()
+    book.open_position("BTC/USDT", make_signal("ПОКУПКА", 100, 98, 106), opened_at=0)
+    book.open_position("ETH/USDT", make_signal("ПРОДАЖА", 10, 10.2, 9.4), opened_at=0)
+    book.open_position("SOL/USDT", make_signal("ПОКУПКА", 50, 49, 53), opened_at=0)
+
+    # Свеча входа не проверяется
+    closed = book.update(["BTC/USDT", "ETH/USDT"], [200, 200], [1, 1], [0, 0])
+    assert len(closed) == 0
+
+    closed = book.update(["BTC/USDT", "ETH/USDT", "SOL/USDT"],
+                         [107, 10.1, 50.5], [99, 9.3, 49.5], [300, 300, 300])
+    assert sorted(closed["symbol"]) == ["BTC/USDT", "ETH/USDT"]
+    assert set(closed["reason"]) == {"TP"}
+    assert np.allclose(sorted(closed["pnl_pct"]), [30.0, 30.0])
+    assert list(book.positions["symbol"]) == ["SOL/USDT"]
+
+
+def test_stop_loss_wins_when_both_levels_touched():
+    book = PaperPositionBook()
+    book.open_position("BTC/USDT", make_signal("ПОКУПКА", 100, 98, 106), opened_at=0)
+    closed = book.update(["BTC/USDT"], [110], [90], [60])
+    assert closed["reason"][0] == "SL"
+    assert np.isclose(closed["pnl_pct"][0], -10.0)
+
+
+def test_many_positions_and_restart(tmp_path):
+    state_path = str(tmp_path / "paper.npz")
+    book = PaperPositionBook()
+    symbols = [f"S{i}/USDT" for i in range(5000)]
+    for symbol in symbols:
+        book.open_position(symbol, make_signal("ПОКУПКА", 100, 98, 106), opened_at=0)
+
+    book.state_path = state_path
+    highs = np.where(np.arange(5000) % 2 == 0, 107.0, 101.0)
+    closed = book.update(symbols, highs, np.full(5000, 99.0), np.full(5000, 60.0))
+    assert len(closed) == 2500
+
+    restored = PaperPositionBook(state_path)
+    assert len(restored.positions) == 2500
+    assert len(restored.closed) == 2500
+    assert np.isclose(restored.realized_pnl, book.realized_pnl)
+
+
+def test_closed_trades_are_appended_not_rewritten(tmp_path):
+    state_path = str(tmp_path / "paper.npz")
+    book = PaperPositionBook(state_path)
+    for symbol in ("A/USDT", "B/USDT"):
+        book.open_position(symbol, make_signal("ПОКУПКА", 100, 98, 106), opened_at=0)
+    book.update(["A/USDT"], [107.0], [99.0], [60.0])
+    book.update(["B/USDT"], [101.0], [97.0], [60.0])
+
+    with np.load(state_path) as state:
+        assert state.files == ["positions"] and len(state["positions"]) == 0
+    assert os.path.getsize(book.closed_path) == 2 * CLOSED_DTYPE.itemsize
+    with open(book.closed_path, "ab") as f:
+        f.write(b"\0" * 10)  # Обрывок записи при аварийной остановке
+
+    restored = PaperPositionBook(state_path)
+    assert restored.closed["symbol"].tolist() == ["A/USDT", "B/USDT"]
+    assert np.isclose(restored.realized_pnl, book.realized_pnl)
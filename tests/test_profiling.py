@@ -0,0 +1,31 @@
+import glob
+import time
+
+from bot.monitoring.profiling import CycleProfiler, summarize_profiles
+
+
+def busy_analysis(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+
+def test_slow_cycle_writes_collapsed_stacks(tmp_path):
+    profiler = CycleProfiler(threshold=0.1, interval=0.002, directory=str(tmp_path), max_dumps=2)
+
+    with profiler.profile_cycle(cycle=1):
+        busy_analysis(0.02)
+    assert glob.glob(str(tmp_path / "*.folded")) == []
+
+    for cycle in (2, 3, 4):
+        with profiler.profile_cycle(cycle=cycle):
+            busy_analysis(0.15)
+    dumps = sorted(glob.glob(str(tmp_path / "*.folded")))
+    assert len(dumps) == 2  # Старые профили удаляются
+
+    samples, rows = summarize_profiles(dumps, top=3)
+    assert samples > 10
+    assert any(function.startswith("busy_analysis") for function, _, _ in rows)
+    assert all(";" not in function for function, _, _ in rows)
@@ -0,0 +1,100 @@
+import ccxt
+import numpy as np
+import pytest
+
+from bot.data.synthetic import DEFAULT_START_MS, TIMEFRAME_MS
+from bot.notifications import notifier
+from bot.replay import FakeExchange, ReplayClock, TelegramStub, load_archive
+from bot.replay.harness import run_replay
+
+STEP = TIMEFRAME_MS["5m"]
+
+
+def test_fake_exchange_only_returns_candles_before_clock():
+    clock = ReplayClock(speed=0)
+    exchange = FakeExchange(["BTC/USDT"], clock=clock, warmup_bars=100)
+
+    ohlcv = exchange.fetch_ohlcv("BTC/USDT", limit=50)
+    assert len(ohlcv) == 50
+    assert ohlcv[-1][0] == DEFAULT_START_MS
+    assert isinstance(ohlcv[-1][0], int)
+
+    clock.advance(STEP * 3 / 1000)
+    assert exchange.fetch_ohlcv("BTC/USDT", limit=50)[-1][0] == DEFAULT_START_MS + 3 * STEP
+    assert len(exchange.fetch_ohlcv("BTC/USDT")) == 104
+
+
+def test_fake_exchange_is_deterministic_per_seed():
+    first = FakeExchange(["ETH/USDT"], clock=ReplayClock(speed=0)).fetch_ohlcv("ETH/USDT", limit=10)
+    second = FakeExchange(["ETH/USDT"], clock=ReplayClock(speed=0)).fetch_ohlcv("ETH/USDT", limit=10)
+    other = FakeExchange(["ETH/USDT"], clock=ReplayClock(speed=0), seed=7).fetch_ohlcv("ETH/USDT", limit=10)
+    assert first == second
+    assert first != other
+
+
+def test_fake_exchange_injects_errors_and_rate_limit():
+    exchange = FakeExchange(["BTC/USDT"], clock=ReplayClock(speed=0), error_rate=0.5, seed=1)
+    failures = 0
+    for _ in range(200):
+        try:
+            exchange.fetch_ohlcv("BTC/USDT", limit=5)
+        except ccxt.NetworkError:
+            failures += 1
+    assert 60 < failures < 140
+    assert exchange.errors["NetworkError"] == failures
+    assert len(exchange.request_seconds) == 200
+
+    limited = FakeExchange(["BTC/USDT"], clock=ReplayClock(speed=0), rate_limit=3)
+    for _ in range(3):
+        limited.fetch_ohlcv("BTC/USDT", limit=5)
+    with pytest.raises(ccxt.RateLimitExceeded):
+        limited.fetch_ohlcv("BTC/USDT", limit=5)
+
+
+def test_fake_exchange_account_calls():
+    exchange = FakeExchange(["BTC/USDT"], free_margin=500.0)
+    markets = exchange.load_markets()
+    assert markets["BTC/USDT"]["id"] == "BTCUSDT"
+    assert exchange.fetch_balance()["USDT"]["free"] == 500.0
+    exchange.set_leverage(5, "BTC/USDT")
+    assert exchange.leverage == {"BTC/USDT": 5}
+
+
+def test_load_archive(tmp_path):
+    rows = np.column_stack([DEFAULT_START_MS + np.arange(3) * STEP, np.ones((3, 5))])
+    np.savetxt(tmp_path / "BTC_USDT.csv", rows, delimiter=",", header="timestamp,open,high,low,close,volume",
+               comments="")
+    archive = load_archive(tmp_path)
+    assert list(archive) == ["BTC/USDT"]
+
+    clock = ReplayClock(DEFAULT_START_MS + STEP, speed=0)
+    exchange = FakeExchange(["BTC/USDT"], clock=clock, archive=archive)
+    assert [row[0] for row in exchange.fetch_ohlcv("BTC/USDT")] == [DEFAULT_START_MS, DEFAULT_START_MS + STEP]
+
+
+def test_telegram_stub_records_notifier_sends(tmp_path):
+    image = tmp_path / "chart.png"
+    image.write_bytes(b"x" * 128)
+    previous = notifier._api_url
+    with TelegramStub() as stub:
+        notifier.set_api_url(stub.url)
+        try:
+            notifier.send_telegram_message("*BTC/USDT* ПОКУПКА", str(image))
+        finally:
+            notifier.set_api_url(previous)
+    assert stub.messages() == ["*BTC/USDT* ПОКУПКА"]
+    assert [(method, fields.get("photo")) for _, method, fields in stub.deliveries] == [
+        ("sendMessage", None), ("sendPhoto", 128)
+    ]
+
+
+def test_replay_runs_bot_loop_with_stepped_clock():
+    symbols = ["AAA/USDT", "BBB/USDT"]
+    exchange = FakeExchange(symbols, clock=ReplayClock(speed=0))
+    report = run_replay(symbols, cycles=2, speed=0, exchange=exchange, timeout=120)
+
+    assert report["metadata"]["cycles"] == 2
+    assert report["requests"] == 4
+    assert report["market_s"] == 120
+    assert report["symbols_per_s"] > 0
+    assert set(report["cycle"]) == {"p50_s", "p95_s", "p99_s", "max_s"}
@@ -0,0 +1,152 @@
+import threading
+import time
+
+import ccxt
+import pytest
+
+from bot.data import data_fetch, resilience
+from bot.data.data_fetch import fetch_ohlcv
+from bot.data.resilience import CLOSED, HALF_OPEN, OPEN, CallTimeout, CircuitBreaker, Endpoint, call_with_deadline
+from bot.data.synthetic import StubExchange
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyExchange(StubExchange):
+    """StubExchange whose fetch_ohlcv fails or stalls on demand"""
+
+    def __init__(self):
+        super().__init__(history_bars=200, seed=3)
+        self.fail = False
+        self.delay = 0.0
+        self.calls = 0
+
+    def fetch_ohlcv(self, *args, **kwargs):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise ccxt.NetworkError("down")
+        return super().fetch_ohlcv(*args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fresh_endpoints(monkeypatch):
+    resilience._endpoints.clear()
+    data_fetch._last_candles.clear()
+    monkeypatch.setattr(data_fetch, "FETCH_RETRY_DELAY", 0.01)
+    yield
+    resilience._endpoints.clear()
+
+
+def test_circuit_opens_probes_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Только один пробный запрос
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_call_with_deadline_times_out_and_hedges():
+    with pytest.raises(CallTimeout):
+        call_with_deadline(lambda: time.sleep(0.5), time.monotonic() + 0.05)
+
+    calls = []
+    lock = threading.Lock()
+
+    def slow_first():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        time.sleep(1.0 if first else 0.01)
+        return "first" if first else "hedge"
+
+    start = time.monotonic()
+    assert call_with_deadline(slow_first, start + 2.0, hedge_after=0.05) == "hedge"
+    assert time.monotonic() - start < 0.5
+
+    with pytest.raises(ZeroDivisionError):
+        call_with_deadline(lambda: 1 / 0, time.monotonic() + 1.0)
+
+
+def test_endpoint_hedges_after_recent_percentile():
+    endpoint = Endpoint("test", hedge=True, hedge_min_delay=0.1)
+    assert endpoint.hedge_delay() is None
+    for _ in range(50):
+        endpoint.latency.observe(0.3)
+    assert endpoint.hedge_delay() == pytest.approx(0.3)
+    assert Endpoint("plain", hedge=False).hedge_delay() is None
+
+
+def test_fetch_serves_stale_candles_after_failure():
+    exchange = FlakyExchange()
+    fresh = fetch_ohlcv("BTC/USDT", exchange, "5m", limit=100)
+    assert not fresh.attrs.get("stale")
+
+    exchange.fail = True
+    stale = fetch_ohlcv("BTC/USDT", exchange, "5m", limit=100)
+    assert stale.attrs["stale"]
+    assert stale["close"].tolist() == fresh["close"].tolist()
+
+    with pytest.raises(ccxt.NetworkError):
+        fetch_ohlcv("ETH/USDT", exchange, "5m", limit=100)
+
+
+def test_fetch_respects_deadline_and_open_circuit():
+    exchange = FlakyExchange()
+    fetch_ohlcv("BTC/USDT", exchange, "5m", limit=100)
+
+    exchange.delay = 0.5
+    start = time.monotonic()
+    df = fetch_ohlcv("BTC/USDT", exchange, "5m", limit=100, deadline=start + 0.1)
+    assert df.attrs["stale"]
+    assert time.monotonic() - start < 0.4
+
+    exchange.delay = 0.0
+    exchange.fail = True
+    for _ in range(5):
+        fetch_ohlcv("BTC/USDT", exchange, "5m", limit=100)
+    calls = exchange.calls
+    assert fetch_ohlcv("BTC/USDT", exchange, "5m", limit=100).attrs["stale"]
+    assert exchange.calls == calls  # Цепь разомкнута - запрос не отправлялся
+    with pytest.raises(ccxt.ExchangeNotAvailable):
+        fetch_ohlcv("ETH/USDT", exchange, "5m", limit=100)
+
+
+def test_cycle_budget_misses_do_not_open_circuit():
+    exchange = FlakyExchange()
+    symbols = [f"S{i}/USDT" for i in range(8)]
+    for symbol in symbols:
+        fetch_ohlcv(symbol, exchange, "5m", limit=100)
+    calls = exchange.calls
+
+    past = time.monotonic() - 1.0
+    for symbol in symbols:
+        assert fetch_ohlcv(symbol, exchange, "5m", limit=100, deadline=past).attrs["stale"]
+    assert exchange.calls == calls  # Срок прошел - запросы не отправлялись
+
+    exchange.delay = 0.2
+    for symbol in symbols[:6]:
+        assert fetch_ohlcv(symbol, exchange, "5m", limit=100, deadline=time.monotonic() + 0.02).attrs["stale"]
+    assert resilience.endpoint("fetch_ohlcv").breaker.state == CLOSED
+
+    exchange.delay = 0.0
+    assert not fetch_ohlcv("S0/USDT", exchange, "5m", limit=100).attrs.get("stale")
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bot.config import RSI_OVERSOLD
+from bot.core.rules import RuleError, compile_rule, compile_rules, first_match, signal_mask
+
+
+def frame(**columns):
+    return pd.DataFrame({name: np.asarray(values, dtype=float) for name, values in columns.items()})
+
+
+def test_chained_comparison_and_constants():
+    rule = compile_rule("ema8 > ema13 > ema21 and rsi < RSI_OVERSOLD")
+    df = frame(ema8=[3, 3, 1, 3], ema13=[2, 2, 2, 2], ema21=[1, 1, 3, 1], rsi=[20, 50, 20, np.nan])
+
+    assert rule.columns == {"ema8", "ema13", "ema21", "rsi"}
+    assert rule.constants == {"RSI_OVERSOLD"}
+    assert rule.evaluate(df).tolist() == [True, False, False, False]
+    assert rule.evaluate(df, {"RSI_OVERSOLD": 60}).tolist() == [True, True, False, False]
+    assert rule.params() == {"RSI_OVERSOLD": RSI_OVERSOLD}
+
+
+def test_shift_mean_and_lookback():
+    rule = compile_rule("mean(volume, 2) > shift(mean(volume, 2), 2)")
+    assert rule.lookback == 3
+    df = frame(volume=[1, 1, 1, 5, 5, 1])
+    assert rule.evaluate(df).tolist() == [False, False, False, True, True, False]
+
+    assert compile_rule("close > shift(close)").lookback == 1
+    assert compile_rule("-close < 0 or not close * 2 / 4 + 1 - 1 == 0").evaluate(frame(close=[1, 0])).tolist() == [
+        True, False
+    ]
+
+
+def test_evaluate_last_reads_only_the_tail():
+    rule = compile_rule("mean(volume, 5) > shift(mean(volume, 5), 5)")
+    volume = np.random.default_rng(0).lognormal(size=200)
+    df = frame(volume=volume)
+    full = rule.evaluate(df)
+    for end in range(10, 200, 17):
+        assert rule.evaluate_last(df.iloc[:end]) == full[end - 1]
+    assert rule.evaluate_last(df.iloc[:0]) is False
+
+
+def test_leading_nans_do_not_poison_later_windows():
+    rule = compile_rule("mean(rsi, 3) > 10")
+    df = frame(rsi=[np.nan] + [50] * 9)
+    full = rule.evaluate(df)
+
+    assert full.tolist() == [False] * 3 + [True] * 7
+    for end in range(1, 11):
+        assert rule.evaluate_last(df.iloc[:end]) == full[end - 1]
+
+
+def test_invalid_rules():
+    with pytest.raises(RuleError):
+        compile_rule("rsi <")
+    with pytest.raises(RuleError, match="Unknown constant"):
+        compile_rule("rsi < NO_SUCH_SETTING")
+    with pytest.raises(RuleError, match="Unsupported call"):
+        compile_rule("__import__('os')")
+    with pytest.raises(RuleError):
+        compile_rule("rsi.real > 1")
+    with pytest.raises(RuleError, match="positive integer"):
+        compile_rule("mean(rsi, 0) > 1")
+    with pytest.raises(RuleError, match="missing columns"):
+        compile_rule("stoch_k > 1").evaluate(frame(rsi=[1]))
+
+
+def test_compile_once_and_first_match_order():
+    assert compile_rule("rsi > 1") is compile_rule("rsi > 1")
+    compiled = compile_rules({"ПОКУПКА": "rsi < 50", "ПРОДАЖА": "rsi < 80"})
+    df = frame(rsi=[40, 60, 90])
+
+    assert signal_mask(compiled, df).tolist() == ["ПОКУПКА", "ПРОДАЖА", None]
+    assert first_match(compiled, df.iloc[:1]) == "ПОКУПКА"
+    assert first_match(compiled, df.iloc[:1], allows=lambda direction: direction != "ПОКУПКА") == "ПРОДАЖА"
+    assert first_match(compiled, df) is None
+
+
+def test_generate_signal_matches_backtest_mask():
+    from bot.core.backtest import _prepare
+    from bot.core.strategy import generate_signal
+    from bot.data.data_fetch import fetch_ohlcv
+    from bot.data.synthetic import StubExchange
+
+    df = _prepare(fetch_ohlcv("BTC/USDT", StubExchange(history_bars=600, seed=5), "5m", limit=600))
+    mask = signal_mask(compile_rules(), df)
+    for end in range(len(df) - 40, len(df) + 1):
+        signal = generate_signal("BTC/USDT", df.iloc[:end])
+        assert (signal["signal"] if signal else None) == mask[end - 1]
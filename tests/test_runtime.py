@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+
+from bot.core.runtime import BotRuntime
+
+
+def test_runtime_starts_once_and_restarts_failed_loop():
+    calls = []
+    release = threading.Event()
+
+    def target():
+        calls.append(time.time())
+        if len(calls) < 3:
+            raise RuntimeError("boom")
+        release.wait(5)
+
+    runtime = BotRuntime(mode="thread", lock_file="", backoff=0.01, max_backoff=0.05, target=target)
+    assert runtime.start()
+    assert not runtime.start()
+
+    deadline = time.time() + 5
+    while len(calls) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+
+    status = runtime.snapshot()
+    assert len(calls) == 3
+    assert status["restarts"] == 2
+    assert status["state"] == "running"
+    assert "boom" in status["last_error"]
+
+    release.set()
+    runtime.stop(timeout=5)
+    assert runtime.snapshot()["state"] == "stopped"
+
+
+def test_host_lock_allows_single_runtime(tmp_path):
+    lock_file = str(tmp_path / "bot.lock")
+    release = threading.Event()
+    first = BotRuntime(mode="thread", lock_file=lock_file, target=lambda: release.wait(5))
+    second = BotRuntime(mode="thread", lock_file=lock_file, target=lambda: release.wait(5))
+
+    assert first.start()
+    assert not second.start()
+    assert second.state == "standby"
+
+    release.set()
+    first.stop(timeout=5)
+    second.stop(timeout=5)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_standby_serves_holder_status_and_takes_over(tmp_path):
+    lock_file = str(tmp_path / "bot.lock")
+    first_release = threading.Event()
+    second_release = threading.Event()
+    second_started = threading.Event()
+
+    def second_target():
+        second_started.set()
+        second_release.wait(5)
+
+    first = BotRuntime(mode="thread", lock_file=lock_file, target=lambda: first_release.wait(5), lock_retry=0.02)
+    second = BotRuntime(mode="thread", lock_file=lock_file, target=second_target, lock_retry=0.02)
+
+    assert first.start()
+    assert not second.start()
+    assert wait_for(lambda: second.snapshot()["state"] == "running")
+    status = second.snapshot()
+    assert status["started_at"] == first.started_at and not status["stale"]
+    assert "status_at" in status and "standby_pid" in status
+
+    first_release.set()
+    first.stop(timeout=5)
+    assert second_started.wait(5)  # Процесс в standby сам захватил блокировку после ухода владельца
+    assert wait_for(lambda: second.snapshot()["state"] == "running")
+    assert "standby_pid" not in second.snapshot()
+    assert not first.start()  # Теперь standby уже бывший владелец
+    assert first.state == "standby"
+    first.stop(timeout=5)
+    second_release.set()
+    second.stop(timeout=5)
+
+
+def test_standby_marks_old_holder_status_stale(tmp_path):
+    lock_file = str(tmp_path / "bot.lock")
+    release = threading.Event()
+    holder = BotRuntime(mode="thread", lock_file=lock_file, target=lambda: release.wait(5), status_interval=10)
+    standby = BotRuntime(mode="thread", lock_file=lock_file, target=lambda: None, status_interval=10)
+
+    assert holder.start()
+    assert not standby.start()
+    assert wait_for(lambda: standby.snapshot()["state"] == "running")
+    assert not standby.snapshot()["stale"]
+    # Владелец завис и больше не обновляет статус
+    with open(f"{lock_file}.status", "w") as handle:
+        json.dump({"state": "running", "status_at": time.time() - 60}, handle)
+    assert standby.snapshot()["stale"]
+
+    release.set()
+    standby.stop(timeout=5)
+    holder.stop(timeout=5)
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from bot.config import RSI_OVERSOLD
+from bot.core.scheduler import AdaptiveScheduler, activity_score
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def indicators(rsi=50.0, atr=1.0, bb_width=0.02, volume_ratio=1.0, bars=50):
+    df = pd.DataFrame({
+        "close": np.full(bars, 100.0),
+        "atr": np.full(bars, 1.0),
+        "bb_width": np.full(bars, 0.02),
+        "volume_ratio": np.full(bars, 1.0),
+        "rsi": np.full(bars, 50.0)
+    })
+    df.loc[bars - 1, ["rsi", "atr", "bb_width", "volume_ratio"]] = [rsi, atr, bb_width, volume_ratio]
+    return df
+
+
+def test_activity_score():
+    assert activity_score(indicators()) == 0.0
+    assert activity_score(indicators(rsi=RSI_OVERSOLD)) == 1.0
+    assert activity_score(indicators(rsi=RSI_OVERSOLD - 5)) == 1.0
+    assert activity_score(indicators(rsi=RSI_OVERSOLD + 5), rsi_band=10) == 0.5
+    # ATR, ширина полос и объем вдвое выше обычного
+    assert activity_score(indicators(atr=2.2, bb_width=0.044, volume_ratio=2.2)) == 1.0
+    assert activity_score(indicators(rsi=np.nan)) == 0.0
+
+
+def test_interval_follows_score():
+    scheduler = AdaptiveScheduler(min_interval=15, max_interval=240)
+    assert scheduler.interval_for(0) == 240
+    assert scheduler.interval_for(1) == 15
+    assert scheduler.interval_for(0.5) == 60
+
+
+def test_active_symbols_are_polled_more_often_within_budget():
+    clock = Clock()
+    symbols = [f"S{i}" for i in range(10)]
+    scheduler = AdaptiveScheduler(min_interval=15, max_interval=240, period=60, clock=clock)
+
+    requests = {symbol: 0 for symbol in symbols}
+    for _ in range(720):  # Час тиков по 5 секунд
+        for symbol in scheduler.due(symbols):
+            requests[symbol] += 1
+            scheduler.observe(symbol, indicators(rsi=RSI_OVERSOLD if symbol == "S0" else 50.0))
+        clock.now += 5
+
+    assert requests["S0"] == 240
+    assert all(requests[symbol] == 15 for symbol in symbols[1:])
+    # Фиксированный опрос раз в 60 секунд - 600 запросов
+    assert sum(requests.values()) < 600
+    assert scheduler.snapshot()["S0"]["interval"] == 15
+
+
+def test_budget_defers_the_least_overdue():
+    clock = Clock()
+    scheduler = AdaptiveScheduler(min_interval=10, max_interval=100, budget=4, period=60, clock=clock)
+    symbols = ["A", "B", "C", "D", "E", "F"]
+
+    first = scheduler.due(symbols)
+    assert len(first) == 4
+    assert scheduler.due(symbols) == []  # Бюджет на этот период исчерпан
+
+    clock.now += 15  # Один запрос вернулся в бюджет
+    second = scheduler.due(symbols)
+    assert len(second) == 1 and second[0] not in first
+
+    for symbol in first:
+        scheduler.observe(symbol, indicators(rsi=RSI_OVERSOLD))
+    clock.now += 60
+    assert len(scheduler.due(symbols)) == 4
+
+    scheduler.due(["A"])
+    assert set(scheduler.snapshot()) == {"A"}
+
+
+def test_run_bot_counts_only_ticks_that_analyze_symbols(monkeypatch, tmp_path):
+    from bot.core import main
+
+    due = [[], [], ["AAA/USDT"], [], ["BBB/USDT"]]
+    analyzed, checks, cycles = [], [], []
+
+    class FakeScheduler:
+        observe = None
+
+        def due(self, universe):
+            if len(due) == 1:
+                main.stop_bot()
+            return due.pop(0)
+
+    class FakeGuard:
+        def check(self, cycle):
+            checks.append(cycle)
+
+    monkeypatch.setattr(main, "POLL_ADAPTIVE", True)
+    monkeypatch.setattr(main, "AdaptiveScheduler", FakeScheduler)
+    monkeypatch.setattr(main, "MEMORY_GUARD_ENABLED", True)
+    monkeypatch.setattr(main, "MemoryGuard", FakeGuard)
+    monkeypatch.setattr(main, "SIGNAL_STATE_DB", str(tmp_path / "state.db"))
+    for flag in ("PAPER_TRADING_ENABLED", "EXECUTION_ENABLED", "MARKET_DATA_ENABLED", "PROFILE_ENABLED",
+                 "NOTIFY_DIGEST", "CORRELATION_CLUSTERING", "METRICS_PORT"):
+        monkeypatch.setattr(main, flag, False)
+    monkeypatch.setattr(main, "setup_logging", lambda: None)
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(main, "run_cycle", lambda exchange, symbols, *args, **kwargs: analyzed.append(
+        (args[2], symbols)))
+    before = main.CYCLES._values.get((), 0.0)
+
+    main.run_bot(on_cycle=cycles.append, exchange=object(), symbols=["AAA/USDT", "BBB/USDT"], interval=60)
+
+    assert analyzed == [(1, ["AAA/USDT"]), (2, ["BBB/USDT"])]
+    assert checks == [1, 2] and len(cycles) == 2
+    assert main.CYCLES._values[()] - before == 2
@@ -0,0 +1,51 @@
+from bot.data.screener import load_futures_universe, screen_universe
+
+
+class FakeExchange:
+    """Минимальная биржа с рынками и тикерами для скринера"""
+
+    has = {"fetchBidsAsks": True}
+
+    def __init__(self):
+        self.markets = {
+            "BTC/USDT:USDT": {"swap": True, "linear": True, "quote": "USDT", "settle": "USDT", "active": True},
+            "ETH/USDT:USDT": {"swap": True, "linear": True, "quote": "USDT", "settle": "USDT", "active": True},
+            "XRP/USDT:USDT": {"swap": True, "linear": True, "quote": "USDT", "settle": "USDT", "active": True},
+            "OLD/USDT:USDT": {"swap": True, "linear": True, "quote": "USDT", "settle": "USDT", "active": False},
+            "BTC/USD:BTC": {"swap": True, "linear": False, "quote": "USD", "settle": "BTC", "active": True},
+            "BTC/USDT": {"spot": True, "swap": False, "quote": "USDT", "active": True},
+        }
+        self.requests = 0
+
+    def load_markets(self):
+        return self.markets
+
+    def fetch_tickers(self):
+        self.requests += 1
+        return {
+            "BTC/USDT:USDT": {"quoteVolume": 5e9, "percentage": 3.0, "bid": None, "ask": None},
+            "ETH/USDT:USDT": {"quoteVolume": 2e9, "percentage": -4.0, "bid": None, "ask": None},
+            "XRP/USDT:USDT": {"quoteVolume": 1e3, "percentage": 10.0, "bid": None, "ask": None},
+        }
+
+    def fetch_bids_asks(self):
+        self.requests += 1
+        return {
+            "BTC/USDT:USDT": {"bid": 100.0, "ask": 100.01},
+            "ETH/USDT:USDT": {"bid": 10.0, "ask": 10.5},
+            "XRP/USDT:USDT": {"bid": 1.0, "ask": 1.0001},
+        }
+
+
+def test_universe_contains_only_active_usdt_perpetuals():
+    universe = load_futures_universe(FakeExchange())
+    assert universe == ["BTC/USDT:USDT", "ETH/USDT:USDT", "XRP/USDT:USDT"]
+
+
+def test_screen_universe_filters_volume_and_spread():
+    exchange = FakeExchange()
+    shortlist = screen_universe(exchange, min_quote_volume=1e6,
+                                min_price_change_pct=1.0, max_spread_pct=0.1)
+    # XRP отсеян по объему, ETH - по спреду
+    assert shortlist == ["BTC/USDT:USDT"]
+    assert exchange.requests == 2
@@ -0,0 +1,117 @@
+import queue
+import time
+
+from bot.core.sharding import HashRing, ShardCoordinator, _WorkerStateStore
+from bot.core.signal_state import SignalStateStore
+
+SYMBOLS = [f"SYM{i}/USDT" for i in range(200)]
+
+
+def test_ring_moves_only_the_new_workers_share():
+    ring = HashRing(["shard-0", "shard-1", "shard-2"])
+    before = {symbol: ring.node_for(symbol) for symbol in SYMBOLS}
+    assert all(len(share) > 30 for share in ring.assign(SYMBOLS).values())
+
+    ring.add("shard-3")
+    after = {symbol: ring.node_for(symbol) for symbol in SYMBOLS}
+    moved = [symbol for symbol in SYMBOLS if before[symbol] != after[symbol]]
+    assert all(after[symbol] == "shard-3" for symbol in moved)
+    assert 20 < len(moved) < 90
+
+    ring.remove("shard-3")
+    assert {symbol: ring.node_for(symbol) for symbol in SYMBOLS} == before
+
+
+class FakeProcess:
+    pid = 0
+    exitcode = None
+
+    def is_alive(self):
+        return True
+
+    def join(self, timeout=None):
+        pass
+
+    def terminate(self):
+        pass
+
+
+def make_coordinator(sent):
+    coordinator = ShardCoordinator(state_store=SignalStateStore(cooldown_seconds=60),
+                                   notify=lambda message, chart_path: sent.append(message))
+    coordinator._spawn = lambda name: (FakeProcess(), queue.Queue())
+    return coordinator
+
+
+def test_workers_get_new_assignments_only_when_their_share_changes():
+    coordinator = make_coordinator([])
+    coordinator.symbols = SYMBOLS
+    first = coordinator.add_worker()
+    second = coordinator.add_worker()
+    shares = {name: coordinator._assigned[name] for name in (first, second)}
+    assert sorted(shares[first] + shares[second]) == sorted(SYMBOLS)
+
+    coordinator.remove_worker(second)
+    assert sorted(coordinator._assigned[first]) == sorted(SYMBOLS)
+    # Первый воркер получил: пустое кольцо -> все, половина, снова все
+    assignments = coordinator._workers[first][1]
+    assert [len(assignments.get_nowait()) for _ in range(3)] == [200, len(shares[first]), 200]
+
+
+def test_coordinator_drops_duplicate_alerts_from_handover():
+    sent = []
+    coordinator = make_coordinator(sent)
+    item = {"worker": "shard-0", "symbol": "BTC/USDT", "direction": "ПОКУПКА",
+            "bar_time": "2025-01-01 00:05:00", "message": "buy", "chart_path": None}
+    assert coordinator.deliver(item)
+    assert not coordinator.deliver(dict(item, worker="shard-1"))
+    assert sent == ["buy"]
+
+
+def test_only_sent_signals_are_acknowledged_to_the_worker():
+    outcomes = iter([False, True])
+    coordinator = ShardCoordinator(state_store=SignalStateStore(cooldown_seconds=60),
+                                   notify=lambda message, chart_path: next(outcomes))
+    coordinator._spawn = lambda name: (FakeProcess(), queue.Queue())
+    coordinator.symbols = ["BTC/USDT"]
+    name = coordinator.add_worker()
+    assignments = coordinator._workers[name][1]
+    assignments.get_nowait()
+    item = {"worker": name, "symbol": "BTC/USDT", "direction": "ПОКУПКА",
+            "bar_time": "2025-01-01 00:05:00", "message": "buy", "chart_path": None}
+
+    # Воркер не подавляет сигнал, пока координатор не подтвердил отправку
+    worker_store = _WorkerStateStore(cooldown_seconds=60)
+    worker_store.record("BTC/USDT", "ПОКУПКА", item["bar_time"])
+    assert not coordinator.deliver(item)
+    assert assignments.empty() and worker_store.should_emit("BTC/USDT", "ПОКУПКА", item["bar_time"])
+    assert coordinator.deliver(item)
+    ack = assignments.get_nowait()
+    assert ack == ("ack", "BTC/USDT", "ПОКУПКА", item["bar_time"])
+    worker_store.acknowledge(*ack[1:])
+    assert not worker_store.should_emit("BTC/USDT", "ПОКУПКА", item["bar_time"])
+
+
+def _echo_worker(name, assignments, signals, log_queue, interval):
+    symbols = assignments.get()
+    while symbols is not None:
+        if not isinstance(symbols, tuple):  # Подтверждения отправки воркеру-эху не нужны
+            for symbol in symbols:
+                signals.put({"worker": name, "symbol": symbol, "direction": "ПОКУПКА",
+                             "bar_time": "bar-1", "message": symbol, "chart_path": None})
+        symbols = assignments.get()
+
+
+def test_worker_processes_report_to_one_notifier():
+    sent = []
+    coordinator = ShardCoordinator(state_store=SignalStateStore(), target=_echo_worker,
+                                   notify=lambda message, chart_path: sent.append(message))
+    symbols = SYMBOLS[:20]
+    coordinator.start(2, symbols)
+    coordinator.add_worker()
+    deadline = time.time() + 30
+    while len(sent) < len(symbols) and time.time() < deadline:
+        time.sleep(0.05)
+    coordinator.stop()
+    # Повторные назначения при подключении третьего воркера не дали дублей
+    assert sorted(sent) == sorted(symbols)
@@ -0,0 +1,47 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bot.data.shared_frames import SharedFrame
+
+
+def make_frame(bars=100):
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2025-01-01", periods=bars, freq="5min"),
+        "close": np.linspace(100, 110, bars),
+        "hour": np.arange(bars) % 24
+    })
+    return df.iloc[20:]  # Индекс как после dropna в fetch_ohlcv
+
+
+def test_attached_frame_reads_owner_memory_without_copy():
+    df = make_frame()
+    with SharedFrame.from_frame(df) as owner:
+        descriptor = pickle.loads(pickle.dumps(owner.descriptor))
+        assert len(pickle.dumps(descriptor)) < 400
+
+        reader = SharedFrame.attach(descriptor)
+        frame = reader.frame()
+        pd.testing.assert_frame_equal(frame, df)
+        assert np.shares_memory(frame["close"].to_numpy(), reader.array("close"))
+
+        owner.array("close")[0] = -1.0
+        assert frame["close"].iloc[0] == -1.0
+        with pytest.raises(ValueError):
+            reader.array("close")[0] = 1.0
+
+        del frame
+        reader.close()
+
+
+def test_parallel_backtests_match_serial_run():
+    from bot.core.backtest import run_backtest, run_backtests
+    from bot.data.data_fetch import fetch_ohlcv
+    from bot.data.synthetic import StubExchange
+
+    exchange = StubExchange(history_bars=400)
+    frames = {symbol: fetch_ohlcv(symbol, exchange, "5m", limit=400) for symbol in ("A/USDT", "B/USDT")}
+    results = run_backtests(frames, workers=2)
+    assert results == [run_backtest(symbol, df) for symbol, df in frames.items()]
@@ -1,18 +1,17 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from bot.core.strategy import analyze_symbol, add_indicators, generate_signal, analyze_trend, analyze_momentum, analyze_volume
+from bot.core.strategy import (
+    analyze_symbol, add_indicators, generate_signal, analyze_trend, analyze_momentum, analyze_volume,
+    format_signal_message
+)
 from bot.notifications.notifier import send_telegram_message
-from bot.config import TIMEFRAME, SYMBOLS, STOP_LOSS_PCT, TAKE_PROFIT_PCT, RSI_OVERSOLD, RSI_OVERBOUGHT
+from bot.config import TIMEFRAME, SYMBOLS, RSI_OVERSOLD, RSI_OVERBOUGHT
 from bot.visualization.visualizer import plot_signal
+from bot.logging_config import setup_logging
 import logging
 import os
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 def create_test_data():
@@ -89,37 +88,8 @@ def test_analyze_symbol(symbol, df):
             
             logger.info(f"График сохранен в: {chart_filename}")
             
-            # Форматирование сообщения
-            msg = f"\n{'🟢' if signal['signal'] == 'ПОКУПКА' else '🔴'} {signal['signal']} {symbol}\n"
-            msg += f"Сила сигнала: {signal['strength']}\n"
-            msg += f"Цена входа: {signal['price']:.2f}$\n"
-            msg += f"Стоп-лосс: {signal['stop_loss']:.2f}$ ({STOP_LOSS_PCT*100}%)\n"
-            msg += f"Тейк-профит: {signal['take_profit']:.2f}$ ({TAKE_PROFIT_PCT*100}%)\n"
-            msg += f"Размер позиции: {signal['position_size']*100:.1f}%\n"
-            msg += f"Плечо: {signal['leverage']}x\n"
-            
-            # Добавление деталей анализа
-            analysis = signal['analysis']
-            msg += f"\nАнализ тренда:\n"
-            msg += f"- Сила тренда: {analysis['trend']['trend_strength']:.2f}\n"
-            msg += f"- Тренд EMA: {analysis['trend']['ema_trend']}\n"
-            msg += f"- Тренд MACD: {analysis['trend']['macd_trend']}\n"
-            msg += f"- Тренд Ишимоку: {analysis['trend']['ichimoku_trend']}\n"
-            
-            msg += f"\nАнализ импульса:\n"
-            msg += f"- RSI: {analysis['momentum']['rsi']:.2f} ({analysis['momentum']['rsi_signal']})\n"
-            msg += f"- Стохастик: {analysis['momentum']['stoch_k']:.2f}/{analysis['momentum']['stoch_d']:.2f}\n"
-            msg += f"- Williams %R: {analysis['momentum']['williams_r']:.2f} ({analysis['momentum']['williams_signal']})\n"
-            msg += f"- Скорость изменения: {analysis['momentum']['roc']:.2f}% ({analysis['momentum']['roc_signal']})\n"
-            
-            msg += f"\nАнализ объема:\n"
-            msg += f"- Всплеск объема: {'Да' if analysis['volume']['volume_spike'] else 'Нет'}\n"
-            msg += f"- Тренд индекса силы: {'Положительный' if analysis['volume']['force_trend'] else 'Отрицательный'}\n"
-            msg += f"- Тренд OBV: {'Положительный' if analysis['volume']['obv_trend'] else 'Отрицательный'}\n"
-            
-            msg += f"\nАнализ волатильности:\n"
-            msg += f"- ATR: {analysis['volatility']['atr']:.2f} ({analysis['volatility']['atr_percent']:.2f}%)\n"
-            msg += f"- Ширина полос Боллинджера: {analysis['volatility']['bb_width']:.2f}\n"
+            # Тот же текст, что бот отправляет по сигналу
+            msg = format_signal_message(symbol, signal)
             
             # Отправка сообщения и графика в Telegram
             logger.info("Отправка сообщения в Telegram...")
@@ -133,6 +103,8 @@ def test_analyze_symbol(symbol, df):
         raise
 
 def main():
+    setup_logging()
+    
     # Выбор тестовой пары (BTC/USDT)
     symbol = SYMBOLS[0]
     
@@ -0,0 +1,107 @@
+from bot.core.signal_state import SignalStateStore
+
+
+def test_same_bar_and_direction_is_suppressed():
+    store = SignalStateStore(cooldown_seconds=0)
+    assert store.check_and_record("BTC/USDT", "ПОКУПКА", "2025-01-01 00:05:00", now=0)
+    assert not store.check_and_record("BTC/USDT", "ПОКУПКА", "2025-01-01 00:05:00", now=30)
+    # Новый бар без охлаждения проходит
+    assert store.check_and_record("BTC/USDT", "ПОКУПКА", "2025-01-01 00:10:00", now=300)
+
+
+def test_cooldown_and_reversal():
+    store = SignalStateStore(cooldown_seconds=900)
+    assert store.check_and_record("ETH/USDT", "ПОКУПКА", "bar1", now=0)
+    assert not store.check_and_record("ETH/USDT", "ПОКУПКА", "bar2", now=300)
+    # Разворот не ограничен охлаждением
+    assert store.check_and_record("ETH/USDT", "ПРОДАЖА", "bar2", now=301)
+    assert store.check_and_record("ETH/USDT", "ПОКУПКА", "bar5", now=1500)
+
+
+def test_state_survives_restart(tmp_path):
+    db_path = str(tmp_path / "signals.db")
+    store = SignalStateStore(cooldown_seconds=0, db_path=db_path)
+    store.record("SOL/USDT", "ПРОДАЖА", "bar1", now=0)
+    store.close()
+
+    restored = SignalStateStore(cooldown_seconds=0, db_path=db_path)
+    assert not restored.should_emit("SOL/USDT", "ПРОДАЖА", "bar1", now=10)
+    assert restored.should_emit("SOL/USDT", "ПРОДАЖА", "bar2", now=10)
+    restored.close()
+
+
+def test_flip_within_one_bar_does_not_resend():
+    store = SignalStateStore(cooldown_seconds=0)
+    assert store.check_and_record("BTC/USDT", "ПОКУПКА", "bar1", now=0)
+    assert store.check_and_record("BTC/USDT", "ПРОДАЖА", "bar1", now=10)
+    assert not store.check_and_record("BTC/USDT", "ПОКУПКА", "bar1", now=20)
+    assert store.check_and_record("BTC/USDT", "ПОКУПКА", "bar2", now=300)
+
+
+def test_signal_is_recorded_only_after_delivery(monkeypatch):
+    import pandas as pd
+    from bot.core import strategy
+
+    df = pd.DataFrame({"timestamp": pd.to_datetime([0, 300], unit="s"), "close": [1.0, 1.0]})
+    monkeypatch.setattr(strategy, "add_indicators", lambda frame: frame)
+    monkeypatch.setattr(strategy, "generate_signal", lambda symbol, frame, market=None: {"signal": "ПОКУПКА"})
+    monkeypatch.setattr(strategy, "format_signal_message", lambda symbol, signal: "сигнал")
+    outcomes = iter([False, True])
+    monkeypatch.setattr(strategy, "publish_signal", lambda *args: next(outcomes))
+    store = SignalStateStore(cooldown_seconds=0)
+
+    # Отправка не удалась - сигнал не записан и на следующем цикле уходит снова
+    assert strategy.analyze_symbol("BTC/USDT", None, df=df, state_store=store) is None
+    assert store.should_emit("BTC/USDT", "ПОКУПКА", df["timestamp"].iloc[-1])
+    assert strategy.analyze_symbol("BTC/USDT", None, df=df, state_store=store)
+    assert not store.should_emit("BTC/USDT", "ПОКУПКА", df["timestamp"].iloc[-1])
+
+    confirms = []
+    strategy.analyze_symbol("ETH/USDT", None, df=df, state_store=store,
+                            collect=lambda *args, confirm: confirms.append(confirm))
+    assert store.should_emit("ETH/USDT", "ПОКУПКА", df["timestamp"].iloc[-1])
+    confirms[0]()
+    assert not store.should_emit("ETH/USDT", "ПОКУПКА", df["timestamp"].iloc[-1])
+
+
+def test_run_cycle_trades_only_delivered_cluster_signals(monkeypatch):
+    import pandas as pd
+    from bot.core import main
+    from bot.core.correlation import SignalClusterer
+
+    df = pd.DataFrame({"timestamp": pd.to_datetime([0, 300], unit="s"), "high": [1.0, 1.0], "low": [1.0, 1.0],
+                       "close": [1.0, 1.0]})
+    monkeypatch.setattr(main, "fetch_ohlcv", lambda *args, **kwargs: df)
+    monkeypatch.setattr(main, "validate_data", lambda frame, symbol: True)
+
+    def analyze(symbol, exchange, collect=None, **kwargs):
+        signal = {"signal": "ПОКУПКА"}
+        collect(symbol, signal, 300, "сигнал", df, confirm=lambda: None)
+        return signal
+
+    class Recorder:
+        def __init__(self):
+            self.calls = []
+
+        def open_position(self, symbol, signal, opened_at):
+            self.calls.append(symbol)
+
+        def update(self, *candles):
+            return []
+
+        def execute(self, fired):
+            self.calls.extend(symbol for symbol, _ in fired)
+
+        def reconcile(self):
+            pass
+
+    monkeypatch.setattr(main, "analyze_symbol", analyze)
+    outcomes = iter([False, True])
+    clusterer = SignalClusterer(window=10, publish=lambda *args: next(outcomes))
+    paper_book, executor = Recorder(), Recorder()
+
+    # Кластер не доставлен - ни бумажной позиции, ни ордеров; на следующем цикле сигнал уходит снова
+    main.run_cycle(None, ["BTC/USDT"], paper_book=paper_book, executor=executor, clusterer=clusterer)
+    assert paper_book.calls == [] and executor.calls == []
+    main.run_cycle(None, ["BTC/USDT"], paper_book=paper_book, executor=executor, clusterer=clusterer)
+    assert paper_book.calls == ["BTC/USDT"] and executor.calls == ["BTC/USDT"]
@@ -0,0 +1,11 @@
+from bot.benchmarks.startup import measure_import
+
+
+def test_strategy_import_does_not_load_heavy_modules():
+    _, loaded = measure_import("bot.core.strategy", repeat=1)
+    assert loaded == []
+
+
+def test_cli_import_is_lightweight():
+    _, loaded = measure_import("bot.cli", repeat=1)
+    assert loaded == []
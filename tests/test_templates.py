@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+from bot.config import STOP_LOSS_PCT
+from bot.notifications.digest import CycleDigest
+from bot.notifications.templates import (
+    CLUSTER_MEMBER, DIGEST_LINE, Template, escape_markdown, render_signal, split_message
+)
+
+
+def make_signal(direction="ПОКУПКА", price=100.0, trend_strength=30.0, market=None):
+    return {
+        "signal": direction,
+        "strength": "СИЛЬНЫЙ",
+        "price": price,
+        "stop_loss": price * 0.98,
+        "take_profit": price * 1.06,
+        "position_size": 0.1,
+        "leverage": 5,
+        "analysis": {
+            "trend": {"trend_strength": trend_strength, "ema_trend": "Восходящий", "macd_trend": "Восходящий",
+                      "ichimoku_trend": "Выше облака"},
+            "momentum": {"rsi": 28.5, "rsi_signal": "Перепроданность", "stoch_k": 15.0, "stoch_d": 18.0,
+                         "williams_r": -85.0, "williams_signal": "Перепроданность", "roc": 1.5,
+                         "roc_signal": "Положительный"},
+            "volume": {"volume_spike": True, "force_trend": True, "obv_trend": False},
+            "volatility": {"atr": 1.2, "atr_percent": 1.2, "bb_width": 0.05},
+            "market": market
+        }
+    }
+
+
+def make_frame(closes):
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame({"close": closes, "ema21": closes * 0.99, "rsi": np.full(len(closes), 55.0)})
+
+
+def test_escape_markdown_marks_entity_characters():
+    assert escape_markdown("1000PEPE_USDT *x* `y` [z]") == "1000PEPE\\_USDT \\*x\\* \\`y\\` \\[z]"
+    assert Template("{symbol} {symbol!s}").render({"symbol": "A_B"}) == "A\\_B A\\_B"
+    assert Template("{symbol}", escape=None).render({"symbol": "A_B"}) == "A_B"
+
+
+def test_template_drops_missing_lines_and_empty_blocks():
+    template = Template("Заголовок {name}\n\nРынок:\n- Ставка: {rate:.2%}\n- ОИ: {oi:.0f}\n\nКонец")
+    full = template.render({"name": "X", "rate": 0.01, "oi": 5.4})
+    assert full == "Заголовок X\n\nРынок:\n- Ставка: 1.00%\n- ОИ: 5\n\nКонец"
+    assert template.render({"name": "X", "rate": None, "oi": 5.4}) == "Заголовок X\n\nРынок:\n- ОИ: 5\n\nКонец"
+    assert template.render({"name": "X"}) == "Заголовок X\n\nКонец"
+
+
+def test_signal_message_keeps_text_and_market_lines():
+    market = {"funding_rate": 0.0001, "open_interest": 12345.6, "open_interest_change_pct": -1.234,
+              "book_imbalance": None}
+    message = render_signal("BTC/USDT", make_signal(market=market))
+
+    assert message.startswith("🔔 Сигнал для BTC/USDT:\nПОКУПКА BTC/USDT\nСила сигнала: СИЛЬНЫЙ\n")
+    assert f"Стоп-лосс: 98.00$ ({STOP_LOSS_PCT * 100}%)\n" in message
+    assert "Размер позиции: 10.0%\nПлечо: 5x\n" in message
+    assert "- Всплеск объема: Да\n- Тренд индекса силы: Положительный\n- Тренд OBV: Отрицательный\n" in message
+    assert message.endswith("- Ставка финансирования: 0.0100%\n- Открытый интерес: 12346 (-1.23%)\n")
+    assert "Рыночные данные" not in render_signal("BTC/USDT", make_signal())
+
+
+def test_cluster_and_digest_levels_are_readable():
+    btc = make_signal(price=65432.1)
+    line = CLUSTER_MEMBER.render({"symbol": "BTC/USDT", "signal": btc})
+    assert line == "- BTC/USDT: вход 65432.10$, стоп 64123.46$, тейк 69358.03$"
+    assert "вход 0.0001234$" in DIGEST_LINE.render({"symbol": "PEPE/USDT", "signal": make_signal(price=0.0001234),
+                                                    "analysis": btc["analysis"]})
+
+
+def test_split_message_respects_limit():
+    text = "\n".join(f"строка {i}" for i in range(100))
+    parts = split_message(text, limit=50)
+    assert all(len(part) <= 50 for part in parts)
+    assert "\n".join(parts) == text
+    assert split_message("x" * 120, limit=50) == ["x" * 50, "x" * 50, "x" * 20]
+
+
+def test_digest_sends_one_message_with_leader_chart():
+    published = []
+    sent = []
+    digest = CycleDigest(publish=lambda symbol, signal, bar_time, message, df, deliver: published.append(
+        (symbol, message, df)), send=sent.append)
+    frames = {"AAA/USDT": make_frame(np.linspace(100, 110, 30)), "BBB/USDT": make_frame(np.linspace(100, 95, 30)),
+              "CCC/USDT": make_frame(np.full(30, 100.0))}
+    for symbol, df in frames.items():
+        digest.observe(symbol, df)
+    digest.collect("AAA/USDT", make_signal(trend_strength=30), 0, "", frames["AAA/USDT"])
+    digest.collect("BBB/USDT", make_signal("ПРОДАЖА", trend_strength=45), 0, "", frames["BBB/USDT"])
+
+    assert [symbol for symbol, _ in digest.flush()] == ["AAA/USDT", "BBB/USDT"]
+    assert sent == []
+    (symbol, message, df), = published
+    assert symbol == "BBB/USDT" and df is frames["BBB/USDT"]
+    assert message.startswith("📋 Сигналы за цикл: 2\n\nПОКУПКА:\n- AAA/USDT: вход 100.00$")
+    assert "ПРОДАЖА:\n- BBB/USDT: вход 100.00$, стоп 98.00$, тейк 106.00$ (ADX 45, RSI 28)" in message
+    assert "Рынок, 3 пар за 1 мин: выше EMA21 100%, медиана RSI 55.0" in message
+    assert "- Рост: AAA/USDT +" in message and "- Падение: BBB/USDT -" in message
+    assert message.endswith("График: BBB/USDT")
+
+    assert digest.flush() == []  # Новый цикл без сигналов - ничего не отправляется
+    assert len(published) == 1
+
+
+def test_digest_falls_back_to_text_and_keeps_market_across_ticks():
+    now = [1000.0]
+    sent = []
+
+    def broken_chart(*args):
+        raise RuntimeError("no chart")
+
+    digest = CycleDigest(publish=broken_chart, send=sent.append, market_age=300, clock=lambda: now[0])
+    digest.observe("AAA/USDT", make_frame(np.linspace(100, 110, 30)))
+    now[0] += 120  # Следующий тик планировщика анализирует другой символ
+    digest.observe("BBB/USDT", make_frame(np.linspace(100, 95, 30)))
+    confirmed = []
+    digest.collect("BBB/USDT", make_signal(), 0, "", None, confirm=lambda: confirmed.append("BBB/USDT"))
+
+    assert [symbol for symbol, _ in digest.flush()] == ["BBB/USDT"]
+    message, = sent
+    assert "Рынок, 2 пар за 2 мин" in message and "График" not in message
+    assert confirmed == ["BBB/USDT"]
+
+    now[0] += 250  # AAA старше market_age и выпадает из обзора
+    digest.collect("BBB/USDT", make_signal(), 1, "", None)
+    digest.flush()
+    assert "Рынок, 1 пар за 5 мин" in sent[-1]
+
+
+def test_digest_splits_long_message():
+    published = []
+    sent = []
+    digest = CycleDigest(limit=200, publish=lambda *args: published.append(args[3]), send=sent.append)
+    for i in range(10):
+        digest.collect(f"S{i}/USDT", make_signal(), 0, "", None)
+    digest.flush()
+
+    assert len(sent) >= 1 and len(published) == 1
+    assert all(len(part) <= 200 for part in sent + published)
+    assert sum(part.count("- S") for part in sent + published) == 10
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", payload=None):
+        self.status_code = status_code
+        self.text = text
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    """Bot API answers: getMe succeeds, Markdown is refused once"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url):
+        self.calls.append(("getMe", None))
+        return FakeResponse(200, payload={"ok": True, "result": {"username": "test_bot"}})
+
+    def post(self, url, data=None, files=None):
+        self.calls.append((url.rsplit("/", 1)[-1], data.get("parse_mode")))
+        if data.get("parse_mode"):
+            return FakeResponse(400, '{"ok":false,"description":"Bad Request: can\'t parse entities"}')
+        return FakeResponse(200)
+
+
+def test_notifier_verifies_once_and_resends_unparsed_markdown(monkeypatch):
+    from bot.notifications import notifier
+
+    session = FakeSession()
+    monkeypatch.setattr(notifier, "_session", session)
+    monkeypatch.setattr(notifier, "_verified_url", None)
+    monkeypatch.setattr(notifier.time, "sleep", lambda seconds: None)
+    notifier.send_telegram_message("*BTC_USDT")
+    notifier.send_telegram_message("*ETH_USDT")
+
+    assert session.calls == [("getMe", None), ("sendMessage", "Markdown"), ("sendMessage", None),
+                             ("sendMessage", "Markdown"), ("sendMessage", None)]
@@ -1,14 +1,34 @@
-from bot.core.main import run_bot
-import threading
+import json
+import urllib.request
+from bot.config import METRICS_PORT, BOT_RUNTIME_MODE, LOG_DIR
+from bot.core.runtime import get_runtime
+from bot.monitoring.metrics import render_metrics, CONTENT_TYPE
+from bot.logging_config import setup_logging
+
+# В режиме process файл лога пишет процесс бота, веб-процесс пишет только в консоль
+setup_logging(log_dir=None if BOT_RUNTIME_MODE == "process" else LOG_DIR)
+
+# Бот запускается один раз при загрузке приложения, а не на каждый запрос
+runtime = get_runtime()
+runtime.start()
+
+def _metrics_body():
+    # В режиме process метрики живут в дочернем процессе бота
+    if runtime.mode == "process" and METRICS_PORT:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{METRICS_PORT}/metrics", timeout=2) as response:
+                return response.read()
+        except OSError:
+            pass
+    return render_metrics().encode('utf-8')
 
 def application(environ, start_response):
-    # Запускаем бота в отдельном потоке
-    bot_thread = threading.Thread(target=run_bot)
-    bot_thread.daemon = True
-    bot_thread.start()
-    
-    # Возвращаем простой ответ для веб-сервера
+    if environ.get('PATH_INFO', '') == '/metrics':
+        start_response('200 OK', [('Content-type', CONTENT_TYPE)])
+        return [_metrics_body()]
+
+    # Статус берется из общей памяти супервизора и не нагружает торговый цикл
     status = '200 OK'
-    headers = [('Content-type', 'text/plain')]
+    headers = [('Content-type', 'application/json')]
     start_response(status, headers)
-    return [b'Bot is running'] 
\ No newline at end of file
+    return [json.dumps(runtime.snapshot()).encode('utf-8')]
\ No newline at end of file